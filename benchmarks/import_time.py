@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for the worldmind package.
+
+Measures the cumulative import time of `import worldmind` (as reported by
+`python -X importtime`, so interpreter startup is excluded) and checks that
+importing the package and its lightweight entry points does not eagerly
+load heavy dependencies. Exits with status 1 if either check fails.
+
+Usage:
+    python benchmarks/import_time.py [--budget-ms 50] [--runs 7] [--out results.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+HEAVY_MODULES = ("numpy", "rdflib", "pyshacl", "torch", "transformers", "sklearn")
+
+# Statements that must stay free of heavy imports.
+LIGHT_IMPORTS = (
+    "import worldmind",
+    "import worldmind.models",
+    "from worldmind import AbstentionPolicy",
+)
+
+
+def _run(code: str, *flags: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def import_time_ms(module: str = "worldmind") -> float:
+    """Cumulative import time of `module` in a fresh interpreter, in milliseconds."""
+    stderr = _run(f"import {module}", "-X", "importtime").stderr
+    # Lines read "import time: <self us> | <cumulative us> | <module>".
+    for line in reversed(stderr.splitlines()):
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1e3
+    raise RuntimeError(f"No import-time entry for {module}")
+
+
+def heavy_modules_loaded(statement: str) -> list:
+    """Heavy dependencies present in sys.modules after running `statement`."""
+    code = (
+        f"import json, sys\n{statement}\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    return json.loads(_run(code).stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check the import-time budget of the worldmind package.")
+    parser.add_argument("--budget-ms", type=float, default=50.0, help="Maximum import time in ms")
+    parser.add_argument("--runs", type=int, default=7, help="Fresh interpreters to time (best run counts)")
+    parser.add_argument("--out", type=str, default=None, help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    timings = [import_time_ms() for _ in range(args.runs)]
+    best = min(timings)
+    eager = {statement: heavy_modules_loaded(statement) for statement in LIGHT_IMPORTS}
+
+    print(f"import worldmind: best {best:.1f} ms, median {sorted(timings)[len(timings) // 2]:.1f} ms "
+          f"over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    failed = best > args.budget_ms
+    if failed:
+        print(f"❌ Import time exceeds the budget by {best - args.budget_ms:.1f} ms")
+    for statement, modules in eager.items():
+        if modules:
+            failed = True
+            print(f"❌ '{statement}' eagerly imports: {', '.join(modules)}")
+    if not failed:
+        print("✅ Import-time budget met")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(
+                {
+                    "budget_ms": args.budget_ms,
+                    "timings_ms": timings,
+                    "best_ms": best,
+                    "eager_imports": eager,
+                    "passed": not failed,
+                },
+                f,
+                indent=2,
+            )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the rivers quantity parser (graph_rag/scripts/quantity_parser.py).
+
+Times parse_quantities over synthetic length / elevation / discharge columns
+against the per-value regex parsing build_graph.py used before, and reports
+how often the two disagree.
+
+Usage:
+    python benchmarks/quantity_parsing.py [--rows 200000] [--repeat 3] [--out results.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "experiments", "poc_4_rivers_extended", "graph_rag", "scripts"))
+
+from quantity_parser import PARSED, RANGE, parse_quantities  # noqa: E402
+
+FORMATS = {
+    "length": ["{:.1f} mi", "{:.0f} km", "{:.2f}", "{:,.0f} ft", "{:.3e}", ""],
+    "elevation": ["{:,.0f} ft", "{:.0f} m", "{:.1f}", "{:.0f} feet", "", "unknown"],
+    "discharge": ["{:.1f}", "{:.0f} cfs", "{:.0f} to {:.0f} cubic feet per second", "{:.1f} m3/s", ""],
+}
+
+
+def legacy_parse(value: str, kind: str):
+    """Per-value parsing as build_graph.py did it before the column parser."""
+    if not value or value.strip() == '':
+        return None
+    match = re.search(r'(\d+\.?\d*)', value)
+    if not match:
+        return None
+    num = float(match.group())
+    if kind == "length":
+        if 'mi' in value.lower() or 'mile' in value.lower():
+            return num * 1609.34
+        elif 'km' in value.lower() or 'kilometer' in value.lower():
+            return num * 1000
+        return num
+    if kind == "elevation":
+        if 'feet' in value.lower() or 'ft' in value.lower():
+            return num * 0.3048
+        return num
+    return num
+
+
+def make_column(kind: str, rows: int, seed: int) -> list:
+    rng = random.Random(seed)
+    column = []
+    for _ in range(rows):
+        fmt = rng.choice(FORMATS[kind])
+        low = rng.uniform(1, 5000)
+        column.append(fmt.format(low, low * rng.uniform(1, 4)))
+    return column
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the quantity parser.")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="Write the results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for kind in FORMATS:
+        column = make_column(kind, args.rows, args.seed)
+        legacy_s = best_of(lambda: [legacy_parse(v, kind) for v in column], args.repeat)
+        column_s = best_of(lambda: parse_quantities(column, kind), args.repeat)
+
+        values, status = parse_quantities(column, kind)
+        legacy = np.array([np.nan if v is None else v for v in (legacy_parse(v, kind) for v in column)])
+        parsed = np.isin(status, (PARSED, RANGE))
+        differs = (parsed != ~np.isnan(legacy)) | (parsed & ~np.isclose(values, legacy, rtol=1e-4))
+        results[kind] = {
+            "rows": args.rows,
+            "legacy_us_per_value": legacy_s / args.rows * 1e6,
+            "column_us_per_value": column_s / args.rows * 1e6,
+            "speedup": legacy_s / column_s,
+            "parsed_fraction": float(parsed.mean()),
+            "differs_from_legacy_fraction": float(differs.mean()),
+        }
+        r = results[kind]
+        print(f"{kind:10s} legacy {r['legacy_us_per_value']:.2f} us/value, "
+              f"column {r['column_us_per_value']:.2f} us/value ({r['speedup']:.1f}x), "
+              f"{r['differs_from_legacy_fraction']:.1%} differ from legacy")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
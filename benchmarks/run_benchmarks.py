@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the core oracle path on synthetic graphs.
+
+For every domain (rivers-v4, battles) and scale (e.g. 10k ... 10M triples)
+this measures:
+  - graph generation and GraphStore load time (rdflib parse and snapshot open)
+  - peak RSS, with each phase run in a fresh subprocess
+  - audit_claim / audit_claims throughput
+  - SHACL validation time (full pyshacl run, compiled constraints,
+    incremental validation per claim)
+  - graph retrieval latency p50/p99 (rivers)
+
+Everything runs offline. Results are written as JSON so runs can be compared.
+
+Usage:
+    python benchmarks/run_benchmarks.py --scales 10k,100k,1M --domains rivers,battles
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+GRAPH_RAG_SCRIPTS = os.path.join(PROJECT_ROOT, "experiments", "poc_4_rivers_extended", "graph_rag", "scripts")
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux and bytes on macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1 << 20) if sys.platform == "darwin" else rss / 1024
+
+
+def latency_stats(samples) -> dict:
+    import numpy as np
+
+    samples = np.asarray(samples) * 1e3
+    return {
+        "n": int(len(samples)),
+        "mean_ms": float(samples.mean()),
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p99_ms": float(np.percentile(samples, 99)),
+    }
+
+
+def throughput(fn, items) -> dict:
+    start = time.perf_counter()
+    fn(items)
+    elapsed = time.perf_counter() - start
+    return {"n": len(items), "seconds": elapsed, "per_second": len(items) / elapsed if elapsed else None}
+
+
+# ----------------------------------------------------------------------
+# Phases (each runs in its own interpreter)
+# ----------------------------------------------------------------------
+
+def phase_generate(args) -> dict:
+    from synthetic import GENERATORS, parse_scale, sample_claims, write_graph
+
+    start = time.perf_counter()
+    store = GENERATORS[args.domain](parse_scale(args.scale), seed=args.seed)
+    generated = time.perf_counter()
+    write_graph(store, args.graph)
+    written = time.perf_counter()
+
+    claims, expected = sample_claims(store, args.domain, args.claims, seed=args.seed)
+    inputs = {"claims": claims, "expected": expected.tolist()}
+    if args.domain == "rivers":
+        rivers = [c["subject"] for c in claims if c["subject"].rsplit("/", 1)[-1].startswith("Synthetic_River_")]
+        names = [iri.rsplit("/", 1)[-1].replace("_", " ") for iri in rivers[: args.queries]]
+        inputs["queries"] = [{"question": f"What is the length of the {name}?", "river_name": name} for name in names]
+    with open(args.inputs, "w") as f:
+        json.dump(inputs, f)
+
+    return {
+        "triples": len(store),
+        "terms": len(store.terms),
+        "generate_s": generated - start,
+        "write_s": written - generated,
+        "turtle_mb": os.path.getsize(args.graph) / 1e6,
+        "snapshot_mb": os.path.getsize(os.path.splitext(args.graph)[0] + ".wmsnap") / 1e6,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def phase_rdflib(args, inputs) -> dict:
+    from worldmind import ConsistencyAuditor, GraphStore
+    from synthetic import SHACL_PATHS
+
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    graph = GraphStore(args.graph).get_graph()
+    result = {"load_s": time.perf_counter() - start, "peak_rss_mb": peak_rss_mb(), "rss_before_mb": rss_before}
+
+    auditor = ConsistencyAuditor(SHACL_PATHS[args.domain])
+    claims = inputs["claims"]
+    result["audit_claim"] = throughput(lambda items: [auditor.audit_claim(graph, c) for c in items], claims)
+    result["audit_claims"] = throughput(lambda items: auditor.audit_claims(graph, items), claims)
+
+    if len(graph) <= args.max_shacl_triples:
+        from pyshacl import validate
+
+        start = time.perf_counter()
+        conforms, _, _ = validate(graph, shacl_graph=auditor.shacl_graph)
+        result["shacl_full"] = {"seconds": time.perf_counter() - start, "conforms": bool(conforms)}
+    return result
+
+
+def phase_snapshot(args, inputs) -> dict:
+    from worldmind import ConsistencyAuditor, GraphStore
+    from synthetic import SHACL_PATHS
+
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    graph = GraphStore.open_snapshot(args.graph).get_graph()
+    result = {"load_s": time.perf_counter() - start, "rss_before_mb": rss_before}
+
+    auditor = ConsistencyAuditor(SHACL_PATHS[args.domain])
+    claims = inputs["claims"]
+    result["audit_claim"] = throughput(lambda items: [auditor.audit_claim(graph, c) for c in items], claims)
+    result["audit_claims"] = throughput(lambda items: auditor.audit_claims(graph, items), claims)
+    licensed = auditor.audit_claims(graph, claims).tolist()
+    result["audit_matches_expected"] = licensed == inputs["expected"]
+
+    start = time.perf_counter()
+    auditor.compile_constraints(graph)
+    result["shacl_compile_s"] = time.perf_counter() - start
+    result["check_claims"] = throughput(lambda items: auditor.check_claims(graph, items), claims)
+
+    samples = []
+    for claim in claims[: args.incremental_claims]:
+        start = time.perf_counter()
+        auditor.validate_claim(graph, claim)
+        samples.append(time.perf_counter() - start)
+    result["incremental_validation"] = latency_stats(samples)
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def phase_retrieval(args, inputs) -> dict:
+    sys.path.insert(0, GRAPH_RAG_SCRIPTS)
+    from graph_retrieval import GraphRetrievalSystem
+
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    retrieval = GraphRetrievalSystem(args.graph)
+    result = {"load_s": time.perf_counter() - start, "rss_before_mb": rss_before}
+
+    samples = []
+    for query in inputs["queries"]:
+        start = time.perf_counter()
+        retrieval.retrieve_for_question(query["question"], query["river_name"])
+        samples.append(time.perf_counter() - start)
+    result["latency"] = latency_stats(samples)
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+PHASES = {"rdflib": phase_rdflib, "snapshot": phase_snapshot, "retrieval": phase_retrieval}
+
+
+def run_phase(args) -> None:
+    """Entry point of a phase subprocess: prints its result as the last stdout line."""
+    if args.phase == "generate":
+        result = phase_generate(args)
+    else:
+        with open(args.inputs) as f:
+            inputs = json.load(f)
+        result = PHASES[args.phase](args, inputs)
+    print(json.dumps(result))
+
+
+# ----------------------------------------------------------------------
+# Driver
+# ----------------------------------------------------------------------
+
+def spawn(phase: str, domain: str, scale: str, workdir: str, args) -> dict:
+    graph = os.path.join(workdir, f"{domain}_{scale}.ttl")
+    command = [
+        sys.executable, os.path.abspath(__file__), "--phase", phase,
+        "--domain", domain, "--scale", scale,
+        "--graph", graph, "--inputs", os.path.join(workdir, f"{domain}_{scale}.inputs.json"),
+        "--seed", str(args.seed), "--claims", str(args.claims), "--queries", str(args.queries),
+        "--incremental-claims", str(args.incremental_claims),
+        "--max-shacl-triples", str(args.max_shacl_triples),
+    ]
+    start = time.perf_counter()
+    proc = subprocess.run(command, capture_output=True, text=True)
+    if proc.returncode != 0:
+        print(proc.stdout[-2000:], proc.stderr[-2000:], sep="\n")
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"}
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["wall_s"] = time.perf_counter() - start
+    return result
+
+
+def environment() -> dict:
+    import numpy
+    import rdflib
+
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "rdflib": rdflib.__version__,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+    }
+    try:
+        info["git_commit"] = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return info
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the oracle path on synthetic graphs.")
+    parser.add_argument("--scales", default="10k,100k", help="Comma-separated triple counts, e.g. 10k,100k,1M,10M")
+    parser.add_argument("--domains", default="rivers,battles")
+    parser.add_argument("--out", default=None, help="Results JSON (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--workdir", default=None, help="Keep generated graphs here instead of a temp dir")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--claims", type=int, default=10000, help="Claims per audit throughput run")
+    parser.add_argument("--queries", type=int, default=200, help="Retrieval queries per run")
+    parser.add_argument("--incremental-claims", type=int, default=50, help="Claims for incremental SHACL latency")
+    parser.add_argument("--max-rdflib-triples", type=int, default=1_000_000,
+                        help="Skip rdflib loading and retrieval above this size")
+    parser.add_argument("--max-shacl-triples", type=int, default=20_000,
+                        help="Skip full pyshacl validation above this size")
+    # Internal: run a single phase in this process.
+    parser.add_argument("--phase", choices=["generate", *PHASES], help=argparse.SUPPRESS)
+    parser.add_argument("--domain", help=argparse.SUPPRESS)
+    parser.add_argument("--scale", help=argparse.SUPPRESS)
+    parser.add_argument("--graph", help=argparse.SUPPRESS)
+    parser.add_argument("--inputs", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.phase:
+        run_phase(args)
+        return
+
+    from synthetic import GENERATORS, parse_scale
+
+    domains = [d.strip() for d in args.domains.split(",") if d.strip()]
+    scales = [s.strip() for s in args.scales.split(",") if s.strip()]
+    for domain in domains:
+        if domain not in GENERATORS:
+            parser.error(f"Unknown domain '{domain}', expected one of {sorted(GENERATORS)}")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="worldmind-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    out = args.out or os.path.join(BENCH_DIR, "results", f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    report = {"environment": environment(), "settings": vars(args).copy(), "results": []}
+    for key in ("phase", "domain", "scale", "graph", "inputs"):
+        report["settings"].pop(key)
+
+    try:
+        for domain in domains:
+            for scale in scales:
+                print(f"\n--- {domain} @ {scale} triples ---")
+                entry = {"domain": domain, "scale": scale, "target_triples": parse_scale(scale)}
+                entry["generate"] = spawn("generate", domain, scale, workdir, args)
+                print(f"generate: {entry['generate']}")
+                if "error" not in entry["generate"]:
+                    phases = ["snapshot"]
+                    if entry["generate"]["triples"] <= args.max_rdflib_triples:
+                        phases.insert(0, "rdflib")
+                        if domain == "rivers":
+                            phases.append("retrieval")
+                    for phase in phases:
+                        entry[phase] = spawn(phase, domain, scale, workdir, args)
+                        print(f"{phase}: {json.dumps(entry[phase])}")
+                report["results"].append(entry)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {out}")
+
+
+if __name__ == "__main__":
+    main()
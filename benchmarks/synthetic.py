@@ -0,0 +1,234 @@
+"""
+Synthetic knowledge graphs for benchmarking.
+
+Generates graphs shaped like the rivers-v4 (graph_rag) and battles (POC2)
+ontologies at any size, directly as TripleStore ID columns, so even 10M
+triples build in seconds without going through rdflib. Generated graphs
+conform to the experiments' SHACL constraints.
+"""
+
+import hashlib
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from worldmind.graph_store import GraphStore
+from worldmind.triple_store import TermDictionary, TripleStore
+
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+RDFS_LABEL = "http://www.w3.org/2000/01/rdf-schema#label"
+XSD = "http://www.w3.org/2001/XMLSchema#"
+DBR = "http://dbpedia.org/resource/"
+RIVERS = "http://worldmind.ai/rivers-v4#"
+BATTLES = "http://worldmind.ai/battles#"
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SHACL_PATHS = {
+    "rivers": os.path.join(
+        PROJECT_ROOT, "experiments", "poc_4_rivers_extended", "graph_rag", "ontology",
+        "worldmind_constraints.shacl.ttl",
+    ),
+    "battles": os.path.join(PROJECT_ROOT, "experiments", "poc2_battles", "ontology", "worldmind_constraints.shacl.ttl"),
+}
+
+# Claims are sampled from these. All objects are IRIs except rivers:sourceElevation,
+# whose numeric claims exercise the compiled numeric constraints in check_claims.
+CLAIM_PREDICATES = {
+    "rivers": [RIVERS + "traverses", RIVERS + "inCounty", RIVERS + "hasTributary", RIVERS + "partOfSystem",
+               RIVERS + "sourceElevation"],
+    "battles": [BATTLES + "hasCommander", BATTLES + "hasCombatant", BATTLES + "hasNationality"],
+}
+
+
+class _GraphBuilder:
+    """Accumulates term blocks and triple columns for TripleStore.from_ids."""
+
+    def __init__(self):
+        self.keys: List[str] = []
+        self.columns: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+
+    def iris(self, iris) -> np.ndarray:
+        return self.block(f"<{iri}>" for iri in iris)
+
+    def iri(self, iri: str) -> int:
+        return int(self.iris([iri])[0])
+
+    def literals(self, values, datatype: str = None) -> np.ndarray:
+        suffix = f"^^<{datatype}>" if datatype else ""
+        return self.block(f'"{value}"{suffix}' for value in values)
+
+    def doubles(self, *arrays: np.ndarray) -> List[np.ndarray]:
+        """Interns xsd:double literals (shared across arrays) at one decimal."""
+        values = np.round(np.concatenate(arrays), 1)
+        unique, inverse = np.unique(values, return_inverse=True)
+        ids = self.literals((f"{v:.1f}" for v in unique.tolist()), XSD + "double")[inverse]
+        return np.split(ids, np.cumsum([len(a) for a in arrays])[:-1])
+
+    def block(self, keys) -> np.ndarray:
+        start = len(self.keys)
+        self.keys.extend(keys)
+        return np.arange(start, len(self.keys), dtype=np.int32)
+
+    def add(self, s, p, o) -> None:
+        n = max(np.size(s), np.size(o))
+        self.columns.append(tuple(np.broadcast_to(np.asarray(x, dtype=np.int32), n) for x in (s, p, o)))
+
+    def build(self) -> TripleStore:
+        terms = TermDictionary.from_keys(self.keys)
+        s, p, o = (np.concatenate([c[i] for c in self.columns]) for i in range(3))
+        return TripleStore.from_ids(terms, s, p, o)
+
+
+def rivers_graph(n_triples: int, seed: int = 0) -> TripleStore:
+    """Rivers-v4 shaped graph with about `n_triples` triples (~18 per river)."""
+    rng = np.random.default_rng(seed)
+    n = max(1, n_triples // 18)
+    b = _GraphBuilder()
+    p = {name: b.iri(RIVERS + name) for name in (
+        "abstractText", "length", "discharge", "sourceElevation", "mouthElevation", "elevation",
+        "inCountry", "traverses", "inCounty", "partOfSystem", "hasSource", "hasMouth", "hasTributary",
+    )}
+    rdf_type, label = b.iri(RDF_TYPE), b.iri(RDFS_LABEL)
+    cls = {name: b.iri(RIVERS + name) for name in ("River", "Country", "State", "County", "RiverSystem", "GeographicFeature")}
+
+    us = b.iri(DBR + "United_States")
+    states = b.iris(f"{DBR}State_{i}" for i in range(50))
+    counties = b.iris(f"{DBR}County_{i}" for i in range(max(1, n // 20)))
+    systems = b.iris(f"{DBR}River_System_{i}" for i in range(max(1, n // 50)))
+    mouths = b.iris(f"{DBR}Mouth_{i}" for i in range(max(1, n // 10)))
+    rivers = b.iris(f"{DBR}Synthetic_River_{i}" for i in range(n))
+    sources = b.iris(f"{DBR}Source_{i}" for i in range(n))
+
+    mouth_elev = rng.uniform(0, 500, n)
+    source_elev = mouth_elev + rng.uniform(10, 3000, n)
+    length, discharge, source_elev, mouth_elev = b.doubles(
+        rng.uniform(1e3, 4e6, n), rng.uniform(0.5, 2e4, n), source_elev, mouth_elev
+    )
+
+    b.add(us, rdf_type, cls["Country"])
+    b.add(states, rdf_type, cls["State"])
+    b.add(counties, rdf_type, cls["County"])
+    b.add(systems, rdf_type, cls["RiverSystem"])
+    b.add(mouths, rdf_type, cls["GeographicFeature"])
+    b.add(mouths, label, b.literals(f"Mouth {i}" for i in range(len(mouths))))
+
+    b.add(rivers, rdf_type, cls["River"])
+    b.add(rivers, label, b.literals(f"Synthetic River {i}" for i in range(n)))
+    b.add(rivers, p["abstractText"], b.literals(f"Synthetic River {i} is a river in the United States." for i in range(n)))
+    b.add(rivers, p["length"], length)
+    b.add(rivers, p["discharge"], discharge)
+    b.add(rivers, p["sourceElevation"], source_elev)
+    b.add(rivers, p["mouthElevation"], mouth_elev)
+    b.add(rivers, p["inCountry"], us)
+    b.add(rivers, p["traverses"], states[rng.integers(0, len(states), n)])
+    b.add(rivers, p["traverses"], states[rng.integers(0, len(states), n)])
+    b.add(rivers, p["inCounty"], counties[rng.integers(0, len(counties), n)])
+    b.add(rivers, p["partOfSystem"], systems[rng.integers(0, len(systems), n)])
+    b.add(rivers, p["hasMouth"], mouths[rng.integers(0, len(mouths), n)])
+    b.add(rivers, p["hasSource"], sources)
+    b.add(sources, rdf_type, cls["GeographicFeature"])
+    b.add(sources, label, b.literals(f"Source {i}" for i in range(n)))
+    b.add(sources, p["elevation"], source_elev)
+    # Tributary tree: river i flows into river (i - 1) // 3.
+    b.add(rivers[(np.arange(1, n) - 1) // 3], p["hasTributary"], rivers[1:])
+    return b.build()
+
+
+def battles_graph(n_triples: int, seed: int = 0) -> TripleStore:
+    """Battles shaped graph with about `n_triples` triples (~19 per battle)."""
+    rng = np.random.default_rng(seed)
+    n = max(1, n_triples // 19)
+    b = _GraphBuilder()
+    p = {name: b.iri(BATTLES + name) for name in (
+        "occurredOn", "hasCombatant", "hasCommander", "hasNationality", "hasTemporalExtent", "start", "end",
+    )}
+    rdf_type, label = b.iri(RDF_TYPE), b.iri(RDFS_LABEL)
+    cls = {name: b.iri(BATTLES + name) for name in ("Battle", "Commander", "Country")}
+
+    countries = b.iris(f"{DBR}Country_{i}" for i in range(200))
+    dates = b.literals((f"{year:04d}-01-01" for year in range(2100)), XSD + "date")
+    battles = b.iris(f"{DBR}Synthetic_Battle_{i}" for i in range(n))
+    commanders = b.iris(f"{DBR}Commander_{i}" for i in range(2 * n))
+    lifespans = b.iris(f"{DBR}Commander_{i}_lifespan" for i in range(2 * n))
+
+    # Commanders 2i and 2i+1 lead battle i, one per side, and are alive at the time.
+    year = rng.integers(1000, 1900, n)
+    combatant = rng.integers(0, len(countries), n)
+    opponent = (combatant + rng.integers(1, len(countries), n)) % len(countries)
+    birth = np.repeat(year, 2) - rng.integers(20, 50, 2 * n)
+    death = birth + rng.integers(55, 80, 2 * n)
+    nationality = np.stack([combatant, opponent], axis=1).ravel()
+
+    b.add(countries, rdf_type, cls["Country"])
+    b.add(battles, rdf_type, cls["Battle"])
+    b.add(battles, label, b.literals(f"Synthetic Battle {i}" for i in range(n)))
+    b.add(battles, p["occurredOn"], dates[year])
+    b.add(battles, p["hasCombatant"], countries[combatant])
+    b.add(battles, p["hasCombatant"], countries[opponent])
+    b.add(np.repeat(battles, 2), p["hasCommander"], commanders)
+    b.add(commanders, rdf_type, cls["Commander"])
+    b.add(commanders, label, b.literals(f"Commander {i}" for i in range(2 * n)))
+    b.add(commanders, p["hasNationality"], countries[nationality])
+    b.add(commanders, p["hasTemporalExtent"], lifespans)
+    b.add(lifespans, p["start"], dates[birth])
+    b.add(lifespans, p["end"], dates[death])
+    return b.build()
+
+
+GENERATORS = {"rivers": rivers_graph, "battles": battles_graph}
+
+
+def parse_scale(scale: str) -> int:
+    """Parses '10k', '1M' or '250000' into a triple count."""
+    scale = scale.strip()
+    multiplier = {"k": 10 ** 3, "m": 10 ** 6}.get(scale[-1].lower(), 1)
+    return int(float(scale[:-1] if multiplier > 1 else scale) * multiplier)
+
+
+def write_graph(store: TripleStore, graph_path: str, chunk: int = 100_000) -> None:
+    """
+    Writes the graph as N-Triples (which is valid Turtle) plus a fresh binary
+    snapshot next to it, so GraphStore.open_snapshot does not need to parse it.
+    """
+    keys = [store.terms.key(i) for i in range(len(store.terms))]
+    with open(graph_path, "w", encoding="utf-8") as f:
+        for start in range(0, len(store), chunk):
+            rows = zip(*(column[start:start + chunk].tolist() for column in (store.s, store.p, store.o)))
+            f.writelines(f"{keys[s]} {keys[p]} {keys[o]} .\n" for s, p, o in rows)
+
+    digest = hashlib.sha256()
+    with open(graph_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    stat = os.stat(graph_path)
+    # Same source fields GraphStore checks for snapshot freshness.
+    source = {"sha256": digest.hexdigest(), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    store.save(GraphStore.default_snapshot_path(graph_path), source=source)
+
+
+def sample_claims(store: TripleStore, domain: str, n: int, seed: int = 0) -> Tuple[List[Dict], np.ndarray]:
+    """
+    Samples n claims over CLAIM_PREDICATES, about half of them true.
+
+    Returns:
+        Tuple[List[Dict], np.ndarray]: Claim dicts and whether each is licensed,
+        i.e. in the graph with an IRI object (audit_claims reads objects as IRIs).
+    """
+    rng = np.random.default_rng(seed)
+    predicate_ids = [store.terms.lookup(f"<{iri}>") for iri in CLAIM_PREDICATES[domain]]
+    rows = np.flatnonzero(np.isin(store.p, [i for i in predicate_ids if i >= 0]))
+    picked = rows[rng.integers(0, len(rows), n)]
+    s, p, o = store.s[picked], store.p[picked], store.o[picked].copy()
+    # Corrupt half the objects with the object of another row of the same predicate.
+    corrupt = rng.random(n) < 0.5
+    for predicate in np.unique(p[corrupt]):
+        same = rows[store.p[rows] == predicate]
+        mask = corrupt & (p == predicate)
+        o[mask] = store.o[same[rng.integers(0, len(same), mask.sum())]]
+    value = store.terms.value
+    claims = [
+        {"subject": value(si), "predicate": value(pi), "object": value(oi)}
+        for si, pi, oi in zip(s.tolist(), p.tolist(), o.tolist())
+    ]
+    return claims, store.contains_ids(s, p, o) & store.terms.iri_mask()[o]
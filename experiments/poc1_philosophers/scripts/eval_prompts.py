@@ -28,7 +28,7 @@ def run_evaluation():
     graph_path = os.path.join(experiment_dir, params["data"]["knowledge_graph"])
     constraints_path = os.path.join(experiment_dir, params["ontology"]["constraints"])
     
-    store = GraphStore(graph_path)
+    store = GraphStore.open_snapshot(graph_path)
     auditor = ConsistencyAuditor(constraints_path)
     policy = AbstentionPolicy()
 
@@ -44,28 +44,23 @@ def run_evaluation():
     results = []
     passed_count = 0
 
-    # 4. Process each prompt
-    for item in prompts:
+    # 4. Audit and decide all claims in one batch (items without a claim are never licensed)
+    licenses = auditor.audit_claims(base_graph, [item.get("claim") for item in prompts])
+    decisions = policy.decide_batch(licenses)
+
+    # 5. Process each prompt
+    for item, final_decision in zip(prompts, decisions.tolist()):
         prompt_id = item["id"]
         prompt_text = item["prompt"]
         claim = item.get("claim")
         expected_decision = item["expected"]
 
-        # a. Audit the claim to get a license
-        if claim:
-            is_licensed = auditor.audit_claim(base_graph, claim)
-        else:
-            is_licensed = False  # No claim to audit
-
-        # b. Make a final decision using the policy
-        final_decision = policy.decide(is_licensed)
-
-        # c. Check if the outcome was correct
+        # a. Check if the outcome was correct
         is_pass = final_decision == expected_decision
         if is_pass:
             passed_count += 1
 
-        # d. Record the result
+        # b. Record the result
         result_entry = {
             "id": prompt_id,
             "prompt": prompt_text,
@@ -81,7 +76,7 @@ def run_evaluation():
             f"[{prompt_id}] {prompt_text} -> Expected: {expected_decision}, Got: {final_decision} [{status}]"
         )
 
-    # 5. Save results to an artifact file
+    # 6. Save results to an artifact file
     summary = {
         "total_prompts": len(prompts),
         "passed": passed_count,
@@ -28,7 +28,7 @@ def run_evaluation():
     graph_path = os.path.join(experiment_dir, params["data"]["knowledge_graph"])
     constraints_path = os.path.join(experiment_dir, params["ontology"]["constraints"])
     
-    store = GraphStore(graph_path)
+    store = GraphStore.open_snapshot(graph_path)
     auditor = ConsistencyAuditor(constraints_path)
     policy = AbstentionPolicy()
 
@@ -44,28 +44,23 @@ def run_evaluation():
     results = []
     passed_count = 0
 
-    # 4. Process each answer
-    for item in answers:
+    # 4. Audit and decide all claims in one batch (items without a claim are never licensed)
+    licenses = auditor.audit_claims(base_graph, [item.get("claim") for item in answers])
+    decisions = policy.decide_batch(licenses)
+
+    # 5. Process each answer
+    for item, final_decision in zip(answers, decisions.tolist()):
         answer_id = item["id"]
         answer_text = item["answer"]
         claim = item.get("claim")
         expected_decision = item["expected"]
 
-        # a. Audit the claim to get a license
-        if claim:
-            is_licensed = auditor.audit_claim(base_graph, claim)
-        else:
-            is_licensed = False  # No claim to audit
-
-        # b. Make a final decision using the policy
-        final_decision = policy.decide(is_licensed)
-
-        # c. Check if the outcome was correct
+        # a. Check if the outcome was correct
         is_pass = final_decision == expected_decision
         if is_pass:
             passed_count += 1
 
-        # d. Record the result
+        # b. Record the result
         claim_display = "N/A"
         if claim:
             subj = claim['subject'].split('/')[-1].replace('_', ' ')
@@ -88,7 +83,7 @@ def run_evaluation():
             f"[{answer_id}] {answer_text[:60]}... -> Expected: {expected_decision}, Got: {final_decision} [{status}]"
         )
 
-    # 5. Save results to an artifact file
+    # 6. Save results to an artifact file
     summary = {
         "total_answers": len(answers),
         "passed": passed_count,
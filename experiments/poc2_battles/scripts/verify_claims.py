@@ -50,33 +50,29 @@ def main() -> None:
         )
     )
 
-    store = GraphStore(GRAPH_PATH)
+    store = GraphStore.open_snapshot(GRAPH_PATH)
     auditor = ConsistencyAuditor(CONSTRAINTS_PATH)
     policy = AbstentionPolicy()
     base_graph = store.get_graph()
 
-    results = []
-    passed = 0
-    total = 0
-
     with open(claims_path, "r") as inf:
-        for line in inf:
-            total += 1
-            rec = json.loads(line)
-            claim = normalize_claim(rec.get("claim", {}))
-
-            is_licensed = False
-            if claim["subject"] and claim["predicate"] and claim["object"]:
-                is_licensed = auditor.audit_claim(base_graph, claim)
-
-            decision = policy.decide(is_licensed)
-            # There is no ground-truth here, just report decision and license
-            results.append({
-                "id": rec.get("id"),
-                "claim": claim,
-                "licensed": is_licensed,
-                "decision": decision,
-            })
+        records = [json.loads(line) for line in inf]
+    claims = [normalize_claim(rec.get("claim", {})) for rec in records]
+    total = len(records)
+
+    # Incomplete claims are never licensed
+    licenses = auditor.audit_claims(base_graph, claims)
+    decisions = policy.decide_batch(licenses)
+
+    results = []
+    for rec, claim, is_licensed, decision in zip(records, claims, licenses.tolist(), decisions.tolist()):
+        # There is no ground-truth here, just report decision and license
+        results.append({
+            "id": rec.get("id"),
+            "claim": claim,
+            "licensed": is_licensed,
+            "decision": decision,
+        })
 
     summary = {
         "total": total,
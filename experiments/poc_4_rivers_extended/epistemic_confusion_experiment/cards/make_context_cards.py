@@ -20,11 +20,19 @@ Label meanings:
 
 import argparse
 import json
+import os
 import random
+import sys
 from typing import List, Tuple, Set
 from pathlib import Path
 from rdflib import Graph, URIRef, Namespace
 
+# Add the project root to the path so we can import worldmind
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from worldmind import GraphStore
+
 
 def extract_label(uri: str) -> str:
     """Extract human-readable label from URI."""
@@ -83,8 +91,7 @@ def main():
     
     # Load knowledge graph
     print(f"Loading knowledge graph from {args.kg}...")
-    g = Graph()
-    g.parse(args.kg, format="turtle")
+    g = GraphStore.open_snapshot(args.kg).get_graph()
     print(f"Loaded {len(g)} triples")
     
     # Extract triples for the specified predicate
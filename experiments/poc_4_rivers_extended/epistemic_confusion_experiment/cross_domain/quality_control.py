@@ -12,10 +12,18 @@ Run with: python3 quality_control.py
 """
 
 import json
+import os
 import random
+import sys
 from rdflib import Graph, URIRef
 from pathlib import Path
 
+# Add the project root to the path so we can import worldmind
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from worldmind import GraphStore
+
 
 def log_section(title):
     """Print a formatted section header"""
@@ -42,8 +50,7 @@ def extract_label(uri: str) -> str:
 def load_knowledge_graph(kg_path: str) -> Graph:
     """Load and return the knowledge graph"""
     print(f"Loading knowledge graph from: {kg_path}")
-    g = Graph()
-    g.parse(kg_path, format="turtle")
+    g = GraphStore.open_snapshot(kg_path).get_graph()
     print(f"✓ Loaded {len(g)} triples")
     return g
 
@@ -20,14 +20,20 @@ Outputs JSONL with per-card results:
 
 import argparse
 import json
+import os
 import sys
 from typing import Dict, Optional
 from pathlib import Path
 from abc import ABC, abstractmethod
 
+# Add the project root to the path so we can import worldmind
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
 # Optional imports for specific adapters
 try:
-    from rdflib import Graph, URIRef
+    from rdflib import URIRef
+    from worldmind import GraphStore
     RDFLIB_AVAILABLE = True
 except ImportError:
     RDFLIB_AVAILABLE = False
@@ -200,8 +206,7 @@ class GraphRAGAdapter(BaseAdapter):
         self.shacl_path = shacl_path
         
         print(f"[GraphRAG] Loading knowledge graph from {kg_path}...")
-        self.graph = Graph()
-        self.graph.parse(kg_path, format="turtle")
+        self.graph = GraphStore.open_snapshot(kg_path).get_graph()
         print(f"[GraphRAG] Loaded {len(self.graph)} triples")
         
         if shacl_path:
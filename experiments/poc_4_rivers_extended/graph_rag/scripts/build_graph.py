@@ -4,11 +4,21 @@ Build knowledge graph from rivers CSV data.
 Converts CSV rows to RDF triples using the worldmind ontology.
 """
 
+import argparse
 import csv
+import hashlib
+import heapq
+import json
 import os
 import re
 import sys
-from typing import Dict, Any, List
+import tempfile
+from array import array
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterable, Iterator, List, Tuple
+from urllib.parse import quote
+import numpy as np
 from rdflib import Graph, Namespace, URIRef, Literal, BNode
 from rdflib.namespace import RDF, RDFS, XSD
 
@@ -19,74 +29,49 @@ PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(EXPERIMENT_DIR)))
 
 sys.path.insert(0, PROJECT_ROOT)
 
+from worldmind.graph_store import GraphStore
+from worldmind.triple_store import TermDictionary, TripleStore, term_key
+from build_manifest import BuildManifest, write_delta
+from quantity_parser import parse_quantities, parse_quantity
+from river_profiles import RiverProfileTable
+
 # Namespaces
 WM = Namespace("http://worldmind.ai/rivers-v4#")
 DBR = Namespace("http://dbpedia.org/resource/")
 
+# Bump when the row -> triples mapping changes, so incremental builds re-process every row
+TRIPLES_VERSION = 3
+
+# Characters N-Triples does not allow inside an IRI
+INVALID_IRI_CHARS = re.compile(r'[\x00-\x20<>"{}|^`\\]')
+
+# CSV column -> quantity kind
+QUANTITY_COLUMNS = {
+    'length': 'length',
+    'discharge': 'discharge',
+    'sourceElevation': 'elevation',
+    'mouthElevation': 'elevation',
+}
+
 def parse_length(length_str: str) -> float:
-    """Parse length string to meters (convert mi to m)."""
-    if not length_str or length_str.strip() == '':
-        return None
-    
-    # Extract number - must have at least one digit
-    match = re.search(r'(\d+\.?\d*)', length_str)
-    if not match:
-        return None
-    
-    try:
-        num = float(match.group())
-    except ValueError:
-        return None
-    
-    # Check unit
-    if 'mi' in length_str.lower() or 'mile' in length_str.lower():
-        return num * 1609.34  # Convert miles to meters
-    elif 'km' in length_str.lower() or 'kilometer' in length_str.lower():
-        return num * 1000
-    else:
-        return num  # assume meters
+    """Parse length string to meters (mi, km, ft converted)."""
+    return parse_quantity(length_str, 'length')
     
 def parse_elevation(elev_str: str) -> float:
     """Parse elevation string to meters."""
-    if not elev_str or elev_str.strip() == '':
-        return None
-    
-    # Extract number - must have at least one digit
-    match = re.search(r'(\d+\.?\d*)', elev_str)
-    if not match:
-        return None
-    
-    try:
-        num = float(match.group())
-    except ValueError:
-        return None
-    
-    # Check unit
-    if 'feet' in elev_str.lower() or 'ft' in elev_str.lower():
-        return num * 0.3048  # Convert feet to meters
-    elif 'meter' in elev_str.lower() or 'm' in elev_str.lower() or 'metre' in elev_str.lower():
-        return num
-    else:
-        return num
+    return parse_quantity(elev_str, 'elevation')
     
 def parse_discharge(discharge_str: str) -> float:
-    """Parse discharge to m³/s."""
-    if not discharge_str or discharge_str.strip() == '':
-        return None
-    
-    # Extract number - must have at least one digit
-    match = re.search(r'(\d+\.?\d*)', discharge_str)
-    if not match:
-        return None
-    
-    try:
-        num = float(match.group())
-    except ValueError:
-        return None
-    
-    # For now, assume it's already in m³/s if present
-    # (many entries are ranges like "50 to 200 cubic feet per second")
-    return num
+    """Parse discharge to m³/s (cfs converted, ranges to their midpoint)."""
+    return parse_quantity(discharge_str, 'discharge')
+
+def parse_row_quantities(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Parse the quantity columns of a chunk of rows, one column at a time."""
+    columns = {}
+    for column, kind in QUANTITY_COLUMNS.items():
+        values, _ = parse_quantities([row.get(column) for row in rows], kind)
+        columns[column] = [None if v != v else v for v in values.tolist()]  # NaN -> None
+    return [{column: values[i] for column, values in columns.items()} for i in range(len(rows))]
 
 def clean_uri_part(name: str) -> str:
     """Clean a name to make it URI-safe."""
@@ -104,51 +89,56 @@ def clean_uri_part(name: str) -> str:
     cleaned = cleaned.strip('_')
     return cleaned
 
-def add_river_triples(g: Graph, row: Dict[str, Any]) -> None:
-    """Add triples for a river to the graph."""
-    
-    river_uri = URIRef(row['river'])
-    g.add((river_uri, RDF.type, WM.River))
-    g.add((river_uri, RDFS.label, Literal(row['riverName'])))
+def iri(value: str) -> URIRef:
+    """URIRef of a raw IRI, with the characters N-Triples forbids in IRIs percent-encoded."""
+    return URIRef(INVALID_IRI_CHARS.sub(lambda m: quote(m.group()), value))
+
+def river_triples(row: Dict[str, Any], quantities: Dict[str, Any] = None) -> Iterator[Tuple]:
+    """
+    Yield the triples for a river (possibly with duplicates). `quantities`
+    holds the row's parsed quantity columns (see parse_row_quantities).
+    """
+    if quantities is None:
+        quantities = parse_row_quantities([row])[0]
+    
+    river_uri = iri(row['river'])
+    yield (river_uri, RDF.type, WM.River)
+    yield (river_uri, RDFS.label, Literal(row['riverName']))
     
     # Add abstract if present
     if row.get('abstract'):
-        g.add((river_uri, WM.abstractText, Literal(row['abstract'])))
+        yield (river_uri, WM.abstractText, Literal(row['abstract']))
     
     # Add other names
     if row.get('otherNames'):
-        g.add((river_uri, WM.otherNames, Literal(row['otherNames'])))
+        yield (river_uri, WM.otherNames, Literal(row['otherNames']))
     
     # Add length
-    if row.get('length'):
-        length = parse_length(row['length'])
-        if length:
-            g.add((river_uri, WM.length, Literal(length, datatype=XSD.double)))
+    length = quantities['length']
+    if length:
+        yield (river_uri, WM.length, Literal(length, datatype=XSD.double))
     
     # Add discharge
-    if row.get('discharge'):
-        discharge = parse_discharge(row['discharge'])
-        if discharge:
-            g.add((river_uri, WM.discharge, Literal(discharge, datatype=XSD.double)))
+    discharge = quantities['discharge']
+    if discharge:
+        yield (river_uri, WM.discharge, Literal(discharge, datatype=XSD.double))
     
     # Add source elevation
-    if row.get('sourceElevation'):
-        src_elev = parse_elevation(row['sourceElevation'])
-        if src_elev:
-            g.add((river_uri, WM.sourceElevation, Literal(src_elev, datatype=XSD.double)))
+    src_elev = quantities['sourceElevation']
+    if src_elev:
+        yield (river_uri, WM.sourceElevation, Literal(src_elev, datatype=XSD.double))
     
     # Add mouth elevation
-    if row.get('mouthElevation'):
-        mouth_elev = parse_elevation(row['mouthElevation'])
-        if mouth_elev:
-            g.add((river_uri, WM.mouthElevation, Literal(mouth_elev, datatype=XSD.double)))
+    mouth_elev = quantities['mouthElevation']
+    if mouth_elev:
+        yield (river_uri, WM.mouthElevation, Literal(mouth_elev, datatype=XSD.double))
     
     # Add country
     if row.get('country'):
         country_name = clean_uri_part(row['country'])
-        country_uri = URIRef(DBR[country_name])
-        g.add((country_uri, RDF.type, WM.Country))
-        g.add((river_uri, WM.inCountry, country_uri))
+        country_uri = iri(DBR[country_name])
+        yield (country_uri, RDF.type, WM.Country)
+        yield (river_uri, WM.inCountry, country_uri)
     
     # Add states
     if row.get('state'):
@@ -156,9 +146,9 @@ def add_river_triples(g: Graph, row: Dict[str, Any]) -> None:
         for state_str in states:
             state_str = state_str.strip()
             if state_str:
-                state_uri = URIRef(DBR[clean_uri_part(state_str)])
-                g.add((state_uri, RDF.type, WM.State))
-                g.add((river_uri, WM.traverses, state_uri))
+                state_uri = iri(DBR[clean_uri_part(state_str)])
+                yield (state_uri, RDF.type, WM.State)
+                yield (river_uri, WM.traverses, state_uri)
     
     # Add counties
     if row.get('county'):
@@ -166,39 +156,37 @@ def add_river_triples(g: Graph, row: Dict[str, Any]) -> None:
         for county_str in counties:
             county_str = county_str.strip()
             if county_str:
-                county_uri = URIRef(DBR[clean_uri_part(county_str)])
-                g.add((county_uri, RDF.type, WM.County))
-                g.add((river_uri, WM.inCounty, county_uri))
+                county_uri = iri(DBR[clean_uri_part(county_str)])
+                yield (county_uri, RDF.type, WM.County)
+                yield (river_uri, WM.inCounty, county_uri)
     
     # Add river system
     if row.get('riverSystem'):
         sys_name = clean_uri_part(row['riverSystem'])
-        sys_uri = URIRef(DBR[sys_name])
-        g.add((sys_uri, RDF.type, WM.RiverSystem))
-        g.add((river_uri, WM.partOfSystem, sys_uri))
+        sys_uri = iri(DBR[sys_name])
+        yield (sys_uri, RDF.type, WM.RiverSystem)
+        yield (river_uri, WM.partOfSystem, sys_uri)
     
     # Add source location (GeographicFeature)
     if row.get('sourceLocation'):
         source_name = clean_uri_part(row['sourceLocation'])
-        source_uri = URIRef(DBR[source_name])
-        g.add((source_uri, RDF.type, WM.GeographicFeature))
-        g.add((source_uri, RDFS.label, Literal(row['sourceLocation'])))
-        g.add((river_uri, WM.hasSource, source_uri))
+        source_uri = iri(DBR[source_name])
+        yield (source_uri, RDF.type, WM.GeographicFeature)
+        yield (source_uri, RDFS.label, Literal(row['sourceLocation']))
+        yield (river_uri, WM.hasSource, source_uri)
         
         # Add source elevation to the feature
-        if row.get('sourceElevation'):
-            src_elev = parse_elevation(row['sourceElevation'])
-            if src_elev:
-                g.add((source_uri, WM.elevation, Literal(src_elev, datatype=XSD.double)))
+        if src_elev:
+            yield (source_uri, WM.elevation, Literal(src_elev, datatype=XSD.double))
     
     # Add mouth location
     if row.get('riverMouth'):
         mouth_name = clean_uri_part(row['riverMouth'])
-        mouth_uri = URIRef(DBR[mouth_name])
-        g.add((mouth_uri, RDF.type, WM.GeographicFeature))
+        mouth_uri = iri(DBR[mouth_name])
+        yield (mouth_uri, RDF.type, WM.GeographicFeature)
         if row.get('mouthLocation'):
-            g.add((mouth_uri, RDFS.label, Literal(row['mouthLocation'])))
-        g.add((river_uri, WM.hasMouth, mouth_uri))
+            yield (mouth_uri, RDFS.label, Literal(row['mouthLocation']))
+        yield (river_uri, WM.hasMouth, mouth_uri)
     
     # Add tributaries
     for prefix in ['leftTributary', 'rightTributary']:
@@ -207,13 +195,226 @@ def add_river_triples(g: Graph, row: Dict[str, Any]) -> None:
             tributary_name = row[prefix]
             if not tributary_name.startswith('http://'):
                 tributary_name = DBR[clean_uri_part(tributary_name)]
-            tributary_uri = URIRef(tributary_name)
-            g.add((tributary_uri, RDF.type, WM.River))
-            g.add((river_uri, WM.hasTributary, tributary_uri))
+            tributary_uri = iri(tributary_name)
+            yield (tributary_uri, RDF.type, WM.River)
+            yield (river_uri, WM.hasTributary, tributary_uri)
+
+def add_river_triples(g: Graph, row: Dict[str, Any]) -> None:
+    """Add triples for a river to the graph."""
+    for triple in river_triples(row):
+        g.add(triple)
+
+def read_csv_chunks(input_csv: str, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Yield the CSV rows in lists of up to chunk_size rows."""
+    with open(input_csv, 'r', encoding='utf-8') as f:
+        chunk = []
+        for row in csv.DictReader(f):
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+def ntriples_line(triple: Tuple) -> str:
+    """N-Triples line of a triple, without the newline."""
+    for term in triple:
+        if isinstance(term, URIRef) and INVALID_IRI_CHARS.search(term):
+            raise ValueError(f"Invalid IRI for N-Triples: {str(term)!r}")
+    s, p, o = triple
+    return f"{term_key(s)} {term_key(p)} {term_key(o)} ."
+
+def row_hash(row: Dict[str, Any]) -> bytes:
+    """Content hash of a CSV row (and of TRIPLES_VERSION)."""
+    encoded = json.dumps([TRIPLES_VERSION, row], sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.blake2b(encoded, digest_size=16).digest()
+
+def expand_rows(rows: List[Dict[str, Any]]) -> List[List[str]]:
+    """Sorted, deduplicated N-Triples lines of each row."""
+    return [
+        sorted({ntriples_line(triple) for triple in river_triples(row, quantities)})
+        for row, quantities in zip(rows, parse_row_quantities(rows))
+    ]
+
+def write_shard(args: Tuple[int, List[Dict[str, Any]], str]) -> str:
+    """Write the sorted, deduplicated N-Triples lines of a chunk of rows to a shard file."""
+    index, rows, shard_dir = args
+    lines = set()
+    for row, quantities in zip(rows, parse_row_quantities(rows)):
+        for triple in river_triples(row, quantities):
+            lines.add(ntriples_line(triple) + '\n')
+    path = os.path.join(shard_dir, f"shard_{index:06d}.nt")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(sorted(lines))
+    return path
+
+def merge_shards(shard_paths: List[str], output_path: str, exclude: Iterable[str] = ()) -> TripleStore:
+    """
+    K-way merge of sorted shards into one sorted N-Triples file, dropping
+    duplicate lines and the lines in `exclude`. The same pass interns the
+    terms, so the merged triples come back as a TripleStore without
+    re-parsing the output.
+    """
+    exclude = set(exclude)
+    ids: Dict[str, int] = {}
+    columns = (array('i'), array('i'), array('i'))
+    files = [open(path, 'r', encoding='utf-8') for path in shard_paths]
+    try:
+        with open(output_path, 'w', encoding='utf-8') as out:
+            previous = None
+            for line in heapq.merge(*files):
+                if line == previous or line in exclude:
+                    continue
+                previous = line
+                out.write(line)
+                # Subjects and predicates are IRIs, which cannot contain '>'
+                s, p, o = line.split('> ', 2)
+                for column, key in zip(columns, (s + '>', p + '>', o[:-3])):
+                    term_id = ids.get(key)
+                    if term_id is None:
+                        term_id = ids[key] = len(ids)
+                    column.append(term_id)
+    finally:
+        for f in files:
+            f.close()
+    s, p, o = (np.frombuffer(column, dtype=np.int32) for column in columns)
+    return TripleStore.from_ids(TermDictionary.from_keys(list(ids)), s, p, o)
+
+def build_ntriples(input_csv: str, output_path: str, workers: int = None, chunk_size: int = 2000) -> TripleStore:
+    """
+    Builds the graph without an rdflib Graph: worker processes turn chunks
+    of CSV rows into sorted N-Triples shards, which are merged into
+    output_path (N-Triples is valid Turtle) and encoded into a TripleStore.
+    The store is also saved as the graph's binary snapshot.
+    """
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    with tempfile.TemporaryDirectory(prefix="shards-", dir=output_dir) as shard_dir:
+        shard_paths = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Bounded window of in-flight chunks, so the CSV is never held in memory whole
+            window = 2 * (workers or os.cpu_count() or 1)
+            pending = deque()
+            rows = 0
+            for index, chunk in enumerate(read_csv_chunks(input_csv, chunk_size)):
+                pending.append(pool.submit(write_shard, (index, chunk, shard_dir)))
+                rows += len(chunk)
+                if len(pending) >= window:
+                    shard_paths.append(pending.popleft().result())
+                    print(f"Processed {rows} rivers...")
+            shard_paths.extend(future.result() for future in pending)
+        print(f"Merging {len(shard_paths)} shards into {output_path}...")
+        store = merge_shards(shard_paths, output_path)
+
+    save_snapshot(store, output_path)
+    return store
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def save_snapshot(store: TripleStore, graph_path: str) -> None:
+    """Saves the store as the graph's snapshot, tagged like GraphStore.save_snapshot so GraphStore opens it as fresh."""
+    stat = os.stat(graph_path)
+    store.source = {"sha256": file_sha256(graph_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    store.save(GraphStore.default_snapshot_path(graph_path), source=store.source)
+
+def incremental_build(input_csv: str, output_path: str, manifest_path: str, delta_path: str,
+                      workers: int = None, chunk_size: int = 2000) -> TripleStore:
+    """
+    Rebuilds the graph from the rows that changed since the last build.
+
+    Rows are keyed by content hash in the manifest (see BuildManifest), so
+    only added rows are turned into triples (in worker processes) and only
+    the triples of removed rows are looked up. A triple leaves the graph
+    once no row produces it. The sorted graph file is rewritten in one merge
+    pass, and the triples added and removed are written to delta_path.
+
+    Without a manifest matching the current graph file this is a full build.
+    """
+    manifest = BuildManifest(manifest_path)
+    previous = manifest.graph_sha256
+    if previous is not None and (not os.path.exists(output_path) or file_sha256(output_path) != previous):
+        print(f"{output_path} does not match the build manifest, rebuilding from scratch...")
+        previous = None
+    if previous is None:
+        manifest.reset()
+    old_counts = manifest.row_counts()
+
+    seen = Counter()
+    added_rows = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        window = 2 * (workers or os.cpu_count() or 1)
+        pending = deque()
+        rows, hashes = [], []
+        
+        def submit():
+            pending.append((hashes, pool.submit(expand_rows, rows)))
+            while len(pending) > window:
+                done_hashes, future = pending.popleft()
+                added_rows.extend(zip(done_hashes, future.result()))
+        
+        for chunk in read_csv_chunks(input_csv, chunk_size):
+            for row in chunk:
+                h = row_hash(row)
+                seen[h] += 1
+                # Identical rows beyond the count in the manifest are new instances
+                if seen[h] > old_counts.get(h, 0):
+                    rows.append(row)
+                    hashes.append(h)
+            if len(rows) >= chunk_size:
+                submit()
+                rows, hashes = [], []
+        if rows:
+            submit()
+        for done_hashes, future in pending:
+            added_rows.extend(zip(done_hashes, future.result()))
+
+    removed_rows = {h: n - seen[h] for h, n in old_counts.items() if n > seen[h]}
+    print(f"Rows: {sum(seen.values())} total, {len(added_rows)} added, {sum(removed_rows.values())} removed")
+    added, removed = manifest.apply(added_rows, removed_rows)
+    print(f"Triples: {len(added)} added, {len(removed)} removed")
+
+    if previous is not None and not added and not removed:
+        store = GraphStore(output_path, backend='snapshot').get_graph()
+    else:
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        with tempfile.TemporaryDirectory(prefix="delta-", dir=output_dir) as tmp_dir:
+            shard_paths = []
+            if previous is not None:
+                shard_paths.append(os.path.join(tmp_dir, "previous.nt"))
+                os.replace(output_path, shard_paths[-1])
+            shard_paths.append(os.path.join(tmp_dir, "added.nt"))
+            with open(shard_paths[-1], 'w', encoding='utf-8') as f:
+                f.writelines(line + '\n' for line in sorted(added))
+            store = merge_shards(shard_paths, output_path, exclude=(line + '\n' for line in removed))
+        save_snapshot(store, output_path)
+
+    manifest.graph_sha256 = store.source["sha256"]
+    manifest.close()
+    write_delta(delta_path, added, removed, previous, store.source["sha256"])
+    return store
 
 def main():
+    parser = argparse.ArgumentParser(description="Build the rivers knowledge graph from CSV.")
+    parser.add_argument('--input', default=None,
+                        help="Rivers CSV (default: ../data/raw_rivers_filled.csv)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes for the N-Triples builder (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=2000,
+                        help="CSV rows per worker task / shard")
+    parser.add_argument('--full', action='store_true',
+                        help="Ignore the build manifest and rebuild every row")
+    parser.add_argument('--no-manifest', action='store_true',
+                        help="Plain parallel build, without recording a manifest or writing a delta")
+    parser.add_argument('--rdflib', action='store_true',
+                        help="Build an in-memory rdflib Graph and serialize it as pretty Turtle instead")
+    args = parser.parse_args()
+    
     data_dir = os.path.join(os.path.dirname(EXPERIMENT_DIR), "data")
-    input_csv = os.path.join(data_dir, "raw_rivers_filled.csv")
+    input_csv = args.input or os.path.join(data_dir, "raw_rivers_filled.csv")
     
     if not os.path.exists(input_csv):
         print(f"ERROR: Input file not found: {input_csv}")
@@ -222,30 +423,51 @@ def main():
     graph_dir = os.path.join(EXPERIMENT_DIR, "data")
     os.makedirs(graph_dir, exist_ok=True)
     output_ttl = os.path.join(graph_dir, "knowledge_graph.ttl")
-    
-    g = Graph()
-    g.bind("wm", WM)
-    g.bind("dbr", DBR)
+    manifest_path = os.path.join(graph_dir, "build_manifest.sqlite")
+    delta_path = os.path.join(graph_dir, "knowledge_graph.delta")
     
     print(f"Loading data from {input_csv}...")
     
-    with open(input_csv, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        count = 0
+    if args.rdflib:
+        g = Graph()
+        g.bind("wm", WM)
+        g.bind("dbr", DBR)
         
-        for row in reader:
-            add_river_triples(g, row)
-            count += 1
+        with open(input_csv, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            count = 0
             
-            if count % 100 == 0:
-                print(f"Processed {count} rivers...")
-    
-    print(f"Serializing {len(g)} triples to {output_ttl}...")
-    g.serialize(destination=output_ttl, format='turtle')
+            for row in reader:
+                add_river_triples(g, row)
+                count += 1
+                
+                if count % 100 == 0:
+                    print(f"Processed {count} rivers...")
+        
+        print(f"Serializing {len(g)} triples to {output_ttl}...")
+        g.serialize(destination=output_ttl, format='turtle')
+        with open(output_ttl, 'rb') as f:
+            graph_sha256 = hashlib.sha256(f.read()).hexdigest()
+    elif args.no_manifest:
+        g = build_ntriples(input_csv, output_ttl, workers=args.workers, chunk_size=args.chunk_size)
+        graph_sha256 = g.source["sha256"]
+    else:
+        if args.full and os.path.exists(manifest_path):
+            os.remove(manifest_path)
+        g = incremental_build(input_csv, output_ttl, manifest_path, delta_path,
+                              workers=args.workers, chunk_size=args.chunk_size)
+        graph_sha256 = g.source["sha256"]
+        print(f"Delta written to {delta_path}")
+    
+    # Denormalized per-river facts, tied to this exact Turtle file
+    profiles_path = os.path.join(graph_dir, "river_profiles.npz")
+    profiles = RiverProfileTable.from_graph(g, graph_sha256)
+    profiles.save(profiles_path)
     
     print(f"Graph built successfully!")
     print(f"Total triples: {len(g)}")
     print(f"Saved to: {output_ttl}")
+    print(f"River profiles: {len(profiles)} rows saved to {profiles_path}")
 
 if __name__ == "__main__":
     main()
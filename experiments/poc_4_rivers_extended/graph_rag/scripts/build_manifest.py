@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Build manifest and graph deltas for incremental rivers graph rebuilds.
+The manifest records the triples each CSV row produced, so a rebuild only
+retracts and re-adds the triples of changed, added or removed rows.
+"""
+
+import os
+import sqlite3
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from worldmind.triple_store import key_to_term
+
+
+class BuildManifest:
+    """
+    SQLite record of the last build: the content hash, multiplicity and
+    N-Triples lines of every CSV row, a reference count per triple (number of
+    rows producing it), and the SHA-256 of the graph file that was written.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        with self.db:
+            self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS rows (hash BLOB PRIMARY KEY, count INTEGER NOT NULL, triples TEXT NOT NULL)"
+            )
+            self.db.execute("CREATE TABLE IF NOT EXISTS triples (line TEXT PRIMARY KEY, refs INTEGER NOT NULL)")
+
+    @property
+    def graph_sha256(self) -> Optional[str]:
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'graph_sha256'").fetchone()
+        return row[0] if row else None
+
+    @graph_sha256.setter
+    def graph_sha256(self, value: str):
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('graph_sha256', ?)", (value,))
+
+    def reset(self):
+        with self.db:
+            for table in ('meta', 'rows', 'triples'):
+                self.db.execute(f"DELETE FROM {table}")
+
+    def row_counts(self) -> Dict[bytes, int]:
+        """Row hash -> number of identical rows in the last build."""
+        return dict(self.db.execute("SELECT hash, count FROM rows"))
+
+    def apply(self, added_rows: Iterable[Tuple[bytes, List[str]]],
+              removed_rows: Dict[bytes, int]) -> Tuple[Set[str], Set[str]]:
+        """
+        Records added row instances (hash and N-Triples lines) and removed
+        ones (hash -> number of instances removed).
+
+        Returns:
+            Tuple[Set[str], Set[str]]: Lines that entered the graph (no row
+            produced them before) and lines that left it (no row produces
+            them any more).
+        """
+        change = defaultdict(int)
+        with self.db:
+            for row_hash, n in removed_rows.items():
+                count, triples = self.db.execute(
+                    "SELECT count, triples FROM rows WHERE hash = ?", (row_hash,)
+                ).fetchone()
+                for line in triples.split('\n') if triples else ():
+                    change[line] -= n
+                if count == n:
+                    self.db.execute("DELETE FROM rows WHERE hash = ?", (row_hash,))
+                else:
+                    self.db.execute("UPDATE rows SET count = count - ? WHERE hash = ?", (n, row_hash))
+
+            for row_hash, lines in added_rows:
+                for line in lines:
+                    change[line] += 1
+                self.db.execute(
+                    "INSERT INTO rows (hash, count, triples) VALUES (?, 1, ?) "
+                    "ON CONFLICT(hash) DO UPDATE SET count = count + 1",
+                    (row_hash, '\n'.join(lines)),
+                )
+
+            lines = [line for line, delta in change.items() if delta]
+            before = {}
+            for i in range(0, len(lines), 500):
+                batch = lines[i:i + 500]
+                placeholders = ','.join('?' * len(batch))
+                before.update(self.db.execute(
+                    f"SELECT line, refs FROM triples WHERE line IN ({placeholders})", batch
+                ))
+
+            added, removed = set(), set()
+            updates, deletes = [], []
+            for line in lines:
+                old = before.get(line, 0)
+                new = old + change[line]
+                if new > 0:
+                    updates.append((line, new))
+                    if old == 0:
+                        added.add(line)
+                else:
+                    deletes.append((line,))
+                    if old > 0:
+                        removed.add(line)
+            self.db.executemany("INSERT OR REPLACE INTO triples (line, refs) VALUES (?, ?)", updates)
+            self.db.executemany("DELETE FROM triples WHERE line = ?", deletes)
+        return added, removed
+
+    def close(self):
+        self.db.close()
+
+
+class GraphDelta(NamedTuple):
+    """Triples added to and removed from the graph between two builds."""
+    previous_sha256: Optional[str]
+    current_sha256: str
+    added: List[Tuple]
+    removed: List[Tuple]
+
+
+def write_delta(path: str, added: Iterable[str], removed: Iterable[str],
+                previous_sha256: Optional[str], current_sha256: str):
+    """
+    Writes a delta in RDF Patch style: 'D' and 'A' rows holding N-Triples
+    lines, after comment headers naming the graph hashes it goes between.
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"# previous {previous_sha256 or 'none'}\n")
+        f.write(f"# current {current_sha256}\n")
+        f.writelines(f"D {line}\n" for line in sorted(removed))
+        f.writelines(f"A {line}\n" for line in sorted(added))
+
+
+def _parse_line(line: str) -> Tuple:
+    s, p, o = line.split(' ', 2)
+    return key_to_term(s), key_to_term(p), key_to_term(o[:-2])
+
+
+def read_delta(path: str) -> GraphDelta:
+    """
+    Reads a delta written by build_graph.py as rdflib triples, e.g. to pass
+    `added` to IncrementalValidator.validate() or to refresh the cards and
+    embeddings of the subjects it touches.
+    """
+    headers = {}
+    added, removed = [], []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if line.startswith('# '):
+                name, _, value = line[2:].partition(' ')
+                headers[name] = value
+            elif line.startswith('A '):
+                added.append(_parse_line(line[2:]))
+            elif line.startswith('D '):
+                removed.append(_parse_line(line[2:]))
+    previous = headers.get('previous')
+    return GraphDelta(None if previous in (None, 'none') else previous, headers.get('current'), added, removed)
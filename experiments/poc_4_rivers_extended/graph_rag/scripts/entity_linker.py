@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Entity linking for rivers Graph-RAG experiment.
+Finds every river mentioned in a question with an Aho-Corasick automaton
+built once over the river labels and alternative names in the graph.
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+from rdflib import Namespace
+from rdflib.namespace import RDF, RDFS
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+WM = Namespace("http://worldmind.ai/rivers-v4#")
+
+
+class Mention(NamedTuple):
+    """A name found in the text: [start, end) offsets into the lowercased text."""
+    start: int
+    end: int
+    name: str
+    uris: Tuple
+
+
+class _Automaton:
+    """Pure-Python Aho-Corasick automaton, used when pyahocorasick is not installed."""
+
+    def __init__(self, patterns: List[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.output = [-1]  # pattern ending exactly at each node
+        for index, pattern in enumerate(patterns):
+            node = 0
+            for ch in pattern:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = self.goto[node][ch] = len(self.goto)
+                    self.goto.append({})
+                    self.output.append(-1)
+                node = nxt
+            self.output[node] = index
+
+        # Failure links, plus dictionary links to the nearest suffix node with an output
+        self.fail = [0] * len(self.goto)
+        self.dict_link = [0] * len(self.goto)
+        queue = list(self.goto[0].values())
+        for node in queue:
+            for ch, child in self.goto[node].items():
+                fallback = self.fail[node]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(ch, 0)
+                if target == child:  # children of the root fall back to the root
+                    target = 0
+                self.fail[child] = target
+                self.dict_link[child] = target if self.output[target] >= 0 else self.dict_link[target]
+                queue.append(child)
+
+    def iter(self, text: str) -> Iterable[Tuple[int, int]]:
+        """Yields (end index, pattern index) for every occurrence, like pyahocorasick."""
+        goto, fail, output, dict_link = self.goto, self.fail, self.output, self.dict_link
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            match = node if output[node] >= 0 else dict_link[node]
+            while match:
+                yield i, output[match]
+                match = dict_link[match]
+
+
+class EntityLinker:
+    """Case-insensitive, whole-word matcher of graph names in free text."""
+
+    def __init__(self, names: Iterable[Tuple[str, object]], min_length: int = 3):
+        """
+        Args:
+            names: (surface name, URI) pairs; a name may map to several URIs,
+                kept in the order given.
+            min_length: Shorter names are ignored.
+        """
+        uris: Dict[str, List] = {}
+        for name, uri in names:
+            name = name.strip().lower()
+            if len(name) >= min_length:
+                entry = uris.setdefault(name, [])
+                if uri not in entry:
+                    entry.append(uri)
+        self.names = list(uris)
+        self.uris = [tuple(uris[name]) for name in self.names]
+
+        if AHOCORASICK_AVAILABLE:
+            self.automaton = ahocorasick.Automaton()
+            for index, name in enumerate(self.names):
+                self.automaton.add_word(name, index)
+            if self.names:
+                self.automaton.make_automaton()
+        else:
+            self.automaton = _Automaton(self.names)
+
+    @classmethod
+    def from_graph(cls, graph, **kwargs) -> "EntityLinker":
+        """
+        Builds a linker over the rdfs:labels of WM.River subjects, their
+        labels without a trailing "(State)" qualifier, and their
+        ';'-separated WM.otherNames.
+        """
+        def names():
+            rivers = list(graph.subjects(RDF.type, WM.River))
+            for river in rivers:
+                for label in graph.objects(river, RDFS.label):
+                    yield str(label), river
+            for river in rivers:
+                for label in graph.objects(river, RDFS.label):
+                    if '(' in str(label):
+                        yield str(label).split('(')[0], river
+                for other_names in graph.objects(river, WM.otherNames):
+                    for name in str(other_names).split(';'):
+                        yield name, river
+        return cls(names(), **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def find(self, text: str) -> List[Mention]:
+        """
+        All whole-word mentions in the text, in one pass over it. Overlapping
+        mentions are resolved leftmost-longest.
+        """
+        if not self.names:
+            return []
+        text = text.lower()
+        candidates = []
+        for end, index in self.automaton.iter(text):
+            start = end + 1 - len(self.names[index])
+            if (start == 0 or not text[start - 1].isalnum()) and (end + 1 == len(text) or not text[end + 1].isalnum()):
+                candidates.append((start, -(end + 1), index))
+        candidates.sort()
+
+        mentions = []
+        covered = 0
+        for start, neg_end, index in candidates:
+            if start >= covered:
+                mentions.append(Mention(start, -neg_end, self.names[index], self.uris[index]))
+                covered = -neg_end
+        return mentions
+
+    def link(self, text: str) -> List:
+        """
+        Distinct entities mentioned in the text, in order of first mention.
+        An ambiguous name links to its first URI.
+        """
+        linked = []
+        for mention in self.find(text):
+            if mention.uris[0] not in linked:
+                linked.append(mention.uris[0])
+        return linked
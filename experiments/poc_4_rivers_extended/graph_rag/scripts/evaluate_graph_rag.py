@@ -10,6 +10,7 @@ import os
 import sys
 import time
 import argparse
+import itertools
 from typing import Dict, List, Any, Optional
 
 # Add project root
@@ -37,7 +38,8 @@ except ImportError:
 class GraphRAGEvaluator:
     """Evaluate Graph-RAG system with verification."""
     
-    def __init__(self, model_name: str, graph_path: str):
+    def __init__(self, model_name: str, graph_path: str, context_cache: Optional[str] = None,
+                 max_context_chars: Optional[int] = None):
         """Initialize evaluator."""
         self.model_name = model_name
         
@@ -49,7 +51,9 @@ class GraphRAGEvaluator:
             self.llm_client = None
         
         # Load graph
-        self.retrieval = GraphRetrievalSystem(graph_path)
+        self.retrieval = GraphRetrievalSystem(
+            graph_path, cache_path=context_cache, max_context_chars=max_context_chars
+        )
         
         # Initialize verification components if available
         self.verify_claims = ConsistencyAuditor is not None
@@ -105,8 +109,8 @@ What is the correct answer?"""
             print(f"Error calling LLM: {e}")
             return "ERROR"
     
-    def evaluate_question(self, row: Dict, completed: set) -> Optional[Dict]:
-        """Evaluate a single question with Graph-RAG."""
+    def evaluate_question(self, row: Dict, completed: set, graph_context: Optional[str] = None) -> Optional[Dict]:
+        """Evaluate a single question with Graph-RAG (graph_context if already retrieved)."""
         question_id = row['question_id']
         
         if question_id in completed:
@@ -118,7 +122,8 @@ What is the correct answer?"""
         river_name = row['river_name']
         
         # Retrieve graph context
-        graph_context = self.retrieval.retrieve_for_question(question, river_name)
+        if graph_context is None:
+            graph_context = self.retrieval.retrieve_for_question(question, river_name)
         
         # Get LLM response
         llm_response = self.get_llm_response(question, graph_context, answers)
@@ -142,6 +147,21 @@ What is the correct answer?"""
         
         return result
     
+    def _with_contexts(self, rows, batch_size: int):
+        """Yields (row, graph_context), retrieving contexts batch_size rows at a time."""
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                yield from self._retrieve_batch(batch)
+                batch = []
+        if batch:
+            yield from self._retrieve_batch(batch)
+    
+    def _retrieve_batch(self, rows: List[Dict]):
+        contexts = self.retrieval.retrieve_batch([r['question'] for r in rows], [r['river_name'] for r in rows])
+        return zip(rows, contexts)
+    
     def _extract_answer_letter(self, response: str) -> Optional[str]:
         """Extract answer letter from LLM response."""
         # Look for patterns like "A)", "B)", "Answer: A", etc.
@@ -170,7 +190,7 @@ What is the correct answer?"""
         mapping = {'A': 0, 'B': 1, 'C': 2, 'D': 3, 'E': 4}
         return mapping.get(letter.upper())
     
-    def run_evaluation(self, dataset_path: str, max_questions: Optional[int] = None):
+    def run_evaluation(self, dataset_path: str, max_questions: Optional[int] = None, batch_size: int = 64):
         """Run evaluation on dataset."""
         print(f"Starting Graph-RAG evaluation with {self.model_name}")
         
@@ -194,11 +214,14 @@ What is the correct answer?"""
             processed = 0
             correct = 0
             
-            for row in reader:
+            pending = (row for row in reader if row['question_id'] not in completed)
+            if max_questions:
+                pending = itertools.islice(pending, max_questions)
+            for row, graph_context in self._with_contexts(pending, batch_size):
                 if max_questions and processed >= max_questions:
                     break
                 
-                result = self.evaluate_question(row, completed)
+                result = self.evaluate_question(row, completed, graph_context)
                 
                 if result is None:
                     continue
@@ -250,11 +273,26 @@ def main():
     parser.add_argument("--dataset", type=str,
                        default=os.path.join(EXPERIMENT_DIR, "..", "data", 
                                             "river_qa_dataset_shuffled.csv"))
+    parser.add_argument("--context-cache", type=str,
+                       default=os.path.join(EXPERIMENT_DIR, "data", "context_cache.sqlite"),
+                       help="SQLite file caching formatted graph contexts per river")
+    parser.add_argument("--warm-cache", action="store_true",
+                       help="Precompute the context of every river before evaluating")
+    parser.add_argument("--workers", type=int, default=None,
+                       help="Processes for --warm-cache (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=64,
+                       help="Questions whose graph contexts are retrieved together")
+    parser.add_argument("--max-context-chars", type=int, default=None,
+                       help="Character budget per graph context (default: unbounded)")
     
     args = parser.parse_args()
     
-    evaluator = GraphRAGEvaluator(args.model, args.graph)
-    evaluator.run_evaluation(args.dataset, args.max_questions)
+    evaluator = GraphRAGEvaluator(args.model, args.graph, args.context_cache, args.max_context_chars)
+    if args.warm_cache:
+        start = time.time()
+        added = evaluator.retrieval.warm_cache(processes=args.workers)
+        print(f"Warmed context cache with {added} rivers in {time.time() - start:.1f}s")
+    evaluator.run_evaluation(args.dataset, args.max_questions, args.batch_size)
 
 
 if __name__ == "__main__":
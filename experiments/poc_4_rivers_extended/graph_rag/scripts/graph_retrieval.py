@@ -5,8 +5,13 @@ Retrieves relevant subgraphs instead of text chunks.
 """
 
 import os
+import sqlite3
 import sys
-from typing import List, Dict, Any, Optional
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+import numpy as np
 from rdflib import Graph, URIRef
 from rdflib.namespace import RDF, RDFS
 
@@ -18,34 +23,303 @@ PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(EXPERIMENT_DIR)))
 sys.path.insert(0, PROJECT_ROOT)
 
 from rdflib import Namespace
+from worldmind.graph_store import GraphStore
+from worldmind.triple_store import term_key
+from entity_linker import EntityLinker
+from river_profiles import RiverProfileTable
 WM = Namespace("http://worldmind.ai/rivers-v4#")
 
+# Predicates (by local name) linking a river to related rivers, and the facts
+# reported for those related rivers.
+RELATED_PREDICATES = ['hasTributary', 'flowsInto', 'hasSource', 'hasMouth']
+RELATED_FACTS = ['length', 'discharge', 'sourceElevation', 'mouthElevation', 'traverses', 'hasMouth', 'hasSource', 'riverName']
+
+
+# Bump whenever format_context output changes, so cached contexts are not reused.
+CONTEXT_FORMAT_VERSION = 1
+
+# Sections of the structured facts, matched against the lowercased predicate IRI
+FACT_TYPES = {
+    'Physical Attributes': ['length', 'discharge', 'elevation'],
+    'Geography': ['traverses', 'inCountry', 'inCounty'],
+    'Relationships': ['hasTributary', 'flowsInto', 'hasSource', 'hasMouth', 'partOfSystem']
+}
+TRUNCATION_MARKER = "[... context truncated]"
+
+
+def _local_name(iri: str) -> str:
+    return iri.split('#')[-1] if '#' in iri else iri.split('/')[-1]
+
+
+def _csr_rows(offsets: np.ndarray, nodes: np.ndarray, limit: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Concatenates the CSR ranges offsets[n]:offsets[n + 1] of the given nodes
+    (at most `limit` per node). Returns the positions and, for each, the index
+    of its node in `nodes`.
+    """
+    starts = offsets[nodes]
+    lengths = offsets[nodes + 1] - starts
+    if limit is not None:
+        lengths = np.minimum(lengths, limit)
+    group = np.repeat(np.arange(len(nodes)), lengths)
+    ends = np.cumsum(lengths)
+    positions = np.arange(ends[-1] if len(ends) else 0) - np.repeat(ends - lengths, lengths) + starts[group]
+    return positions, group
+
+
+class _PrefixIndex:
+    """Sorted keys with a sparse table giving the lowest rank among keys that share a prefix."""
+
+    def __init__(self, keys: List[str], ranks: List[int]):
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self.keys = [keys[i] for i in order]
+        # table[k][i] is the lowest rank among keys[i:i + 2**k]
+        self.table = [np.asarray(ranks, dtype=np.int64)[order]] if keys else []
+        width = 1
+        while self.table and 2 * width <= len(self.keys):
+            prev = self.table[-1]
+            self.table.append(np.minimum(prev[:-width], prev[width:]))
+            width *= 2
+
+    def lowest(self, prefix: str) -> Optional[int]:
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + "\U0010ffff", lo)
+        if lo >= hi:
+            return None
+        k = (hi - lo).bit_length() - 1
+        level = self.table[k]
+        return int(min(level[lo], level[hi - (1 << k)]))
+
+
+class RiverLabelIndex:
+    """
+    Precomputed lookups over the rdfs:labels of WM.River subjects.
+
+    Every (river, label) pair is ranked in the order a scan over
+    graph.subjects(RDF.type, WM.River) and their labels visits it, and each
+    lookup returns the lowest-ranked match, so results are the same as the
+    first match of a linear scan.
+    """
+
+    def __init__(self, pairs: Iterable[Tuple[URIRef, str]]):
+        self.uris = []
+        self.labels = []
+        self.exact = {}
+        for uri, label in pairs:
+            self.exact.setdefault(label, len(self.labels))
+            self.uris.append(uri)
+            self.labels.append(label)
+
+        lowered = [label.lower() for label in self.labels]
+        self.prefixes = _PrefixIndex(lowered, list(range(len(lowered))))
+        parenthetical = [rank for rank, label in enumerate(self.labels) if '(' in label]
+        self.parenthetical_prefixes = _PrefixIndex([lowered[r] for r in parenthetical], parenthetical)
+
+        # Substring search runs str.find over all lowered labels in rank order.
+        self._haystack = "\n".join(lowered)
+        self._offsets = np.cumsum([0] + [len(label) + 1 for label in lowered[:-1]]).tolist()
+        self._lowered = lowered
+
+    @classmethod
+    def from_graph(cls, graph: Graph) -> "RiverLabelIndex":
+        return cls(
+            (river, str(label))
+            for river in graph.subjects(RDF.type, WM.River)
+            for label in graph.objects(river, RDFS.label)
+        )
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def find_substring(self, needle: str) -> Optional[int]:
+        """Rank of the first label whose lowercase form contains `needle`."""
+        if "\n" in needle:
+            return next((r for r, label in enumerate(self._lowered) if needle in label), None)
+        pos = self._haystack.find(needle)
+        return None if pos < 0 else bisect_right(self._offsets, pos) - 1
+
+    def resolve(self, river_name: str) -> Tuple[Optional[URIRef], Optional[str]]:
+        """
+        Resolves a river name to (uri, label), trying in turn: an exact label
+        match; for names like "Abrams Creek (Tennessee)", a label with a
+        state designation starting with the part before the parenthesis;
+        then any label starting with that part (case-insensitive).
+        """
+        rank = self.exact.get(river_name)
+        first_part = river_name.lower().strip()
+        if '(' in river_name:
+            first_part = first_part.split('(')[0].strip()
+            if rank is None:
+                rank = self.parenthetical_prefixes.lowest(first_part)
+        if rank is None:
+            rank = self.prefixes.lowest(first_part)
+        if rank is None:
+            return None, None
+        return self.uris[rank], self.labels[rank]
+
+
+class ContextCache:
+    """
+    LRU cache of formatted contexts, optionally backed by a SQLite file so
+    contexts survive across runs. Keys embed the graph hash, so contexts
+    from an older graph are never returned.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_size: int = 16384):
+        self.path = path
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.db = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.db = sqlite3.connect(path)
+            self.db.execute("CREATE TABLE IF NOT EXISTS contexts (key TEXT PRIMARY KEY, context TEXT NOT NULL)")
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _remember(self, key: str, context: str):
+        self.entries[key] = context
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        context = self.entries.get(key)
+        if context is not None:
+            self.entries.move_to_end(key)
+        elif self.db is not None:
+            row = self.db.execute("SELECT context FROM contexts WHERE key = ?", (key,)).fetchone()
+            if row:
+                context = row[0]
+                self._remember(key, context)
+        if context is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return context
+
+    def put_many(self, items: Iterable[Tuple[str, str]]):
+        items = list(items)
+        for key, context in items:
+            self._remember(key, context)
+        if self.db is not None and items:
+            with self.db:
+                self.db.executemany("INSERT OR REPLACE INTO contexts (key, context) VALUES (?, ?)", items)
+
+    def put(self, key: str, context: str):
+        self.put_many([(key, context)])
+
+
+# Retrieval system of a warm_cache worker process
+_worker_retrieval = None
+
+
+def _init_warm_worker(graph_path: str, backend: str, max_frontier: Optional[int], max_context_chars: Optional[int]):
+    global _worker_retrieval
+    _worker_retrieval = GraphRetrievalSystem(
+        graph_path, backend=backend, max_frontier=max_frontier, max_context_chars=max_context_chars
+    )
+
+
+def _warm_chunk(river_uris: List[URIRef], max_hops: int) -> List[Tuple[URIRef, Optional[str]]]:
+    return list(zip(river_uris, _worker_retrieval.contexts_for_rivers(river_uris, max_hops)))
+
+
 class GraphRetrievalSystem:
     """Retrieve subgraphs from knowledge graph based on query."""
     
-    def __init__(self, graph_path: str):
-        """Initialize with graph path."""
-        self.graph = Graph()
-        self.graph.parse(graph_path, format='turtle')
-        print(f"Loaded graph with {len(self.graph)} triples")
+    def __init__(self, graph_path: str, backend: str = 'snapshot', max_frontier: Optional[int] = None,
+                 cache_path: Optional[str] = None, cache_size: int = 16384,
+                 max_context_chars: Optional[int] = None):
+        """
+        Initialize with graph path.
+
+        Args:
+            graph_path: Turtle file with the knowledge graph.
+            backend: GraphStore backend, 'snapshot' (default) or 'compact'.
+            max_frontier: Caps the nodes entering each hop of the subgraph
+                expansion and the inbound triples kept per node, so one hub
+                (e.g. dbr:United_States) cannot blow up the context. None
+                expands everything.
+            cache_path: Optional SQLite file persisting formatted contexts.
+            cache_size: Contexts kept in the in-memory LRU cache.
+            max_context_chars: Character budget of formatted contexts
+                (see format_context). None leaves them unbounded.
+        """
+        if backend not in ('compact', 'snapshot'):
+            raise ValueError(f"Unsupported backend '{backend}', expected 'compact' or 'snapshot'")
+        self.graph_path = graph_path
+        self.backend = backend
+        store = GraphStore(graph_path, backend=backend)
+        self.graph = store.get_graph()
+        self.graph_hash = store.source_hash
+        self.max_frontier = max_frontier
+        self.max_context_chars = max_context_chars
+        self.cache = ContextCache(cache_path, cache_size)
+        self._predicate_info = {}
+        self._entity_linker = None
+        self._profiles = None
+        self.label_index = RiverLabelIndex.from_graph(self.graph)
+
+        # CSR adjacency and per-term flags over integer term IDs
+        terms = self.graph.terms
+        self.out_offsets, self.in_offsets = self.graph.adjacency()
+        self.is_iri = terms.iri_mask()
+        self.is_river = np.zeros(len(terms), dtype=bool)
+        rdf_type, river = terms.lookup(term_key(RDF.type)), terms.lookup(term_key(WM.River))
+        if rdf_type >= 0 and river >= 0:
+            self.is_river[self.graph.s[self.graph.match_ids(p=rdf_type, o=river)]] = True
+        predicate_names = {int(p): _local_name(terms.value(int(p))) for p in self.graph.predicate_ids}
+        self.related_predicates = np.array(
+            [p for p, name in predicate_names.items() if name in RELATED_PREDICATES], dtype=np.int32
+        )
+        self.related_fact_predicates = np.array(
+            [p for p, name in predicate_names.items() if name in RELATED_FACTS], dtype=np.int32
+        )
+    
+    @property
+    def entity_linker(self) -> EntityLinker:
+        """Aho-Corasick linker over river names, built on first use."""
+        if self._entity_linker is None:
+            self._entity_linker = EntityLinker.from_graph(self.graph)
+        return self._entity_linker
+    
+    @property
+    def profiles(self) -> RiverProfileTable:
+        """
+        Per-river profile table: river_profiles.npz next to the graph when it
+        was built from this graph file, otherwise derived from the graph.
+        """
+        if self._profiles is None:
+            path = os.path.join(os.path.dirname(os.path.abspath(self.graph_path)), "river_profiles.npz")
+            if os.path.exists(path):
+                profiles = RiverProfileTable.load(path)
+                if profiles.graph_sha256 == self.graph_hash:
+                    self._profiles = profiles
+            if self._profiles is None:
+                self._profiles = RiverProfileTable.from_graph(self.graph, self.graph_hash)
+        return self._profiles
+    
+    def get_river_profile(self, river_name: str) -> Optional[Dict]:
+        """Denormalized facts of a river, resolved like get_subgraph_for_question."""
+        river_uri, _ = self.label_index.resolve(river_name)
+        return self.profiles.profile(river_uri) if river_uri is not None else None
     
     def get_river_by_name(self, river_name: str) -> Optional[List[Dict]]:
         """Get all triples for a specific river by name."""
-        results = []
+        rank = self.label_index.find_substring(river_name.lower())
+        if rank is None:
+            return None
         
-        for river in self.graph.subjects(RDF.type, WM.River):
-            for label in self.graph.objects(river, RDFS.label):
-                if river_name.lower() in str(label).lower():
-                    # Get all triples for this river
-                    for s, p, o in self.graph.triples((river, None, None)):
-                        results.append({
-                            'subject': str(s),
-                            'predicate': str(p),
-                            'object': str(o)
-                        })
-                    return results
-        
-        return None
+        # Get all triples for this river
+        river = self.label_index.uris[rank]
+        return [
+            {'subject': str(s), 'predicate': str(p), 'object': str(o)}
+            for s, p, o in self.graph.triples((river, None, None))
+        ]
     
     def get_subgraph_for_question(self, question: str, river_name: Optional[str] = None, 
                                    max_hops: int = 3) -> tuple[List[Dict], Optional]:
@@ -55,215 +329,341 @@ class GraphRetrievalSystem:
         
         # If we have a river name, start there
         if river_name:
-            river_uri = None
-            river_label = None
-            
-            # Try fuzzy matching - check for partial matches
-            river_name_clean = river_name.lower().strip()
-            
-            # First pass: exact match  
-            # Only check subjects that ARE rivers (have type WM.River)
-            for subject in self.graph.subjects(RDF.type, WM.River):
-                if river_uri:
-                    break
-                for label in self.graph.objects(subject, RDFS.label):
-                    label_str = str(label)
-                    # Exact match first
-                    if label_str == river_name:
-                        river_uri = subject
-                        river_label = label_str
-                        break
-                if river_uri:
-                    break
-            
-            # Second pass: substring match only if no exact match
-            if not river_uri:
-                for subject in self.graph.subjects(RDF.type, WM.River):
-                    if river_uri:
-                        break
-                    for label in self.graph.objects(subject, RDFS.label):
-                        label_str = str(label)
-                        label_lower = label_str.lower()
-                        # For names like "Abrams Creek (Tennessee)", match the first part
-                        if '(' in river_name:
-                            first_part = river_name_clean.split('(')[0].strip()
-                            if label_lower.startswith(first_part) and '(' in label_str:
-                                # Prefer matches that also have state designation
-                                river_uri = subject
-                                river_label = label_str
-                                break
-            
-            # Third pass: simple substring without state requirement
-            if not river_uri:
-                for subject in self.graph.subjects(RDF.type, WM.River):
-                    if river_uri:
-                        break
-                    for label in self.graph.objects(subject, RDFS.label):
-                        label_lower = str(label).lower()
-                        first_part = river_name_clean.split('(')[0].strip() if '(' in river_name else river_name_clean
-                        if label_lower.startswith(first_part):
-                            river_uri = subject
-                            river_label = str(label)
-                            break
+            # Exact label, then "Name (State)" prefix, then plain prefix match
+            river_uri, river_label = self.label_index.resolve(river_name)
             
             if river_uri:
                 main_river_uri = river_uri  # Track the main river
-                # Get ALL triples for this river (0 hops = river itself)
-                visited = set()
-                to_expand = [(river_uri, 0)]
-                
-                # Also add related rivers (neighbors)
-                related_rivers = set()
-                
-                while to_expand:
-                    current, hops = to_expand.pop(0)
-                    
-                    if current in visited or hops > max_hops:
-                        continue
-                    
-                    visited.add(current)
-                    
-                    # Get all triples with this as subject
-                    for s, p, o in self.graph.triples((current, None, None)):
-                        results.append({
-                            'subject': str(s),
-                            'predicate': str(p),
-                            'object': str(o),
-                            'hops': hops
-                        })
-                        
-                        # Collect related rivers
-                        pred_name = str(p).split('#')[-1] if '#' in str(p) else str(p).split('/')[-1]
-                        if pred_name in ['hasTributary', 'flowsInto', 'hasSource', 'hasMouth']:
-                            if isinstance(o, URIRef):
-                                # Check if it's another river
-                                if (o, RDF.type, WM.River) in self.graph:
-                                    related_rivers.add(o)
-                        
-                        # If object is a URI and we haven't visited it, expand
-                        if isinstance(o, URIRef) and str(o) not in visited:
-                            to_expand.append((o, hops + 1))
-                    
-                    # Get all triples with this as object
-                    for s, p, o in self.graph.triples((None, None, current)):
-                        results.append({
-                            'subject': str(s),
-                            'predicate': str(p),
-                            'object': str(o),
-                            'hops': hops
-                        })
-            
-            # Add information about related rivers
-            for related in related_rivers:
-                # Get key facts about related rivers
-                for s, p, o in self.graph.triples((related, None, None)):
-                    p_name = str(p).split('#')[-1] if '#' in str(p) else str(p).split('/')[-1]
-                    if p_name in ['length', 'discharge', 'sourceElevation', 'mouthElevation', 'traverses', 'hasMouth', 'hasSource', 'riverName']:
-                        results.append({
-                            'subject': str(s),
-                            'predicate': str(p),
-                            'object': str(o),
-                            'hops': 10  # Mark as related river
-                        })
+                results = self._subgraph_for_river(river_uri, max_hops)
         
         return results, main_river_uri
     
-    def format_context(self, triples: List[Dict], main_river_uri=None) -> str:
-        """Format triples into readable context for LLM with abstracts."""
+    def _subgraph_for_river(self, river_uri, max_hops: int) -> List[Dict]:
+        """Triples within max_hops of a river plus key facts about related rivers."""
+        return self._subgraphs_for_rivers([river_uri], max_hops)[0]
+    
+    def _subgraphs_for_rivers(self, river_uris: List, max_hops: int) -> List[List[Dict]]:
+        """Batch form of _subgraph_for_river, expanding all rivers together."""
+        starts = [self.graph.terms.lookup(term_key(uri)) for uri in river_uris]
+        known = [i for i, start in enumerate(starts) if start >= 0]
+        subgraphs = [[] for _ in river_uris]
+        values = {}  # term values shared across the batch
+        expansions = self._expand_many(np.array([starts[i] for i in known], dtype=np.int64), max_hops)
+        for i, (rows, hops, related_rivers) in zip(known, expansions):
+            results = self._materialize(rows, hops, values)
+            
+            # Add information about related rivers (hops = 10 marks them)
+            fact_rows, _ = _csr_rows(self.out_offsets, related_rivers)
+            fact_rows = fact_rows[np.isin(self.graph.p[fact_rows], self.related_fact_predicates)]
+            results.extend(self._materialize(fact_rows, np.full(len(fact_rows), 10), values))
+            subgraphs[i] = results
+        return subgraphs
+    
+    def _expand_many(self, starts: np.ndarray, max_hops: int) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Frontier-based k-hop expansion from several term IDs at once.
+        
+        The frontier holds (source, node) pairs, so every source expands in
+        the same vectorized steps while keeping its own visited set. For each
+        source, each node reached within max_hops outbound hops over IRI
+        objects contributes its outbound triples followed by its inbound
+        ones, in breadth-first order.
+        
+        Returns:
+            Per start: the SPO row numbers, their hop counts, and the related
+            rivers (see RELATED_PREDICATES) reached from the expanded nodes,
+            in discovery order.
+        """
+        if not len(starts):
+            return []
+        store = self.graph
+        cap = self.max_frontier
+        n_terms = len(self.is_iri)
+        sources = np.arange(len(starts), dtype=np.int64)
+        nodes = np.asarray(starts, dtype=np.int64)
+        # (source, node) pairs are encoded as source * n_terms + node
+        seen = sources * n_terms + nodes
+        levels, related = [], []
+        
+        for hop in range(max_hops + 1):
+            if not len(nodes):
+                break
+            out_rows, out_group = _csr_rows(self.out_offsets, nodes)
+            in_positions, in_group = _csr_rows(self.in_offsets, nodes, cap)
+            # Per pair: outbound triples, then inbound triples
+            group = np.concatenate([out_group * 2, in_group * 2 + 1])
+            order = np.argsort(group, kind='stable')
+            level = np.concatenate([out_rows, store.osp[in_positions]])[order]
+            levels.append((sources[group[order] // 2], level, np.full(len(level), hop)))
+            
+            objects = store.o[out_rows]
+            object_sources = sources[out_group]
+            is_related = np.isin(store.p[out_rows], self.related_predicates) & self.is_river[objects]
+            related.append(object_sources[is_related] * n_terms + objects[is_related])
+            # Next frontier: unseen IRI objects per source, in discovery order
+            is_iri = self.is_iri[objects]
+            keys = object_sources[is_iri] * n_terms + objects[is_iri]
+            keys = keys[~np.isin(keys, seen)]
+            _, first = np.unique(keys, return_index=True)
+            keys = keys[np.sort(first)]
+            seen = np.union1d(seen, keys)
+            sources, nodes = keys // n_terms, keys % n_terms
+            if cap is not None:
+                # Pairs stay grouped by source; keep the first `cap` of each
+                rank = np.arange(len(sources)) - np.searchsorted(sources, sources)
+                sources, nodes = sources[rank < cap], nodes[rank < cap]
+        
+        level_sources, rows, hops = (np.concatenate(column) for column in zip(*levels))
+        order = np.argsort(level_sources, kind='stable')
+        level_sources, rows, hops = level_sources[order], rows[order], hops[order]
+        row_bounds = np.searchsorted(level_sources, np.arange(len(starts) + 1))
+        
+        related = np.concatenate(related)
+        _, first = np.unique(related, return_index=True)
+        related = related[np.sort(first)]
+        related = related[np.argsort(related // n_terms, kind='stable')]
+        related_bounds = np.searchsorted(related // n_terms, np.arange(len(starts) + 1))
+        related = related % n_terms
+        
+        return [
+            (
+                rows[row_bounds[i]:row_bounds[i + 1]],
+                hops[row_bounds[i]:row_bounds[i + 1]],
+                related[related_bounds[i]:related_bounds[i + 1]],
+            )
+            for i in range(len(starts))
+        ]
+    
+    def _materialize(self, rows: np.ndarray, hops: np.ndarray, values: Optional[Dict[int, str]] = None) -> List[Dict]:
+        """Turns SPO row numbers into triple dicts; `values` memoizes term values."""
+        values = {} if values is None else values
+        s, p, o = self.graph.s[rows].tolist(), self.graph.p[rows].tolist(), self.graph.o[rows].tolist()
+        value = self.graph.terms.value
+        for term_id in set(s).union(p, o).difference(values):
+            values[term_id] = value(term_id)
+        return [
+            {'subject': values[si], 'predicate': values[pi], 'object': values[oi], 'hops': h}
+            for si, pi, oi, h in zip(s, p, o, hops.tolist())
+        ]
+    
+    def _classify_predicate(self, predicate: str) -> Tuple[str, Tuple[int, ...], bool]:
+        """(relation name, indices of matching FACT_TYPES sections, numeric?) of a predicate, cached."""
+        info = self._predicate_info.get(predicate)
+        if info is None:
+            lowered = predicate.lower()
+            rel_name = _local_name(predicate)
+            sections = tuple(i for i, preds in enumerate(FACT_TYPES.values()) if any(p in lowered for p in preds))
+            numeric = any(x in rel_name for x in ['length', 'discharge', 'elevation'])
+            info = self._predicate_info[predicate] = (rel_name, sections, numeric)
+        return info
+    
+    @staticmethod
+    def _format_fact(rel_name: str, obj: str, numeric: bool) -> str:
+        obj_name = obj.split('/')[-1] if '/' in obj else obj
+        
+        # Format numeric values nicely
+        if numeric and obj.replace('.', '').isdigit():
+            try:
+                num = float(obj)
+            except ValueError:
+                num = None
+            if num is None:
+                pass
+            elif num > 1000:
+                obj_name = f"{num/1000:.1f} km" if 'length' in rel_name else f"{num:.0f}"
+            else:
+                obj_name = f"{num}"
+        
+        return f"  - {rel_name}: {obj_name}"
+    
+    def format_context(self, triples: List[Dict], main_river_uri=None, max_chars: Optional[int] = None) -> str:
+        """
+        Format triples into readable context for LLM with abstracts.
+        
+        Facts are streamed into per-subject sections in one pass. With a
+        character budget (max_chars, default self.max_context_chars), whole
+        lines are kept in priority order: the main river's summary and facts,
+        then other subjects by how close to the main river they were reached,
+        related rivers last. A truncation marker ends a cut context.
+        """
         if not triples:
             return "No relevant graph context found."
+        max_chars = self.max_context_chars if max_chars is None else max_chars
         
-        context_parts = []
-        
-        # Group by subject and find abstract text
-        by_subject = {}
+        # One pass: closest hop per subject, fact lines per subject and section, abstracts
+        hops = {}
+        facts = {}
         abstracts = {}
-        
         for triple in triples:
             subj = triple['subject']
-            if subj not in by_subject:
-                by_subject[subj] = []
-            by_subject[subj].append(triple)
+            pred = triple['predicate']
+            hop = triple.get('hops', 0)
+            if hop < hops.get(subj, hop + 1):
+                hops[subj] = hop
+            
+            rel_name, matched, numeric = self._classify_predicate(pred)
+            if matched:
+                sections = facts.get(subj)
+                if sections is None:
+                    sections = facts[subj] = [[] for _ in FACT_TYPES]
+                line = self._format_fact(rel_name, triple['object'], numeric)
+                for i in matched:
+                    sections[i].append(line)
             
             # Collect abstract text
-            pred = triple['predicate']
-            if 'abstractText' in str(pred):
-                if subj not in abstracts:
-                    abstracts[subj] = []
-                abstracts[subj].append(str(triple['object']))
+            if 'abstractText' in pred:
+                abstracts.setdefault(subj, []).append(str(triple['object']))
         
         # Use the provided main_river_uri or try to find it
         main_river = str(main_river_uri) if main_river_uri else None
         if not main_river:
-            for subject, facts in by_subject.items():
-                if 'river' in subject.lower() or '/River' in subject:
-                    main_river = subject
-                    break
+            main_river = next((s for s in hops if 'river' in s.lower() or '/River' in s), None)
         
+        # Units of output lines in render order, each with its priority; a
+        # header always travels with the first line below it.
+        units = []
         if main_river and main_river in abstracts:
-            context_parts.append("=== RIVER SUMMARY ===")
+            units.append((0, "=== RIVER SUMMARY ==="))
             for abstract in abstracts[main_river]:
                 # Truncate long abstracts
-                ab = abstract[:500] + "..." if len(abstract) > 500 else abstract
-                context_parts.append(ab)
-            context_parts.append("")
+                units.append((0, abstract[:500] + "..." if len(abstract) > 500 else abstract))
+            units.append((0, ""))
+        units.append((0, "=== STRUCTURED FACTS ==="))
         
-        context_parts.append("=== STRUCTURED FACTS ===")
-        
-        # Group facts by type
-        fact_types = {
-            'Physical Attributes': ['length', 'discharge', 'elevation'],
-            'Geography': ['traverses', 'inCountry', 'inCounty'],
-            'Relationships': ['hasTributary', 'flowsInto', 'hasSource', 'hasMouth', 'partOfSystem']
-        }
-        
-        for subject, facts in sorted(by_subject.items()):
+        no_facts = [[] for _ in FACT_TYPES]
+        for subject in sorted(hops):
             if main_river and subject == main_river:
-                context_parts.append(f"\n## Main River: {subject.split('/')[-1]}")
+                priority = 0
+                units.append((0, f"\n## Main River: {subject.split('/')[-1]}"))
             elif 'River' in subject:
                 continue  # Skip related rivers for now
+            else:
+                priority = 1 + hops[subject]
             
-            # Group by type
-            for type_name, preds in fact_types.items():
-                type_facts = [f for f in facts if any(p in str(f['predicate']).lower() for p in preds)]
-                if type_facts:
-                    context_parts.append(f"\n### {type_name}:")
-                    for fact in type_facts:
-                        pred = fact['predicate']
-                        obj = fact['object']
-                        
-                        rel_name = pred.split('#')[-1] if '#' in pred else pred.split('/')[-1]
-                        obj_name = obj.split('/')[-1] if '/' in obj else obj
-                        
-                        # Format numeric values nicely
-                        if any(x in rel_name for x in ['length', 'discharge', 'elevation']):
-                            if isinstance(obj, (int, float)) or (isinstance(obj, str) and obj.replace('.','').isdigit()):
-                                # Try to format as number
-                                try:
-                                    num = float(obj)
-                                    if num > 1000:
-                                        obj_name = f"{num/1000:.1f} km" if 'length' in rel_name else f"{num:.0f}"
-                                    else:
-                                        obj_name = f"{num}"
-                                except:
-                                    pass
-                        
-                        context_parts.append(f"  - {rel_name}: {obj_name}")
+            for type_name, lines in zip(FACT_TYPES, facts.get(subject, no_facts)):
+                if lines:
+                    units.append((priority, f"\n### {type_name}:\n{lines[0]}"))
+                    units.extend((priority, line) for line in lines[1:])
+        
+        if max_chars is None or sum(len(text) + 1 for _, text in units) - 1 <= max_chars:
+            return "\n".join(text for _, text in units)
         
-        return "\n".join(context_parts)
+        # Over budget: take units by priority (stable) until the first that does not fit
+        budget = max_chars - len(TRUNCATION_MARKER) - 1
+        keep = []
+        for i in sorted(range(len(units)), key=lambda i: units[i][0]):
+            cost = len(units[i][1]) + 1
+            if cost > budget:
+                break
+            budget -= cost
+            keep.append(i)
+        return "\n".join([units[i][1] for i in sorted(keep)] + [TRUNCATION_MARKER])
+    
+    def _cache_key(self, river_uri, max_hops: int) -> str:
+        return (f"{self.graph_hash}|v{CONTEXT_FORMAT_VERSION}|{max_hops}|{self.max_frontier}|"
+                f"{self.max_context_chars}|{river_uri}")
+    
+    def context_for_river(self, river_uri, max_hops: int = 3) -> Optional[str]:
+        """
+        Formatted context of a resolved river, or None if its subgraph is too
+        small (< 5 triples) and retrieval falls back to rivers mentioned in the question.
+        """
+        return self.contexts_for_rivers([river_uri], max_hops)[0]
+    
+    def contexts_for_rivers(self, river_uris: List, max_hops: int = 3, batch_size: int = 64) -> List[Optional[str]]:
+        """Batch form of context_for_river, expanding batch_size rivers at a time."""
+        contexts = []
+        for i in range(0, len(river_uris), batch_size):
+            batch = river_uris[i:i + batch_size]
+            for uri, triples in zip(batch, self._subgraphs_for_rivers(batch, max_hops)):
+                contexts.append(self.format_context(triples, uri) if len(triples) >= 5 else None)
+        return contexts
     
     def retrieve_for_question(self, question: str, river_name: Optional[str] = None) -> str:
         """Retrieve graph context for a question with expanded context."""
+        # The context of a resolved river depends only on the river, so it is cached
+        river_uri = self.label_index.resolve(river_name)[0] if river_name else None
+        if river_uri is not None:
+            key = self._cache_key(river_uri, 3)
+            context = self.cache.get(key)
+            if context is None:
+                context = self.context_for_river(river_uri, max_hops=3)
+                if context is not None:
+                    self.cache.put(key, context)
+            if context is not None:
+                return context
+        
         triples, main_river_uri = self.get_subgraph_for_question(question, river_name, max_hops=3)
         
-        # If no triples found, try keyword-based search in the question
+        # If no triples found, use the rivers mentioned in the question
         if not triples or len(triples) < 5:
-            # Try to find any river mentioned in question
-            import re
-            keywords = re.findall(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(River|Creek|Stream)\b', question)
-            for keyword, _ in keywords[:2]:  # Try first 2 matches
-                alt_triples, _ = self.get_subgraph_for_question(question, keyword, max_hops=3)
-                if alt_triples:
-                    triples.extend(alt_triples)
+            mentioned = [uri for uri in self.entity_linker.link(question) if uri != main_river_uri]
+            for alt_triples in self._subgraphs_for_rivers(mentioned[:2], max_hops=3):  # First 2 mentions
+                triples.extend(alt_triples)
         
         return self.format_context(triples, main_river_uri)
+    
+    def retrieve_batch(self, questions: List[str], river_names: List[Optional[str]]) -> List[str]:
+        """
+        Retrieves graph contexts for many questions at once, in input order.
+        
+        Each distinct river name is resolved once, rivers shared by several
+        questions are expanded once, and uncached rivers are expanded
+        together as a multi-source frontier. Questions whose river does not
+        resolve to a large enough subgraph go through retrieve_for_question.
+        """
+        if len(questions) != len(river_names):
+            raise ValueError("questions and river_names must have the same length")
+        resolved = {name: self.label_index.resolve(name)[0] for name in set(river_names) if name}
+        river_uris = [resolved.get(name) for name in river_names]
+        
+        contexts = {}
+        missing = []
+        for uri in dict.fromkeys(uri for uri in river_uris if uri is not None):
+            context = self.cache.get(self._cache_key(uri, 3))
+            if context is None:
+                missing.append(uri)
+            else:
+                contexts[uri] = context
+        for uri, context in zip(missing, self.contexts_for_rivers(missing, max_hops=3)):
+            if context is not None:
+                contexts[uri] = context
+        self.cache.put_many((self._cache_key(uri, 3), contexts[uri]) for uri in missing if uri in contexts)
+        
+        return [
+            contexts[uri] if uri in contexts else self.retrieve_for_question(question, name)
+            for question, name, uri in zip(questions, river_names, river_uris)
+        ]
+    
+    def warm_cache(self, river_uris: Optional[Iterable] = None, max_hops: int = 3,
+                   processes: Optional[int] = None, chunk_size: int = 256) -> int:
+        """
+        Precomputes contexts for many rivers (default: every labelled river)
+        across worker processes, each opening the graph snapshot.
+        
+        Returns:
+            int: Number of contexts added to the cache.
+        """
+        if river_uris is None:
+            river_uris = list(dict.fromkeys(self.label_index.uris))
+        pending = [uri for uri in river_uris if self.cache.get(self._cache_key(uri, max_hops)) is None]
+        chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+        processes = processes or os.cpu_count() or 1
+        
+        if processes == 1 or len(chunks) <= 1:
+            results = (zip(chunk, self.contexts_for_rivers(chunk, max_hops)) for chunk in chunks)
+            return self._store_contexts(results, max_hops)
+        with ProcessPoolExecutor(
+            max_workers=min(processes, len(chunks)),
+            initializer=_init_warm_worker,
+            initargs=(self.graph_path, self.backend, self.max_frontier, self.max_context_chars),
+        ) as pool:
+            return self._store_contexts(pool.map(_warm_chunk, chunks, [max_hops] * len(chunks)), max_hops)
+    
+    def _store_contexts(self, chunks, max_hops: int) -> int:
+        added = 0
+        for chunk in chunks:
+            items = [(self._cache_key(uri, max_hops), context) for uri, context in chunk if context is not None]
+            self.cache.put_many(items)
+            added += len(items)
+        return added
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Materialized river profiles for rivers Graph-RAG experiment.
+One row of denormalized facts per river, stored as NumPy columns (.npz)
+so lookups are array indexing instead of triple walks.
+"""
+
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+from rdflib import Namespace
+from rdflib.namespace import RDF, RDFS
+
+WM = Namespace("http://worldmind.ai/rivers-v4#")
+
+PROFILE_FORMAT_VERSION = 1
+
+# Column name -> predicate
+NUMERIC_COLUMNS = {
+    'length': WM.length,
+    'discharge': WM.discharge,
+    'source_elevation': WM.sourceElevation,
+    'mouth_elevation': WM.mouthElevation,
+}
+STRING_COLUMNS = {
+    'label': RDFS.label,
+    'abstract': WM.abstractText,
+    'other_names': WM.otherNames,
+    'country': WM.inCountry,
+    'system': WM.partOfSystem,
+    'source': WM.hasSource,
+    'mouth': WM.hasMouth,
+}
+LIST_COLUMNS = {
+    'states': WM.traverses,
+    'counties': WM.inCounty,
+    'tributaries': WM.hasTributary,
+}
+
+
+class RiverProfileTable:
+    """
+    Per-river facts, one row per WM.River subject.
+
+    Strings (IRIs, labels, abstracts) are interned into one dictionary kept
+    as a UTF-8 blob plus offsets. String columns hold IDs into it (-1 when
+    missing), list columns are CSR offsets plus IDs, and numeric columns are
+    float64 with NaN when missing. Single-valued columns keep the first value.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], graph_sha256: Optional[str] = None):
+        self.columns = columns
+        self.graph_sha256 = graph_sha256
+        self._blob = columns['string_blob'].tobytes()
+        self._offsets = columns['string_offsets']
+        self._index = {self.string(i): row for row, i in enumerate(columns['uri'].tolist())}
+
+    @classmethod
+    def from_graph(cls, graph, graph_sha256: Optional[str] = None) -> "RiverProfileTable":
+        """Builds the table from an rdflib Graph or TripleStore."""
+        strings: Dict[str, int] = {}
+
+        def intern(value) -> int:
+            return strings.setdefault(str(value), len(strings))
+
+        rivers = sorted(set(graph.subjects(RDF.type, WM.River)), key=str)
+        columns = {'uri': np.array([intern(river) for river in rivers], dtype=np.int32)}
+        for name, predicate in NUMERIC_COLUMNS.items():
+            values = np.full(len(rivers), np.nan)
+            for row, river in enumerate(rivers):
+                value = next(iter(graph.objects(river, predicate)), None)
+                try:
+                    values[row] = float(value) if value is not None else np.nan
+                except ValueError:
+                    pass
+            columns[name] = values
+        for name, predicate in STRING_COLUMNS.items():
+            columns[name] = np.array([
+                intern(value) if value is not None else -1
+                for value in (next(iter(graph.objects(river, predicate)), None) for river in rivers)
+            ], dtype=np.int32)
+        for name, predicate in LIST_COLUMNS.items():
+            ids: List[int] = []
+            offsets = [0]
+            for river in rivers:
+                ids.extend(sorted(intern(value) for value in graph.objects(river, predicate)))
+                offsets.append(len(ids))
+            columns[f'{name}_ids'] = np.array(ids, dtype=np.int32)
+            columns[f'{name}_offsets'] = np.array(offsets, dtype=np.int64)
+
+        encoded = [s.encode('utf-8') for s in strings]
+        columns['string_blob'] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        columns['string_offsets'] = np.concatenate([[0], np.cumsum([len(b) for b in encoded])]).astype(np.int64)
+        return cls(columns, graph_sha256)
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez(
+            path,
+            format_version=np.array(PROFILE_FORMAT_VERSION),
+            graph_sha256=np.array(self.graph_sha256 or ''),
+            **self.columns,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "RiverProfileTable":
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data['format_version'])
+            if version != PROFILE_FORMAT_VERSION:
+                raise ValueError(
+                    f"River profile table {path} has format {version}, expected {PROFILE_FORMAT_VERSION}"
+                )
+            columns = {name: data[name] for name in data.files if name not in ('format_version', 'graph_sha256')}
+            return cls(columns, str(data['graph_sha256']) or None)
+
+    def __len__(self) -> int:
+        return len(self.columns['uri'])
+
+    def string(self, string_id: int) -> Optional[str]:
+        if string_id < 0:
+            return None
+        return self._blob[self._offsets[string_id]:self._offsets[string_id + 1]].decode('utf-8')
+
+    def index(self, river_uri) -> int:
+        """Row of a river, or -1 if it has no profile."""
+        return self._index.get(str(river_uri), -1)
+
+    def row(self, row: int) -> Dict:
+        """Profile of the river in a row, with None / [] for missing facts."""
+        columns = self.columns
+        profile = {'uri': self.string(int(columns['uri'][row]))}
+        for name in STRING_COLUMNS:
+            profile[name] = self.string(int(columns[name][row]))
+        for name in NUMERIC_COLUMNS:
+            value = float(columns[name][row])
+            profile[name] = None if np.isnan(value) else value
+        for name in LIST_COLUMNS:
+            offsets = columns[f'{name}_offsets']
+            ids = columns[f'{name}_ids'][offsets[row]:offsets[row + 1]]
+            profile[name] = [self.string(i) for i in ids.tolist()]
+        return profile
+
+    def profile(self, river_uri) -> Optional[Dict]:
+        row = self.index(river_uri)
+        return None if row < 0 else self.row(row)
@@ -92,7 +92,7 @@ def main():
     print("\nGenerated Files:")
     print("- data/river_chunks.json: Processed document chunks")
     print("- embeddings/river_embeddings.npy: Document embeddings")
-    print("- embeddings/chunk_metadata.json: Chunk metadata")
+    print("- embeddings/chunk_metadata/: Chunk metadata (columnar)")
     print("- results/rag_*_results.jsonl: RAG evaluation results")
     print("- results/analysis/: Comparison analysis reports")
 
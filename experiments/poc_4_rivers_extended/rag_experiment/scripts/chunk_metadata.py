@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Columnar chunk metadata for the RAG experiment.
+One .npy file per field in a directory (numbers as arrays, strings as a
+UTF-8 blob plus offsets), memory-mapped on open, so startup does not grow
+with the corpus and rows are only decoded when read.
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+METADATA_FORMAT_VERSION = 1
+MANIFEST = 'columns.json'
+
+_DTYPES = {'bool': np.bool_, 'int': np.int64, 'float': np.float64}
+
+
+def _kind(values: List[Any]) -> str:
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, bool) for v in present):
+        return 'bool'
+    if present and all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+        return 'int'
+    if present and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        return 'float'
+    return 'str'
+
+
+class ChunkMetadata:
+    """
+    Read-only chunk metadata: len(), and chunk dicts by position, decoded
+    from the memory-mapped columns on access. Fields missing from a chunk
+    (or None) are left out of its dict.
+    """
+
+    def __init__(self, path: str, rows: int, fields: Dict[str, str], columns: Dict[str, np.ndarray]):
+        self.path = path
+        self.rows = rows
+        self.fields = fields
+        self.columns = columns
+
+    @staticmethod
+    def write(chunks: List[Dict[str, Any]], path: str):
+        """Writes chunk dicts as columns into the directory `path`, replacing what was there."""
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if name.endswith('.npy') or name == MANIFEST:
+                os.remove(os.path.join(path, name))
+
+        fields = {}
+        for chunk in chunks:
+            for field in chunk:
+                fields.setdefault(field, None)
+        for field in fields:
+            values = [chunk.get(field) for chunk in chunks]
+            kind = fields[field] = _kind(values)
+            missing = np.array([v is None for v in values], dtype=bool)
+            if missing.any():
+                np.save(os.path.join(path, f'{field}.missing.npy'), missing)
+            if kind == 'str':
+                encoded = [b'' if v is None else str(v).encode('utf-8') for v in values]
+                offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+                np.cumsum([len(b) for b in encoded], out=offsets[1:])
+                np.save(os.path.join(path, f'{field}.blob.npy'), np.frombuffer(b''.join(encoded), dtype=np.uint8))
+                np.save(os.path.join(path, f'{field}.offsets.npy'), offsets)
+            else:
+                column = np.array([0 if v is None else v for v in values], dtype=_DTYPES[kind])
+                np.save(os.path.join(path, f'{field}.npy'), column)
+
+        # The manifest is written last: a directory without one is incomplete.
+        with open(os.path.join(path, MANIFEST), 'w') as f:
+            json.dump({'format_version': METADATA_FORMAT_VERSION, 'rows': len(chunks), 'fields': fields}, f)
+
+    @classmethod
+    def open(cls, path: str) -> "ChunkMetadata":
+        with open(os.path.join(path, MANIFEST), 'r') as f:
+            manifest = json.load(f)
+        if manifest['format_version'] != METADATA_FORMAT_VERSION:
+            raise ValueError(
+                f"Chunk metadata {path} has format {manifest['format_version']}, expected {METADATA_FORMAT_VERSION}"
+            )
+        columns = {}
+        for name in os.listdir(path):
+            if name.endswith('.npy'):
+                columns[name[:-len('.npy')]] = np.load(os.path.join(path, name), mmap_mode='r')
+        return cls(path, manifest['rows'], manifest['fields'], columns)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def value(self, field: str, row: int) -> Optional[Any]:
+        """One field of one chunk (None if missing)."""
+        missing = self.columns.get(f'{field}.missing')
+        if missing is not None and missing[row]:
+            return None
+        kind = self.fields[field]
+        if kind == 'str':
+            offsets = self.columns[f'{field}.offsets']
+            return self.columns[f'{field}.blob'][offsets[row]:offsets[row + 1]].tobytes().decode('utf-8')
+        return self.columns[field][row].item()
+
+    def __getitem__(self, row: int) -> Dict[str, Any]:
+        if not -self.rows <= row < self.rows:
+            raise IndexError(f"Chunk {row} out of range ({self.rows} chunks)")
+        row %= self.rows
+        chunk = {}
+        for field in self.fields:
+            value = self.value(field, row)
+            if value is not None:
+                chunk[field] = value
+        return chunk
+
+    def __iter__(self):
+        return (self[row] for row in range(self.rows))
+
+
+def load_chunk_metadata(path: str):
+    """
+    Chunk metadata at `path`: a ChunkMetadata directory, or a JSON list of
+    chunk dicts as written before the columnar format (loaded into memory).
+    """
+    if os.path.isdir(path):
+        return ChunkMetadata.open(path)
+    legacy = path if path.endswith('.json') else path + '.json'
+    with open(legacy, 'r') as f:
+        print(f"Loading JSON chunk metadata from {legacy}; re-run generate_embeddings.py for columnar metadata")
+        return json.load(f)
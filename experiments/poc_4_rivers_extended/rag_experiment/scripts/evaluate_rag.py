@@ -21,7 +21,7 @@ from retrieval_system import RetrievalSystem
 load_dotenv()
 
 class RAGEvaluator:
-    def __init__(self, config_path: str, model_name: str):
+    def __init__(self, config_path: str, model_name: str, index_settings: Dict[str, Any] = None):
         """Initialize RAG evaluator."""
         with open(config_path, 'r') as f:
             self.config = json.load(f)
@@ -32,8 +32,10 @@ class RAGEvaluator:
         if not self.api_key:
             raise ValueError("OPENROUTER_API_KEY environment variable not set.")
         
-        # Initialize retrieval system
-        self.retrieval = RetrievalSystem(config_path)
+        # The retrieval system (embedding model + index) is loaded on first use
+        self.config_path = config_path
+        self.index_settings = index_settings
+        self._retrieval = None
         
         # Results file paths
         safe_model_name = model_name.replace("/", "_").replace("\\", "_")
@@ -43,6 +45,13 @@ class RAGEvaluator:
         # Create results directory
         os.makedirs("results", exist_ok=True)
     
+    @property
+    def retrieval(self) -> RetrievalSystem:
+        """Retrieval system, loaded on first access so --status stays fast."""
+        if self._retrieval is None:
+            self._retrieval = RetrievalSystem(self.config_path, self.index_settings)
+        return self._retrieval
+
     def get_llm_response_with_context(self, question: str, answers: List[str], context: str) -> str:
         """Get LLM response with RAG context."""
         prompt = f"""This is a multiple choice question about US rivers and waterways. Use the provided context to answer the question accurately.
@@ -289,16 +298,28 @@ Based on the context provided, respond with only the letter of the correct answe
 
 def main():
     """Main evaluation function."""
-    import sys
-    
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Evaluate RAG on the rivers Q&A dataset")
+    parser.add_argument('--status', action='store_true', help="Show progress without running the evaluation")
+    parser.add_argument('--index', choices=['flat', 'ivf'], help="Override the configured vector index type")
+    parser.add_argument('--nprobe', type=int, help="IVF lists scanned per query (higher: better recall, slower)")
+    args = parser.parse_args()
+
     config_path = 'config/rag_config.json'
     model_name = "google/gemini-2.5-flash-lite"  # Same model as direct evaluation
     
+    index_settings = {}
+    if args.index:
+        index_settings['type'] = args.index
+    if args.nprobe:
+        index_settings['nprobe'] = args.nprobe
+
     # Create evaluator
-    evaluator = RAGEvaluator(config_path, model_name)
+    evaluator = RAGEvaluator(config_path, model_name, index_settings)
     
     # Check if user wants status only
-    if len(sys.argv) > 1 and sys.argv[1] == '--status':
+    if args.status:
         evaluator.show_status()
         return
     
@@ -11,8 +11,34 @@ import torch.nn.functional as F
 from transformers import AutoTokenizer, AutoModel
 from typing import List, Dict, Any
 import os
+import time
 from tqdm import tqdm
 
+from chunk_metadata import ChunkMetadata
+from vector_index import QuantizedEmbeddings, embeddings_source, quantized_path
+
+
+def length_batches(lengths: np.ndarray, max_batch_tokens: int, max_batch_size: int) -> List[np.ndarray]:
+    """
+    Groups texts by token length, longest first, into batches whose padded
+    size (texts x longest member) stays within max_batch_tokens, with at most
+    max_batch_size texts each. A text over the budget gets a batch of its own.
+
+    Returns:
+        List[np.ndarray]: Positions into `lengths`, one array per batch.
+    """
+    lengths = np.asarray(lengths)
+    order = np.argsort(-lengths, kind='stable')
+    batches = []
+    start = 0
+    while start < len(order):
+        longest = max(int(lengths[order[start]]), 1)
+        size = max(1, min(max_batch_size, max_batch_tokens // longest))
+        batches.append(order[start:start + size])
+        start += size
+    return batches
+
+
 class EmbeddingGenerator:
     def __init__(self, config_path: str):
         """Initialize with configuration."""
@@ -23,6 +49,19 @@ class EmbeddingGenerator:
         self.max_tokens = self.config['max_tokens']
         self.task_instruction = self.config['task_instruction']
         
+        # Batching and CPU threading; thread counts must be set before the model runs
+        batching = self.config.get('batching', {})
+        self.max_batch_tokens = batching.get('max_batch_tokens', 16384)
+        self.max_batch_size = batching.get('max_batch_size', 64)
+        if batching.get('num_threads'):
+            torch.set_num_threads(batching['num_threads'])
+        if batching.get('num_interop_threads'):
+            try:
+                torch.set_num_interop_threads(batching['num_interop_threads'])
+            except RuntimeError as e:
+                print(f"Could not set inter-op threads: {e}")
+        print(f"Torch threads: {torch.get_num_threads()} intra-op, {torch.get_num_interop_threads()} inter-op")
+        
         # Load model and tokenizer
         print(f"Loading model: {self.model_name}")
         self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
@@ -72,58 +111,76 @@ class EmbeddingGenerator:
         
         return embeddings.cpu().numpy()
     
-    def generate_chunk_embeddings(self, chunks: List[Dict[str, Any]], batch_size: int = 32) -> np.ndarray:
-        """Generate embeddings for all document chunks."""
+    def embed_batched(self, texts: List[str], is_query: bool = False, max_batch_size: int = None,
+                      desc: str = "Generating embeddings") -> np.ndarray:
+        """
+        Generate embeddings for many texts, batched by token length under the
+        token budget so little compute goes to padding. Rows are returned in
+        the order of `texts`.
+        """
+        if is_query:
+            texts = [self.get_detailed_instruct(self.task_instruction, text) for text in texts]
+        if not texts:
+            return np.zeros((0, self.config['embedding_dimension']), dtype=np.float32)
+        
+        # Token lengths (as truncated for the model) decide the batches
+        input_ids = self.tokenizer(texts, max_length=self.max_tokens, truncation=True)['input_ids']
+        lengths = np.array([len(ids) for ids in input_ids])
+        batches = length_batches(lengths, self.max_batch_tokens, max_batch_size or self.max_batch_size)
+        
+        embeddings = None
+        padded_tokens = 0
+        start = time.perf_counter()
+        for batch in tqdm(batches, desc=desc):
+            batch_embeddings = self.embed_texts([texts[i] for i in batch], is_query=False)
+            if embeddings is None:
+                embeddings = np.empty((len(texts), batch_embeddings.shape[1]), dtype=batch_embeddings.dtype)
+            embeddings[batch] = batch_embeddings
+            padded_tokens += len(batch) * int(lengths[batch].max())
+        elapsed = time.perf_counter() - start
+        
+        tokens = int(lengths.sum())
+        print(f"Embedded {len(texts)} texts ({tokens} tokens) in {len(batches)} batches, {elapsed:.1f}s: "
+              f"{tokens / elapsed:.0f} tokens/s, {tokens / padded_tokens:.0%} of processed tokens were not padding")
+        return embeddings
+    
+    def generate_chunk_embeddings(self, chunks: List[Dict[str, Any]], max_batch_size: int = None) -> np.ndarray:
+        """Generate embeddings for all document chunks (documents don't need instruction)."""
         print(f"Generating embeddings for {len(chunks)} chunks...")
         
-        all_embeddings = []
-        
-        # Process in batches
-        for i in tqdm(range(0, len(chunks), batch_size), desc="Generating embeddings"):
-            batch_chunks = chunks[i:i + batch_size]
-            batch_texts = [chunk['text'] for chunk in batch_chunks]
-            
-            # Generate embeddings (documents don't need instruction)
-            batch_embeddings = self.embed_texts(batch_texts, is_query=False)
-            all_embeddings.append(batch_embeddings)
-        
-        # Concatenate all embeddings
-        embeddings = np.vstack(all_embeddings)
+        embeddings = self.embed_batched([chunk['text'] for chunk in chunks], is_query=False,
+                                        max_batch_size=max_batch_size)
         print(f"Generated embeddings shape: {embeddings.shape}")
         
         return embeddings
     
-    def generate_question_embeddings(self, questions: List[str], batch_size: int = 32) -> np.ndarray:
-        """Generate embeddings for questions."""
+    def generate_question_embeddings(self, questions: List[str], max_batch_size: int = None) -> np.ndarray:
+        """Generate embeddings for questions (questions need instruction)."""
         print(f"Generating embeddings for {len(questions)} questions...")
         
-        all_embeddings = []
-        
-        # Process in batches
-        for i in tqdm(range(0, len(questions), batch_size), desc="Generating question embeddings"):
-            batch_questions = questions[i:i + batch_size]
-            
-            # Generate embeddings (questions need instruction)
-            batch_embeddings = self.embed_texts(batch_questions, is_query=True)
-            all_embeddings.append(batch_embeddings)
-        
-        # Concatenate all embeddings
-        embeddings = np.vstack(all_embeddings)
+        embeddings = self.embed_batched(questions, is_query=True, max_batch_size=max_batch_size,
+                                        desc="Generating question embeddings")
         print(f"Generated question embeddings shape: {embeddings.shape}")
         
         return embeddings
     
-    def save_embeddings(self, embeddings: np.ndarray, output_path: str):
-        """Save embeddings to numpy file."""
+    def save_embeddings(self, embeddings: np.ndarray, output_path: str, quantization: str = None):
+        """
+        Save embeddings to numpy file, plus a quantized copy next to it
+        ('int8' or 'float16') for RetrievalSystem to search in memory.
+        """
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         np.save(output_path, embeddings)
         print(f"Saved embeddings to {output_path}")
+        if quantization:
+            quantized = QuantizedEmbeddings.quantize(embeddings, quantization)
+            path = quantized_path(output_path, quantization)
+            quantized.save(path, embeddings_source(output_path, embeddings))
+            print(f"Saved {quantization} embeddings to {path} ({quantized.nbytes / embeddings.nbytes:.0%} of float32)")
     
     def save_metadata(self, metadata: List[Dict[str, Any]], output_path: str):
-        """Save chunk metadata."""
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        """Save chunk metadata as columns (one memory-mappable file per field)."""
+        ChunkMetadata.write(metadata, output_path)
         print(f"Saved metadata to {output_path}")
 
 
@@ -144,7 +201,8 @@ def main():
     
     # Save embeddings and metadata
     embeddings_path = generator.config['output_paths']['embeddings']
-    generator.save_embeddings(chunk_embeddings, embeddings_path)
+    quantization = generator.config.get('index', {}).get('quantization')
+    generator.save_embeddings(chunk_embeddings, embeddings_path, quantization)
     
     metadata_path = generator.config['output_paths']['metadata']
     generator.save_metadata(chunks, metadata_path)
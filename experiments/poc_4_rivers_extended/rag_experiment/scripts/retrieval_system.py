@@ -6,18 +6,55 @@ Implements similarity search and document retrieval for RAG pipeline.
 
 import json
 import numpy as np
-import torch
-import torch.nn.functional as F
-from transformers import AutoTokenizer, AutoModel
-from typing import List, Dict, Any, Tuple
+from typing import TYPE_CHECKING, List, Dict, Any, Tuple
 import os
-from sklearn.metrics.pairwise import cosine_similarity
+
+from chunk_metadata import load_chunk_metadata
+from vector_index import load_index
+
+# torch and transformers are imported when a RetrievalSystem is
+# created, so importing this module (e.g. for `evaluate_rag.py --status`) is cheap.
+if TYPE_CHECKING:
+    import torch
+
+
+class RetrievalHits:
+    """
+    Search results as chunk indices and similarities, best first. Chunk
+    dicts are only built when a hit is read or to_dicts() is called.
+    """
+
+    def __init__(self, indices: np.ndarray, scores: np.ndarray, chunks: List[Dict[str, Any]]):
+        self.indices = indices
+        self.scores = scores
+        self.chunks = chunks
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, rank: int) -> Dict[str, Any]:
+        chunk = self.chunks[int(self.indices[rank])].copy()
+        chunk['similarity_score'] = float(self.scores[rank])
+        chunk['rank'] = rank + 1
+        return chunk
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [self[rank] for rank in range(len(self))]
+
 
 class RetrievalSystem:
-    def __init__(self, config_path: str):
-        """Initialize retrieval system."""
+    def __init__(self, config_path: str, index_settings: Dict[str, Any] = None):
+        """
+        Initialize retrieval system.
+
+        Args:
+            config_path: Path to rag_config.json.
+            index_settings: Overrides for its "index" section, e.g.
+                {"type": "ivf", "nprobe": 16}.
+        """
         with open(config_path, 'r') as f:
             self.config = json.load(f)
+        self.index_settings = {**self.config.get('index', {}), **(index_settings or {})}
         
         self.model_name = self.config['embedding_model']
         self.max_tokens = self.config['max_tokens']
@@ -25,6 +62,9 @@ class RetrievalSystem:
         self.top_k = self.config['retrieval_top_k']
         self.similarity_threshold = self.config['similarity_threshold']
         
+        import torch
+        from transformers import AutoTokenizer, AutoModel
+
         # Load model and tokenizer
         print(f"Loading model: {self.model_name}")
         self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
@@ -42,21 +82,25 @@ class RetrievalSystem:
         print(f"Loaded {len(self.chunks)} document chunks")
     
     def load_embeddings_and_metadata(self):
-        """Load pre-computed embeddings and chunk metadata."""
+        """
+        Open pre-computed embeddings and chunk metadata. Both are memory-mapped,
+        so startup time does not grow with the corpus and processes serving the
+        same files share their pages.
+        """
         embeddings_path = self.config['output_paths']['embeddings']
         metadata_path = self.config['output_paths']['metadata']
         
-        # Load embeddings
-        self.chunk_embeddings = np.load(embeddings_path)
-        print(f"Loaded chunk embeddings: {self.chunk_embeddings.shape}")
-        
-        # Load metadata
-        with open(metadata_path, 'r') as f:
-            self.chunks = json.load(f)
+        # Open embeddings (pages are read on first use)
+        self.chunk_embeddings = np.load(embeddings_path, mmap_mode='r')
+        print(f"Opened chunk embeddings: {self.chunk_embeddings.shape}")
         
-        print(f"Loaded {len(self.chunks)} chunk metadata entries")
+        # Open metadata (rows are decoded when retrieved)
+        self.chunks = load_chunk_metadata(metadata_path)
+        print(f"Opened {len(self.chunks)} chunk metadata entries")
+
+        self.index = load_index(self.chunk_embeddings, embeddings_path, self.index_settings)
     
-    def average_pool(self, last_hidden_states: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+    def average_pool(self, last_hidden_states: "torch.Tensor", attention_mask: "torch.Tensor") -> "torch.Tensor":
         """Average pooling for embeddings."""
         last_hidden = last_hidden_states.masked_fill(~attention_mask[..., None].bool(), 0.0)
         return last_hidden.sum(dim=1) / attention_mask.sum(dim=1)[..., None]
@@ -67,6 +111,9 @@ class RetrievalSystem:
     
     def embed_query(self, query: str) -> np.ndarray:
         """Generate embedding for a single query."""
+        import torch
+        import torch.nn.functional as F
+
         # Add instruction
         instructed_query = self.get_detailed_instruct(self.task_instruction, query)
         
@@ -92,32 +139,23 @@ class RetrievalSystem:
         
         return embedding.cpu().numpy()
     
-    def retrieve_documents(self, query: str, top_k: int = None) -> List[Dict[str, Any]]:
-        """Retrieve most relevant documents for a query."""
+    def search(self, query: str, top_k: int = None) -> RetrievalHits:
+        """Top-k chunks at or above the similarity threshold, as index/score arrays."""
         if top_k is None:
             top_k = self.top_k
         
         # Generate query embedding
         query_embedding = self.embed_query(query)
         
-        # Compute similarities
-        similarities = cosine_similarity(query_embedding, self.chunk_embeddings)[0]
-        
-        # Get top-k indices
-        top_indices = np.argsort(similarities)[::-1][:top_k]
-        
-        # Filter by similarity threshold
-        filtered_indices = [idx for idx in top_indices if similarities[idx] >= self.similarity_threshold]
-        
-        # Prepare results
-        results = []
-        for idx in filtered_indices:
-            chunk = self.chunks[idx].copy()
-            chunk['similarity_score'] = float(similarities[idx])
-            chunk['rank'] = len(results) + 1
-            results.append(chunk)
-        
-        return results
+        # Search the index (inner product of normalized embeddings = cosine similarity),
+        # keeping only similarities at or above the threshold
+        scores, indices = self.index.search(query_embedding, top_k, self.similarity_threshold)
+        found = indices[0] >= 0
+        return RetrievalHits(indices[0][found], scores[0][found], self.chunks)
+    
+    def retrieve_documents(self, query: str, top_k: int = None) -> List[Dict[str, Any]]:
+        """Retrieve most relevant documents for a query."""
+        return self.search(query, top_k).to_dicts()
     
     def retrieve_for_question(self, question: str, river_name: str = None) -> List[Dict[str, Any]]:
         """Retrieve documents for a specific question, optionally filtering by river name."""
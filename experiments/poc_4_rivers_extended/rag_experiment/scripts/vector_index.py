@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+Vector indexes for the RAG retrieval system.
+Exact inner-product search over the chunk embeddings, or an IVF index
+(k-means coarse quantizer with inverted lists) that only scans the lists
+nearest to the query. Either can search int8 / float16 quantized embeddings
+and re-rank its candidates with the full-precision vectors.
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+INDEX_FORMAT_VERSION = 1
+
+# Rows scored per matrix product during k-means and list assignment
+ASSIGN_BATCH = 16384
+
+# Quantized rows converted to float32 at a time when scoring (small enough
+# for the converted block to stay in cache)
+SCORE_BLOCK = 256
+
+QUANTIZATIONS = ('int8', 'float16')
+
+
+def top_k(scores: np.ndarray, k: int, threshold: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Highest `k` scores of every row (only those >= `threshold` if given),
+    best first with ties in column order, and their columns. Rows with
+    fewer than `k` such scores are padded with -inf and column -1.
+
+    Candidates are selected with np.argpartition, so only the k winners of
+    a row are sorted.
+    """
+    scores = np.atleast_2d(scores)
+    top_scores = np.full((len(scores), k), -np.inf, dtype=scores.dtype)
+    top_ids = np.full((len(scores), k), -1, dtype=np.int64)
+    for row, values in enumerate(scores):
+        candidates = None
+        if threshold is not None:
+            candidates = np.flatnonzero(values >= threshold)
+            values = values[candidates]
+        if len(values) > k:
+            best = np.argpartition(values, len(values) - k)[len(values) - k:]
+        else:
+            best = np.arange(len(values))
+        ids = best if candidates is None else candidates[best]
+        order = np.lexsort((ids, -values[best]))
+        top_scores[row, :len(order)] = values[best[order]]
+        top_ids[row, :len(order)] = ids[order]
+    return top_scores, top_ids
+
+
+def score_candidates(vectors, candidates: np.ndarray, query: np.ndarray, k: int,
+                     threshold: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Scores the `candidates` rows of `vectors` against one query; top_k of them as chunk indices."""
+    candidates = np.sort(candidates)  # sequential reads from the vectors
+    best, order = top_k(np.asarray(vectors[candidates], dtype=np.float32) @ query, k, threshold)
+    return best[0], np.where(order[0] >= 0, candidates[order[0]], -1)
+
+
+def _as_vectors(embeddings):
+    return embeddings if isinstance(embeddings, QuantizedEmbeddings) else np.asarray(embeddings, dtype=np.float32)
+
+
+class QuantizedEmbeddings:
+    """
+    Embeddings stored as int8 codes with a per-dimension scale (4x smaller
+    than float32) or as float16 (2x smaller). Scores are computed in float32
+    one small block of rows at a time, so no full-size float copy is made.
+    They are approximate: wrap the index in a RescoringIndex to re-rank with
+    the full-precision vectors.
+    """
+
+    def __init__(self, codes: np.ndarray, scale: Optional[np.ndarray] = None):
+        self.codes = codes
+        self.scale = scale if scale is not None else np.ones(codes.shape[1], dtype=np.float32)
+
+    @classmethod
+    def quantize(cls, embeddings: np.ndarray, kind: str) -> "QuantizedEmbeddings":
+        """
+        Args:
+            embeddings: (n, dim) float vectors, e.g. a memory-mapped .npy.
+            kind: 'int8' (symmetric, scale = max |value| / 127 per dimension)
+                or 'float16'.
+        """
+        if kind not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {kind}")
+        blocks = range(0, len(embeddings), ASSIGN_BATCH)
+        if kind == 'float16':
+            codes = np.empty(embeddings.shape, dtype=np.float16)
+            for i in blocks:
+                codes[i:i + ASSIGN_BATCH] = embeddings[i:i + ASSIGN_BATCH]
+            return cls(codes)
+
+        scale = np.zeros(embeddings.shape[1], dtype=np.float32)
+        for i in blocks:
+            np.maximum(scale, np.abs(embeddings[i:i + ASSIGN_BATCH]).max(axis=0, initial=0), out=scale)
+        scale = np.where(scale > 0, scale / 127, 1).astype(np.float32)
+        codes = np.empty(embeddings.shape, dtype=np.int8)
+        for i in blocks:
+            codes[i:i + ASSIGN_BATCH] = np.clip(np.rint(embeddings[i:i + ASSIGN_BATCH] / scale), -127, 127)
+        return cls(codes, scale)
+
+    @property
+    def kind(self) -> str:
+        return 'int8' if self.codes.dtype == np.int8 else 'float16'
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.codes.shape
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.scale.nbytes
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, rows) -> np.ndarray:
+        """Dequantized float32 rows."""
+        return self.codes[rows].astype(np.float32) * self.scale
+
+    def dot(self, queries: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Approximate scores of (q, dim) queries against every row, as (q, n)."""
+        scaled = queries * self.scale  # folds the per-dimension scale into the query
+        if out is None:
+            out = np.empty((len(queries), len(self.codes)), dtype=np.float32)
+        block = np.empty((SCORE_BLOCK, self.codes.shape[1]), dtype=np.float32)
+        for i in range(0, len(self.codes), SCORE_BLOCK):
+            codes = self.codes[i:i + SCORE_BLOCK]
+            rows = block[:len(codes)]
+            np.copyto(rows, codes)
+            np.matmul(scaled, rows.T, out=out[:, i:i + len(codes)])
+        return out
+
+    def save(self, path: str, source: Dict):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez(
+            path,
+            format_version=np.array(INDEX_FORMAT_VERSION),
+            source=np.array(json.dumps(source, sort_keys=True)),
+            codes=self.codes,
+            scale=self.scale,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["QuantizedEmbeddings", Dict]:
+        """Reads embeddings written by save(); returns them and their source fingerprint."""
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data['format_version'])
+            if version != INDEX_FORMAT_VERSION:
+                raise ValueError(f"Quantized embeddings {path} have format {version}, expected {INDEX_FORMAT_VERSION}")
+            return cls(data['codes'], data['scale']), json.loads(str(data['source']))
+
+
+class FlatIndex:
+    """
+    Exact search. Embeddings are L2-normalized when generated, so the inner
+    product is the cosine similarity and nothing is re-normalized here.
+
+    Scores are float32. A single query is one matrix-vector product into a
+    preallocated buffer, so an index is not safe to search from several
+    threads at once. `embeddings` may be QuantizedEmbeddings.
+    """
+
+    kind = 'flat'
+
+    def __init__(self, embeddings):
+        self.embeddings = _as_vectors(embeddings)
+        self._scores = np.empty((1, len(self.embeddings)), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.embeddings)
+
+    def search(self, queries: np.ndarray, k: int, threshold: Optional[float] = None,
+               nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Args:
+            queries: (q, dim) or (dim,) normalized query embeddings.
+            k: Results per query.
+            threshold: Minimum similarity of a result.
+            nprobe: Ignored; accepted so that callers can search any index
+                (including a RescoringIndex over this one) the same way.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (q, k) similarities, best first,
+            and the chunk indices they belong to (-inf / -1 padding).
+        """
+        queries = np.atleast_2d(queries).astype(np.float32, copy=False)
+        out = self._scores if len(queries) == 1 else None
+        if isinstance(self.embeddings, QuantizedEmbeddings):
+            scores = self.embeddings.dot(queries, out=out)
+        else:
+            scores = np.matmul(queries, self.embeddings.T, out=out)
+        return top_k(scores, k, threshold)
+
+
+def spherical_kmeans(vectors: np.ndarray, n_clusters: int, iterations: int = 10,
+                     sample_size: Optional[int] = None, seed: int = 0) -> np.ndarray:
+    """
+    Unit-length centroids of normalized vectors, trained by inner-product
+    k-means on a sample (64 points per cluster by default). Clusters left
+    empty are re-seeded with random sample points.
+    """
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), sample_size or 64 * n_clusters)
+    sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))], dtype=np.float32)
+    centroids = sample[rng.choice(sample_size, n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = assign(sample, centroids)
+        order = np.argsort(assignment, kind='stable')
+        counts = np.bincount(assignment, minlength=n_clusters)
+        filled = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+        centroids[filled] = np.add.reduceat(sample[order], starts, axis=0)
+        empty = np.flatnonzero(counts == 0)
+        centroids[empty] = sample[rng.choice(sample_size, len(empty), replace=False)]
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+    return centroids
+
+
+def assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the nearest (highest inner product) centroid of every vector."""
+    assignment = np.empty(len(vectors), dtype=np.int32)
+    for i in range(0, len(vectors), ASSIGN_BATCH):
+        batch = np.asarray(vectors[i:i + ASSIGN_BATCH], dtype=np.float32)
+        assignment[i:i + ASSIGN_BATCH] = (batch @ centroids.T).argmax(axis=1)
+    return assignment
+
+
+class IVFIndex:
+    """
+    Inverted-file index: every embedding is filed under its nearest k-means
+    centroid, and a query only scores the embeddings in its `nprobe` nearest
+    lists. Lists are CSR offsets into one array of chunk indices; the
+    embeddings themselves (which may be QuantizedEmbeddings) are not copied.
+
+    `nprobe` trades recall for latency: nprobe == nlist is exact search.
+    """
+
+    kind = 'ivf'
+
+    def __init__(self, embeddings, centroids: np.ndarray,
+                 list_offsets: np.ndarray, list_ids: np.ndarray, nprobe: int = 8):
+        self.embeddings = _as_vectors(embeddings)
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_ids = list_ids
+        self.nprobe = nprobe
+
+    @classmethod
+    def build(cls, embeddings: np.ndarray, nlist: Optional[int] = None, nprobe: int = 8,
+              iterations: int = 10, seed: int = 0) -> "IVFIndex":
+        """Trains the coarse quantizer (nlist defaults to 4 * sqrt(n)) and fills the lists."""
+        nlist = max(1, min(len(embeddings), nlist or int(4 * np.sqrt(len(embeddings)))))
+        centroids = spherical_kmeans(embeddings, nlist, iterations=iterations, seed=seed)
+        assignment = assign(embeddings, centroids)
+        list_ids = np.argsort(assignment, kind='stable').astype(np.int64)
+        list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=nlist))]).astype(np.int64)
+        return cls(embeddings, centroids, list_offsets, list_ids, nprobe)
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    def __len__(self) -> int:
+        return len(self.list_ids)
+
+    def search(self, queries: np.ndarray, k: int, threshold: Optional[float] = None,
+               nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Same results as FlatIndex.search, restricted to the `nprobe` lists
+        nearest to each query.
+        """
+        queries = np.atleast_2d(queries).astype(np.float32, copy=False)
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        _, probes = top_k(queries @ self.centroids.T, nprobe)
+
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, (query, lists) in enumerate(zip(queries, probes)):
+            candidates = np.concatenate([
+                self.list_ids[self.list_offsets[i]:self.list_offsets[i + 1]] for i in lists
+            ])
+            if len(candidates):
+                scores[row], ids[row] = score_candidates(self.embeddings, candidates, query, k, threshold)
+        return scores, ids
+
+    def save(self, path: str, source: Dict):
+        """Writes the quantizer and lists (not the embeddings) with the source fingerprint."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez(
+            path,
+            format_version=np.array(INDEX_FORMAT_VERSION),
+            source=np.array(json.dumps(source, sort_keys=True)),
+            centroids=self.centroids,
+            list_offsets=self.list_offsets,
+            list_ids=self.list_ids,
+        )
+
+    @classmethod
+    def load(cls, path: str, embeddings, nprobe: int = 8) -> Tuple["IVFIndex", Dict]:
+        """Reads an index written by save(); returns it and its source fingerprint."""
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data['format_version'])
+            if version != INDEX_FORMAT_VERSION:
+                raise ValueError(f"Vector index {path} has format {version}, expected {INDEX_FORMAT_VERSION}")
+            index = cls(embeddings, data['centroids'], data['list_offsets'], data['list_ids'], nprobe)
+            return index, json.loads(str(data['source']))
+
+
+class RescoringIndex:
+    """
+    Searches an index over quantized embeddings for `rescore` * k candidates
+    per query and re-ranks them with the full-precision embeddings, which
+    are typically memory-mapped so that only the candidate rows are read.
+    """
+
+    def __init__(self, index, embeddings: np.ndarray, rescore: int = 4):
+        self.index = index
+        self.embeddings = embeddings
+        self.rescore = rescore
+
+    @property
+    def kind(self) -> str:
+        return self.index.kind
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def search(self, queries: np.ndarray, k: int, threshold: Optional[float] = None,
+               **kwargs) -> Tuple[np.ndarray, np.ndarray]:
+        """Same as the wrapped index's search, with exact similarities."""
+        queries = np.atleast_2d(queries).astype(np.float32, copy=False)
+        _, candidates = self.index.search(queries, k * self.rescore, **kwargs)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, (query, found) in enumerate(zip(queries, candidates)):
+            found = found[found >= 0]
+            if len(found):
+                scores[row], ids[row] = score_candidates(self.embeddings, found, query, k, threshold)
+        return scores, ids
+
+
+def default_index_path(embeddings_path: str) -> str:
+    """Index file next to the embeddings: river_embeddings.npy -> river_embeddings.ivf.npz."""
+    return os.path.splitext(embeddings_path)[0] + '.ivf.npz'
+
+
+def embeddings_source(embeddings_path: str, embeddings: np.ndarray) -> Dict:
+    """
+    Fingerprint of the embeddings file an index was built from. File size
+    and mtime are compared instead of a content hash, which would mean
+    reading the whole matrix at every start.
+    """
+    stat = os.stat(embeddings_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'shape': list(embeddings.shape)}
+
+
+def ivf_source(embeddings_path: str, embeddings: np.ndarray, nlist: Optional[int]) -> Dict:
+    """Fingerprint of an IVF index: its embeddings plus the settings it was trained with."""
+    return dict(embeddings_source(embeddings_path, embeddings), nlist=nlist, metric='inner_product')
+
+
+def quantized_path(embeddings_path: str, kind: str) -> str:
+    """Quantized copy next to the embeddings: river_embeddings.npy -> river_embeddings.int8.npz."""
+    return os.path.splitext(embeddings_path)[0] + f'.{kind}.npz'
+
+
+def load_quantized(embeddings: np.ndarray, embeddings_path: str, kind: str) -> QuantizedEmbeddings:
+    """Quantized embeddings from their file when current, otherwise quantized and saved there."""
+    path = quantized_path(embeddings_path, kind)
+    source = embeddings_source(embeddings_path, embeddings)
+    if os.path.exists(path):
+        try:
+            quantized, built_from = QuantizedEmbeddings.load(path)
+            if built_from == source:
+                print(f"Loaded {kind} embeddings from {path} ({quantized.nbytes / 2**20:.1f} MiB)")
+                return quantized
+            print(f"Quantized embeddings {path} are stale, rebuilding")
+        except ValueError as e:
+            print(f"Ignoring quantized embeddings: {e}")
+
+    quantized = QuantizedEmbeddings.quantize(embeddings, kind)
+    quantized.save(path, source)
+    print(f"Saved {kind} embeddings to {path} ({quantized.nbytes / 2**20:.1f} MiB)")
+    return quantized
+
+
+def _load_ivf(embeddings: np.ndarray, vectors, embeddings_path: str, settings: Dict) -> IVFIndex:
+    path = settings.get('path') or default_index_path(embeddings_path)
+    nprobe = settings.get('nprobe', 8)
+    source = ivf_source(embeddings_path, embeddings, settings.get('nlist'))
+    if os.path.exists(path):
+        try:
+            index, built_from = IVFIndex.load(path, vectors, nprobe)
+            if built_from == source:
+                print(f"Loaded IVF index from {path} ({index.nlist} lists, nprobe={index.nprobe})")
+                return index
+            print(f"IVF index {path} is stale, rebuilding")
+        except ValueError as e:
+            print(f"Ignoring IVF index: {e}")
+
+    start = time.perf_counter()
+    index = IVFIndex.build(embeddings, nlist=settings.get('nlist'), nprobe=nprobe)
+    index.save(path, source)
+    print(f"Built IVF index with {index.nlist} lists in {time.perf_counter() - start:.1f}s, saved to {path}")
+    return IVFIndex(vectors, index.centroids, index.list_offsets, index.list_ids, nprobe)
+
+
+def load_index(embeddings: np.ndarray, embeddings_path: str, settings: Optional[Dict] = None):
+    """
+    Index over the embeddings as configured by the "index" section of
+    rag_config.json: {"type": "flat" | "ivf", "nlist": ..., "nprobe": ...,
+    "path": ..., "quantization": null | "int8" | "float16", "rescore": ...}.
+
+    An IVF index is loaded from its file when that was built from the
+    current embeddings with the same nlist, and otherwise trained and
+    saved there; quantized embeddings likewise. With quantization, the
+    index searches the quantized vectors and re-ranks `rescore` * k
+    candidates against `embeddings`.
+    """
+    settings = settings or {}
+    quantization = settings.get('quantization')
+    vectors = load_quantized(embeddings, embeddings_path, quantization) if quantization else embeddings
+
+    kind = settings.get('type', 'flat')
+    if kind == 'flat':
+        index = FlatIndex(vectors)
+    elif kind == 'ivf':
+        index = _load_ivf(embeddings, vectors, embeddings_path, settings)
+    else:
+        raise ValueError(f"Unknown index type: {kind}")
+
+    if quantization:
+        index = RescoringIndex(index, embeddings, settings.get('rescore', 4))
+    return index
+
+
+def main():
+    """Builds the IVF index for the configured embeddings and reports recall against exact search per nprobe."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--config', default='config/rag_config.json')
+    parser.add_argument('--nlist', type=int, default=None)
+    parser.add_argument('--queries', type=int, default=200, help='Chunk embeddings used as sample queries')
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = json.load(f)
+    embeddings_path = config['output_paths']['embeddings']
+    embeddings = np.load(embeddings_path)
+    settings = dict(config.get('index', {}), type='ivf')
+    if args.nlist:
+        index = IVFIndex.build(embeddings, nlist=args.nlist, nprobe=settings.get('nprobe', 8))
+        index.save(settings.get('path') or default_index_path(embeddings_path),
+                   ivf_source(embeddings_path, embeddings, args.nlist))
+    else:
+        index = load_index(embeddings, embeddings_path, settings)
+
+    rng = np.random.default_rng(0)
+    queries = embeddings[rng.choice(len(embeddings), min(args.queries, len(embeddings)), replace=False)]
+    start = time.perf_counter()
+    _, exact = FlatIndex(embeddings).search(queries, args.k)
+    flat_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    print(f"flat        {flat_ms:8.3f} ms/query  recall@{args.k} 1.000")
+    nlist = index.index.nlist if isinstance(index, RescoringIndex) else index.nlist
+    nprobe = 1
+    while nprobe <= nlist:
+        start = time.perf_counter()
+        _, ids = index.search(queries, args.k, nprobe=nprobe)
+        ivf_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        recall = np.mean([len(np.intersect1d(a, b)) / len(a) for a, b in zip(exact, ids)])
+        print(f"nprobe={nprobe:<5d}{ivf_ms:8.3f} ms/query  recall@{args.k} {recall:.3f}")
+        nprobe *= 2
+
+
+if __name__ == "__main__":
+    main()
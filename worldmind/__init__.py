@@ -3,13 +3,42 @@ WorldMind Core Library
 
 A framework for building truth-constrained LLM architectures
 using knowledge graphs as licensing oracles.
+
+Public classes are imported on first access, so `import worldmind` does not
+pull in rdflib, pyshacl or numpy until a component that needs them is used.
 """
 
+from typing import TYPE_CHECKING
+import importlib
+
 __version__ = "0.1.0"
 
-from worldmind.graph_store import GraphStore
-from worldmind.models.auditor import ConsistencyAuditor
-from worldmind.models.policy import AbstentionPolicy
+_LAZY_IMPORTS = {
+    "GraphStore": "worldmind.graph_store",
+    "TripleStore": "worldmind.triple_store",
+    "GraphRegistry": "worldmind.registry",
+    "ConsistencyAuditor": "worldmind.models.auditor",
+    "AbstentionPolicy": "worldmind.models.policy",
+}
+
+__all__ = ["GraphStore", "TripleStore", "GraphRegistry", "ConsistencyAuditor", "AbstentionPolicy"]
+
+if TYPE_CHECKING:
+    from worldmind.graph_store import GraphStore
+    from worldmind.triple_store import TripleStore
+    from worldmind.registry import GraphRegistry
+    from worldmind.models.auditor import ConsistencyAuditor
+    from worldmind.models.policy import AbstentionPolicy
+
+
+def __getattr__(name):
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
 
-__all__ = ["GraphStore", "ConsistencyAuditor", "AbstentionPolicy"]
 
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
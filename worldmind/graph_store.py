@@ -1,22 +1,115 @@
 from rdflib import Graph
+import hashlib
 import os
 
+from worldmind.triple_store import TripleStore
+
 
 class GraphStore:
     """Manages loading and accessing the knowledge graph."""
 
-    def __init__(self, graph_path: str):
+    BACKENDS = ("rdflib", "compact", "snapshot")
+    SNAPSHOT_SUFFIX = ".wmsnap"
+
+    def __init__(self, graph_path: str, backend: str = "rdflib", snapshot_path: str = None):
+        """
+        Args:
+            graph_path (str): Path to the Turtle file with the knowledge graph.
+            backend (str): 'rdflib' keeps a regular in-memory rdflib Graph;
+                'compact' interns terms into a string dictionary and keeps the
+                triples as sorted integer arrays (see TripleStore);
+                'snapshot' is the compact backend loaded from a binary snapshot
+                next to the Turtle file, rebuilt whenever the Turtle file changes.
+            snapshot_path (str): Snapshot location for the 'snapshot' backend.
+                Defaults to the graph path with a '.wmsnap' extension.
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {self.BACKENDS}")
         if not os.path.exists(graph_path):
             raise FileNotFoundError(
                 f"Knowledge graph file not found at {graph_path}. Please run 'make build'."
             )
 
-        print(f"Loading knowledge graph from {graph_path}...")
-        self.graph = Graph()
-        self.graph.parse(graph_path, format="turtle")
+        self.graph_path = graph_path
+        self.backend = backend
+        self.snapshot_path = snapshot_path or self.default_snapshot_path(graph_path)
+        self._source_hash = None
+
+        if backend == "snapshot" and self._snapshot_is_fresh():
+            print(f"Opening graph snapshot {self.snapshot_path}...")
+            self.graph = TripleStore.open(self.snapshot_path)
+            self._source_hash = self.graph.source["sha256"]
+        else:
+            print(f"Loading knowledge graph from {graph_path}...")
+            self.graph = Graph()
+            self.graph.parse(graph_path, format="turtle")
+            if backend != "rdflib":
+                self.graph = TripleStore.from_graph(self.graph)
+            if backend == "snapshot":
+                self.save_snapshot()
+                self.graph = TripleStore.open(self.snapshot_path)
         print(f"Graph loaded with {len(self.graph)} triples.")
 
-    def get_graph(self) -> Graph:
-        """Returns the loaded RDF graph."""
-        return self.graph
+    @classmethod
+    def open_snapshot(cls, graph_path: str, snapshot_path: str = None) -> "GraphStore":
+        """
+        Opens the graph through its memory-mapped binary snapshot, building or
+        refreshing the snapshot first if it is missing or out of date.
+        """
+        return cls(graph_path, backend="snapshot", snapshot_path=snapshot_path)
+
+    @classmethod
+    def default_snapshot_path(cls, graph_path: str) -> str:
+        return os.path.splitext(graph_path)[0] + cls.SNAPSHOT_SUFFIX
+
+    @property
+    def source_hash(self) -> str:
+        """SHA-256 of the Turtle source the graph was loaded from."""
+        if self._source_hash is None:
+            digest = hashlib.sha256()
+            with open(self.graph_path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+            self._source_hash = digest.hexdigest()
+        return self._source_hash
 
+    def _source_info(self) -> dict:
+        stat = os.stat(self.graph_path)
+        return {"sha256": self.source_hash, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def _snapshot_is_fresh(self) -> bool:
+        """A snapshot is fresh if it was built from a Turtle file with the same hash."""
+        if not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            source = TripleStore.read_snapshot_header(self.snapshot_path)["source"]
+        except ValueError as e:
+            print(f"Ignoring snapshot: {e}")
+            return False
+        stat = os.stat(self.graph_path)
+        if source.get("size") == stat.st_size and source.get("mtime_ns") == stat.st_mtime_ns:
+            # Unchanged file metadata: skip re-hashing the source.
+            self._source_hash = source.get("sha256")
+            return self._source_hash is not None
+        return source.get("sha256") == self.source_hash
+
+    def save_snapshot(self, snapshot_path: str = None) -> str:
+        """
+        Writes the graph as a binary snapshot tagged with the source hash.
+
+        Returns:
+            str: The path of the written snapshot.
+        """
+        path = snapshot_path or self.snapshot_path
+        store = self.graph if isinstance(self.graph, TripleStore) else TripleStore.from_graph(self.graph)
+        store.save(path, source=self._source_info())
+        print(f"Graph snapshot saved to {path}")
+        return path
+
+    def get_graph(self):
+        """
+        Returns the loaded graph: an rdflib Graph, or for the compact and
+        snapshot backends a TripleStore, which supports the same membership
+        and pattern queries.
+        """
+        return self.graph
@@ -1,7 +1,30 @@
 """WorldMind Models - Core components for truth-constrained generation."""
 
-from worldmind.models.auditor import ConsistencyAuditor
-from worldmind.models.policy import AbstentionPolicy
+from typing import TYPE_CHECKING
+import importlib
 
-__all__ = ["ConsistencyAuditor", "AbstentionPolicy"]
+_LAZY_IMPORTS = {
+    "ConsistencyAuditor": "worldmind.models.auditor",
+    "AbstentionPolicy": "worldmind.models.policy",
+    "IncrementalValidator": "worldmind.models.incremental",
+}
 
+__all__ = ["ConsistencyAuditor", "AbstentionPolicy", "IncrementalValidator"]
+
+if TYPE_CHECKING:
+    from worldmind.models.auditor import ConsistencyAuditor
+    from worldmind.models.policy import AbstentionPolicy
+    from worldmind.models.incremental import IncrementalValidator
+
+
+def __getattr__(name):
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
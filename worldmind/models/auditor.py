@@ -1,5 +1,31 @@
-from rdflib import Graph, URIRef, Namespace
-from pyshacl import validate
+import re
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+from rdflib import Graph, Literal, URIRef
+from rdflib.term import Identifier
+
+from worldmind.models.constraints import ClaimConstraint, _parse_number, compile_shapes
+from worldmind.models.incremental import IncrementalValidator
+from worldmind.triple_store import TripleStore
+
+_IRI_RE = re.compile(r"^[A-Za-z][A-Za-z0-9+.-]*:\S*$")
+
+
+def _object_term(value) -> Identifier:
+    """
+    rdflib term for a claim object: rdflib terms are used as given, IRI
+    strings become URIRefs, numeric strings xsd:double literals and any other
+    string a plain literal.
+    """
+    if isinstance(value, Identifier):
+        return value
+    number = _parse_number(value)
+    if number is not None:
+        return Literal(number)
+    if _IRI_RE.match(value):
+        return URIRef(value)
+    return Literal(value)
 
 
 class ConsistencyAuditor:
@@ -16,6 +42,9 @@ class ConsistencyAuditor:
             shacl_graph_path (str): Path to the Turtle file with SHACL shapes.
         """
         self.shacl_graph = Graph().parse(shacl_graph_path, format="turtle")
+        self._compiled_graph = None
+        self._constraints = {}
+        self._validator = None
         print("Consistency Auditor initialized with SHACL constraints.")
 
     def audit_claim(self, base_graph: Graph, claim: dict) -> bool:
@@ -40,6 +69,153 @@ class ConsistencyAuditor:
         # Check if claim exists in the base graph (direct entailment)
         triple = (s, p, o)
         is_entailed = triple in base_graph
-        
+
         return is_entailed
 
+    def audit_claims(
+        self,
+        base_graph: Graph,
+        claims: Optional[Iterable[dict]] = None,
+        subjects: Optional[Sequence[Optional[str]]] = None,
+        predicates: Optional[Sequence[Optional[str]]] = None,
+        objects: Optional[Sequence[Optional[str]]] = None,
+    ) -> np.ndarray:
+        """
+        Audits a batch of claims against the base knowledge graph.
+
+        Claims are given either as an iterable of claim dicts (as accepted by
+        audit_claim) or as parallel sequences of subject/predicate/object IRIs.
+        Missing claims or claim parts are never licensed.
+
+        With a TripleStore graph, every distinct IRI is resolved against the
+        term dictionary once and membership is tested in one vectorized pass;
+        rdflib graphs fall back to per-claim lookups.
+
+        Args:
+            base_graph (Graph): The ground-truth knowledge graph.
+            claims (Iterable[dict]): Claim dicts with 'subject', 'predicate', 'object'.
+            subjects, predicates, objects (Sequence[str]): Parallel IRI sequences,
+                used instead of `claims`.
+
+        Returns:
+            np.ndarray: Boolean array, True where the claim is licensed.
+        """
+        subjects, predicates, objects = self._claim_columns(claims, subjects, predicates, objects)
+
+        if isinstance(base_graph, TripleStore):
+            def keys(iris):
+                return [f"<{iri}>" if iri else None for iri in iris]
+
+            return base_graph.contains_keys(keys(subjects), keys(predicates), keys(objects))
+
+        return np.fromiter(
+            (
+                bool(s and p and o) and (URIRef(s), URIRef(p), URIRef(o)) in base_graph
+                for s, p, o in zip(subjects, predicates, objects)
+            ),
+            dtype=bool,
+        )
+
+    @staticmethod
+    def _claim_columns(claims, subjects, predicates, objects):
+        """Normalizes claim dicts or parallel sequences into three IRI lists."""
+        if claims is not None:
+            subjects, predicates, objects = [], [], []
+            for claim in claims:
+                claim = claim or {}
+                subjects.append(claim.get("subject") or None)
+                predicates.append(claim.get("predicate") or None)
+                objects.append(claim.get("object") or None)
+        elif subjects is None or predicates is None or objects is None:
+            raise ValueError("Provide either claims or subjects, predicates and objects")
+        return list(subjects), list(predicates), list(objects)
+
+    def compile_constraints(self, base_graph: Graph) -> List[ClaimConstraint]:
+        """
+        Compiles the SHACL shapes against the base graph into per-claim checkers.
+
+        Compilation happens once per base graph and is reused by
+        find_violations and check_claims. Shapes without a per-claim
+        compilation are reported; they are still enforced at build time.
+        """
+        if self._compiled_graph is not base_graph:
+            constraints, uncompiled = compile_shapes(self.shacl_graph, base_graph)
+            self._constraints = {}
+            for constraint in constraints:
+                self._constraints.setdefault(constraint.predicate, []).append(constraint)
+            self._compiled_graph = base_graph
+            print(f"Compiled {len(constraints)} claim constraints from SHACL shapes.")
+            if uncompiled:
+                print(f"Shapes checked at build time only: {', '.join(uncompiled)}")
+        return [c for group in self._constraints.values() for c in group]
+
+    def find_violations(self, base_graph: Graph, claim: dict) -> List[str]:
+        """
+        Checks a hypothetical claim against the compiled SHACL constraints.
+
+        Args:
+            base_graph (Graph): The ground-truth knowledge graph.
+            claim (dict): A dictionary with 'subject', 'predicate', 'object'.
+
+        Returns:
+            List[str]: Messages of the shapes the claim would violate if it
+            were added to the graph (empty if it is consistent).
+        """
+        self.compile_constraints(base_graph)
+        return [
+            c.message
+            for c in self._constraints.get(claim["predicate"], [])
+            if c.violates(claim["subject"], claim["object"])
+        ]
+
+    def check_claims(
+        self,
+        base_graph: Graph,
+        claims: Optional[Iterable[dict]] = None,
+        subjects: Optional[Sequence[Optional[str]]] = None,
+        predicates: Optional[Sequence[Optional[str]]] = None,
+        objects: Optional[Sequence[Optional[str]]] = None,
+    ) -> np.ndarray:
+        """
+        Batch form of find_violations, taking the same inputs as audit_claims.
+
+        Returns:
+            np.ndarray: Boolean array, True where the claim violates a constraint.
+        """
+        self.compile_constraints(base_graph)
+        subjects, predicates, objects = self._claim_columns(claims, subjects, predicates, objects)
+        violated = np.zeros(len(subjects), dtype=bool)
+        predicates = np.array(predicates, dtype=object)
+        for predicate, constraints in self._constraints.items():
+            rows = np.flatnonzero(predicates == predicate)
+            if not len(rows):
+                continue
+            s = [subjects[i] for i in rows]
+            o = [objects[i] for i in rows]
+            for constraint in constraints:
+                violated[rows] |= constraint.violates_many(s, o)
+        return violated
+
+    def validate_claim(self, base_graph: Graph, claim: dict) -> bool:
+        """
+        Checks a hypothetical claim by running the full SHACL shapes on the
+        part of the graph the claim can affect (see IncrementalValidator).
+
+        Unlike find_violations this also covers shapes that have no compiled
+        per-claim checker, at the cost of a pyshacl run per claim.
+
+        Args:
+            base_graph (Graph): The ground-truth knowledge graph.
+            claim (dict): A dictionary with 'subject', 'predicate', 'object'.
+                The subject and predicate are IRIs. The object is either an
+                rdflib term or a string: an IRI, a number (read as an
+                xsd:double literal, as in find_violations) or other literal text.
+
+        Returns:
+            bool: True if the graph would still conform with the claim added.
+        """
+        if self._validator is None:
+            self._validator = IncrementalValidator(self.shacl_graph)
+        triple = (URIRef(claim["subject"]), URIRef(claim["predicate"]), _object_term(claim["object"]))
+        conforms, _, _ = self._validator.validate(base_graph, [triple])
+        return conforms
@@ -0,0 +1,376 @@
+"""
+SHACL shapes compiled into per-claim constraint checkers.
+
+Running pyshacl over the whole data graph for every claim is far too slow to
+serve from. Instead, the shapes shipped with the experiments are compiled once
+against the data graph into small precomputed indexes (interval arrays, set
+indexes) that test a single hypothetical triple ``(s, p, o)`` in microseconds.
+
+Shapes are recognised either structurally (``sh:property`` type checks, simple
+numeric ``FILTER`` constraints) or by their local name for the SPARQL shapes
+used in the POCs. Shapes that cannot be compiled are reported and remain
+covered by build-time validation only.
+"""
+
+import re
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from rdflib import Graph, Namespace, URIRef
+from rdflib.namespace import RDF
+
+SH = Namespace("http://www.w3.org/ns/shacl#")
+DBR = Namespace("http://dbpedia.org/resource/")
+
+_DATE_RE = re.compile(r"^(-?\d{4,})(?:-(\d{2})(?:-(\d{2}))?)?")
+
+
+def _parse_day(lexical: str) -> Optional[int]:
+    """Parses an xsd:date / xsd:gYear lexical form into days since the epoch."""
+    match = _DATE_RE.match(lexical.strip())
+    if not match:
+        return None
+    year, month, day = match.group(1), match.group(2) or "01", match.group(3) or "01"
+    try:
+        return int(np.datetime64(f"{year}-{month}-{day}", "D").astype(np.int64))
+    except ValueError:
+        return None
+
+
+def _parse_number(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ClaimConstraint:
+    """A compiled constraint over hypothetical triples with a fixed predicate."""
+
+    def __init__(self, shape: str, message: str, predicate: str):
+        self.shape = shape
+        self.message = message
+        self.predicate = predicate
+
+    def violates(self, s: str, o: str) -> bool:
+        """True if adding ``(s, self.predicate, o)`` would violate the shape."""
+        raise NotImplementedError
+
+    def violates_many(self, subjects: Sequence[str], objects: Sequence[str]) -> np.ndarray:
+        """Vector form of :meth:`violates`."""
+        return np.fromiter(
+            (self.violates(s, o) for s, o in zip(subjects, objects)), dtype=bool, count=len(subjects)
+        )
+
+
+class IntervalIndex:
+    """Per-entity [start, end] day intervals, stored as parallel int64 arrays."""
+
+    def __init__(self, intervals: Dict[str, Tuple[int, int]]):
+        self.rows = {entity: i for i, entity in enumerate(intervals)}
+        self.start = np.fromiter((v[0] for v in intervals.values()), dtype=np.int64, count=len(intervals))
+        self.end = np.fromiter((v[1] for v in intervals.values()), dtype=np.int64, count=len(intervals))
+
+    @classmethod
+    def from_dates(cls, graph: Graph, date_predicate: URIRef) -> "IntervalIndex":
+        """Point intervals from ``(entity, date_predicate, date)`` triples."""
+        intervals = {}
+        for entity, _, date in graph.triples((None, date_predicate, None)):
+            day = _parse_day(str(date))
+            if day is not None:
+                intervals.setdefault(str(entity), (day, day))
+        return cls(intervals)
+
+    @classmethod
+    def from_extents(cls, graph: Graph, extent: URIRef, start: URIRef, end: URIRef) -> "IntervalIndex":
+        """Intervals from ``entity extent ?span . ?span start ?a ; end ?b`` paths."""
+        intervals = {}
+        for entity, _, span in graph.triples((None, extent, None)):
+            starts = [_parse_day(str(v)) for v in graph.objects(span, start)]
+            ends = [_parse_day(str(v)) for v in graph.objects(span, end)]
+            if starts and ends and starts[0] is not None and ends[0] is not None:
+                intervals.setdefault(str(entity), (starts[0], ends[0]))
+        return cls(intervals)
+
+    def lookup(self, entities: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns (found mask, start, end) arrays for a batch of entities."""
+        rows = np.fromiter((self.rows.get(e, -1) for e in entities), dtype=np.int64, count=len(entities))
+        found = rows >= 0
+        if not len(self.start):
+            return found, np.zeros(len(rows), dtype=np.int64), np.zeros(len(rows), dtype=np.int64)
+        rows[~found] = 0
+        return found, self.start[rows], self.end[rows]
+
+
+class TemporalOverlapConstraint(ClaimConstraint):
+    """
+    The subject's and object's time intervals must overlap. A point in time
+    (e.g. a battle date) is the degenerate interval [date, date].
+    """
+
+    def __init__(self, shape: str, message: str, predicate: str,
+                 subject_times: IntervalIndex, object_times: IntervalIndex):
+        super().__init__(shape, message, predicate)
+        self.subject_times = subject_times
+        self.object_times = object_times
+
+    def violates(self, s: str, o: str) -> bool:
+        i = self.subject_times.rows.get(s)
+        j = self.object_times.rows.get(o)
+        if i is None or j is None:
+            return False
+        return bool(
+            self.subject_times.start[i] > self.object_times.end[j]
+            or self.object_times.start[j] > self.subject_times.end[i]
+        )
+
+    def violates_many(self, subjects: Sequence[str], objects: Sequence[str]) -> np.ndarray:
+        s_found, s_start, s_end = self.subject_times.lookup(subjects)
+        o_found, o_start, o_end = self.object_times.lookup(objects)
+        return s_found & o_found & ((s_start > o_end) | (o_start > s_end))
+
+
+class SetAlignmentConstraint(ClaimConstraint):
+    """
+    Every value the object has for one property must be among the values the
+    subject has for another (e.g. a commander's nationality must be one of
+    the battle's combatants).
+    """
+
+    def __init__(self, shape: str, message: str, predicate: str,
+                 object_values: Dict[str, frozenset], subject_values: Dict[str, frozenset]):
+        super().__init__(shape, message, predicate)
+        self.object_values = object_values
+        self.subject_values = subject_values
+
+    @staticmethod
+    def index(graph: Graph, predicate: URIRef) -> Dict[str, frozenset]:
+        values: Dict[str, set] = {}
+        for s, _, o in graph.triples((None, predicate, None)):
+            values.setdefault(str(s), set()).add(str(o))
+        return {k: frozenset(v) for k, v in values.items()}
+
+    def violates(self, s: str, o: str) -> bool:
+        required = self.object_values.get(o)
+        if not required:
+            return False
+        return not required <= self.subject_values.get(s, frozenset())
+
+
+class MembershipConstraint(ClaimConstraint):
+    """
+    The claim's subject or object must belong to a precomputed set, optionally
+    only for claims whose object is in `applies_to`.
+    """
+
+    def __init__(self, shape: str, message: str, predicate: str, members: frozenset,
+                 position: str = "object", applies_to: Optional[frozenset] = None):
+        super().__init__(shape, message, predicate)
+        self.members = members
+        self.position = position
+        self.applies_to = applies_to
+
+    def violates(self, s: str, o: str) -> bool:
+        if self.applies_to is not None and o not in self.applies_to:
+            return False
+        node = o if self.position == "object" else s
+        return node not in self.members
+
+
+class NumericBoundConstraint(ClaimConstraint):
+    """
+    Numeric object values must not satisfy the shape's violation filter. With
+    `targets`, only claims about those subjects (the shape's focus nodes) are
+    checked.
+    """
+
+    _OPERATORS: Dict[str, Callable[[float, float], bool]] = {
+        "<": float.__lt__, "<=": float.__le__, ">": float.__gt__, ">=": float.__ge__,
+    }
+
+    def __init__(self, shape: str, message: str, predicate: str, operator: str, bound: float,
+                 targets: Optional[frozenset] = None):
+        super().__init__(shape, message, predicate)
+        self.operator = operator
+        self.bound = bound
+        self.targets = targets
+        self._test = self._OPERATORS[operator]
+
+    def violates(self, s: str, o: str) -> bool:
+        if self.targets is not None and s not in self.targets:
+            return False
+        value = _parse_number(o)
+        return value is not None and self._test(value, self.bound)
+
+
+class PairedBoundConstraint(ClaimConstraint):
+    """
+    A numeric value must stay strictly above (or below) another numeric
+    property of the same subject, e.g. source elevation above mouth elevation.
+    With `targets`, only claims about those subjects are checked.
+    """
+
+    def __init__(self, shape: str, message: str, predicate: str,
+                 others: Dict[str, float], must_exceed: bool, targets: Optional[frozenset] = None):
+        super().__init__(shape, message, predicate)
+        self.others = others
+        self.must_exceed = must_exceed
+        self.targets = targets
+
+    @staticmethod
+    def index(graph: Graph, predicate: URIRef) -> Dict[str, float]:
+        values = {}
+        for s, _, o in graph.triples((None, predicate, None)):
+            number = _parse_number(str(o))
+            if number is not None:
+                values.setdefault(str(s), number)
+        return values
+
+    def violates(self, s: str, o: str) -> bool:
+        if self.targets is not None and s not in self.targets:
+            return False
+        value = _parse_number(o)
+        other = self.others.get(s)
+        if value is None or other is None:
+            return False
+        return value <= other if self.must_exceed else value >= other
+
+
+# ----------------------------------------------------------------------
+# Shape compilers
+# ----------------------------------------------------------------------
+
+def _split(iri: str) -> Tuple[str, str]:
+    for sep in ("#", "/"):
+        if sep in iri:
+            ns, _, local = iri.rpartition(sep)
+            return ns + sep, local
+    return "", iri
+
+
+def _commander_temporal(ns: Namespace, shape, message, data: Graph, targets) -> List[ClaimConstraint]:
+    return [TemporalOverlapConstraint(
+        shape, message, str(ns.hasCommander),
+        IntervalIndex.from_dates(data, ns.occurredOn),
+        IntervalIndex.from_extents(data, ns.hasTemporalExtent, ns.start, ns.end),
+    )]
+
+
+def _influenced_by_temporal(ns: Namespace, shape, message, data: Graph, targets) -> List[ClaimConstraint]:
+    lifespans = IntervalIndex.from_extents(data, ns.hasTemporalExtent, ns.start, ns.end)
+    return [TemporalOverlapConstraint(shape, message, str(ns.influencedBy), lifespans, lifespans)]
+
+
+def _commander_nationality(ns: Namespace, shape, message, data: Graph, targets) -> List[ClaimConstraint]:
+    return [SetAlignmentConstraint(
+        shape, message, str(ns.hasCommander),
+        SetAlignmentConstraint.index(data, ns.hasNationality),
+        SetAlignmentConstraint.index(data, ns.hasCombatant),
+    )]
+
+
+def _tributary_type(ns: Namespace, shape, message, data: Graph, targets) -> List[ClaimConstraint]:
+    rivers = frozenset(str(s) for s in data.subjects(RDF.type, ns.River))
+    return [MembershipConstraint(shape, message, str(ns.hasTributary), rivers)]
+
+
+def _flow_downhill(ns: Namespace, shape, message, data: Graph, targets) -> List[ClaimConstraint]:
+    return [
+        PairedBoundConstraint(shape, message, str(ns.sourceElevation),
+                              PairedBoundConstraint.index(data, ns.mouthElevation), must_exceed=True,
+                              targets=targets),
+        PairedBoundConstraint(shape, message, str(ns.mouthElevation),
+                              PairedBoundConstraint.index(data, ns.sourceElevation), must_exceed=False,
+                              targets=targets),
+    ]
+
+
+def _geographic_consistency(ns: Namespace, shape, message, data: Graph, targets) -> List[ClaimConstraint]:
+    in_us = frozenset(str(s) for s in data.subjects(ns.inCountry, DBR.United_States))
+    states = frozenset(str(s) for s in data.subjects(RDF.type, ns.State))
+    return [MembershipConstraint(shape, message, str(ns.traverses), in_us,
+                                 position="subject", applies_to=states)]
+
+
+# SPARQL-based shapes shipped with the POCs, keyed by local name. Each compiler
+# gets the shape's own namespace, so the same shape works across POC ontologies,
+# and the shape's sh:targetClass instances (see _target_nodes).
+SPARQL_COMPILERS = {
+    "CommanderTemporalOverlapShape": _commander_temporal,
+    "CommanderNationalityAlignmentShape": _commander_nationality,
+    "InfluencedByTemporalOverlapShape": _influenced_by_temporal,
+    "TributaryTypeConstraint": _tributary_type,
+    "RiverFlowDownhillConstraint": _flow_downhill,
+    "GeographicConsistencyConstraint": _geographic_consistency,
+}
+
+# `$this :pred ?x . FILTER (?x <op> <number>)`
+_NUMERIC_FILTER_RE = re.compile(
+    r"\$this\s+:(\w+)\s+\?(\w+)\s*\.\s*FILTER\s*\(\s*\?(\w+)\s*(<=|>=|<|>)\s*(-?\d+(?:\.\d+)?)\s*\)\s*\}\s*$",
+    re.DOTALL,
+)
+
+
+def _compile_numeric_filter(ns: Namespace, shape, message, select: str, targets) -> List[ClaimConstraint]:
+    match = _NUMERIC_FILTER_RE.search(select.strip())
+    if not match or match.group(2) != match.group(3):
+        return []
+    return [NumericBoundConstraint(shape, message, str(ns[match.group(1)]),
+                                   match.group(4), float(match.group(5)), targets)]
+
+
+def _target_nodes(shacl: Graph, shape: URIRef, data: Graph) -> Optional[frozenset]:
+    """
+    Instances of the shape's sh:targetClass classes, or None if the shape has
+    no class target (its focus nodes then follow from the claim itself).
+    """
+    classes = list(shacl.objects(shape, SH.targetClass))
+    if not classes:
+        return None
+    return frozenset(str(s) for cls in classes for s in data.subjects(RDF.type, cls))
+
+
+def _compile_property_shapes(shacl: Graph, shape: URIRef, data: Graph) -> List[ClaimConstraint]:
+    """`sh:property [ sh:path rdf:type ; sh:hasValue C ]` on sh:targetObjectsOf/SubjectsOf."""
+    targets = [("object", p) for p in shacl.objects(shape, SH.targetObjectsOf)]
+    targets += [("subject", p) for p in shacl.objects(shape, SH.targetSubjectsOf)]
+    compiled = []
+    for prop in shacl.objects(shape, SH.property):
+        cls = shacl.value(prop, SH.hasValue)
+        if shacl.value(prop, SH.path) != RDF.type or cls is None:
+            continue
+        message = str(shacl.value(prop, SH.message) or "")
+        members = frozenset(str(s) for s in data.subjects(RDF.type, cls))
+        for position, predicate in targets:
+            compiled.append(MembershipConstraint(str(shape), message, str(predicate), members, position))
+    return compiled
+
+
+def compile_shapes(shacl: Graph, data: Graph) -> Tuple[List[ClaimConstraint], List[str]]:
+    """
+    Compiles the node shapes in `shacl` against the data graph.
+
+    Returns:
+        (constraints, uncompiled): the compiled checkers and the IRIs of shapes
+        that have no per-claim compilation.
+    """
+    constraints: List[ClaimConstraint] = []
+    uncompiled: List[str] = []
+    for shape in sorted(set(shacl.subjects(RDF.type, SH.NodeShape))):
+        ns_iri, local = _split(str(shape))
+        ns = Namespace(ns_iri)
+        compiled = _compile_property_shapes(shacl, shape, data)
+        sparqls = list(shacl.objects(shape, SH.sparql))
+        targets = _target_nodes(shacl, shape, data) if sparqls else None
+        for sparql in sparqls:
+            message = str(shacl.value(sparql, SH.message) or "")
+            if local in SPARQL_COMPILERS:
+                compiled += SPARQL_COMPILERS[local](ns, str(shape), message, data, targets)
+            else:
+                compiled += _compile_numeric_filter(ns, str(shape), message,
+                                                    str(shacl.value(sparql, SH.select) or ""), targets)
+        if compiled:
+            constraints.extend(compiled)
+        else:
+            uncompiled.append(str(shape))
+    return constraints, uncompiled
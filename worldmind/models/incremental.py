@@ -0,0 +1,310 @@
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple, Union
+
+from rdflib import Graph, Literal, URIRef, Variable
+from rdflib.namespace import RDF, RDFS, SH
+
+
+Triple = Tuple
+
+# Shape predicates that do not make a shape read beyond its focus node.
+_SHAPE_METADATA = {
+    RDF.type, RDFS.label, RDFS.comment, SH.targetNode, SH.targetClass, SH.targetSubjectsOf,
+    SH.targetObjectsOf, SH.message, SH.severity, SH.deactivated, SH.name, SH.description,
+}
+# Property shape components that only inspect the values at the end of sh:path.
+_VALUE_COMPONENTS = _SHAPE_METADATA | {
+    SH.path, SH.minCount, SH.maxCount, SH.datatype, SH.nodeKind, SH.hasValue, SH["in"],
+    SH.minInclusive, SH.maxInclusive, SH.minExclusive, SH.maxExclusive,
+    SH.minLength, SH.maxLength, SH.pattern, SH.flags, SH.languageIn, SH.uniqueLang,
+}
+
+
+class IncrementalValidator:
+    """
+    Validates a small delta of triples against SHACL shapes without
+    re-validating the whole graph.
+
+    The base graph is assumed to already conform to the shapes, so only
+    focus nodes whose validation result can change are checked. A shape that
+    follows at most d edges from its focus node can only change its result
+    for nodes within d - 1 inbound hops of a delta subject; the delta objects
+    are checked too, as they may have become targets. Candidates are matched
+    against the shape targets (sh:targetNode, sh:targetClass,
+    sh:targetSubjectsOf, sh:targetObjectsOf) and validated with pyshacl on a
+    local subgraph cut around them.
+
+    The depth d of each shape is derived from its SPARQL triple patterns or
+    its sh:path; shapes whose reach cannot be derived that way (inverse or
+    complex paths, nested shapes) are assumed to follow at most `radius`
+    edges in either direction from the delta.
+    """
+
+    def __init__(self, shacl_graph: Union[str, Graph], radius: int = 3):
+        """
+        Args:
+            shacl_graph (str | Graph): SHACL shapes graph, or path to a Turtle file with it.
+            radius (int): Assumed depth of shapes whose reach cannot be derived.
+        """
+        if not isinstance(shacl_graph, Graph):
+            shacl_graph = Graph().parse(shacl_graph, format="turtle")
+        self.shacl_graph = shacl_graph
+        self.radius = radius
+        self.targets = self._collect_targets(shacl_graph)
+        self.depths = {shape: self._shape_depth(shacl_graph, shape) for shape in self.targets}
+        # With an underivable shape, delta objects are expanded like subjects.
+        self._expand_objects = any(depth is None for depth in self.depths.values())
+        self.depths = {shape: self.radius if d is None else d for shape, d in self.depths.items()}
+
+    @staticmethod
+    def _collect_targets(shacl: Graph) -> Dict[URIRef, Dict[str, Set]]:
+        """Maps each targeted shape to its target nodes, classes and predicates."""
+        targets = {}
+        for key, predicate in (
+            ("nodes", SH.targetNode),
+            ("classes", SH.targetClass),
+            ("subjects_of", SH.targetSubjectsOf),
+            ("objects_of", SH.targetObjectsOf),
+        ):
+            for shape, value in shacl.subject_objects(predicate):
+                entry = targets.setdefault(
+                    shape, {"nodes": set(), "classes": set(), "subjects_of": set(), "objects_of": set()}
+                )
+                entry[key].add(value)
+        return targets
+
+    @classmethod
+    def _shape_depth(cls, shacl: Graph, shape) -> Optional[int]:
+        """Longest path, in edges, the shape reads from its focus node (None if unknown)."""
+        depth = 0
+        for predicate, value in shacl.predicate_objects(shape):
+            if predicate == SH.sparql:
+                d = cls._sparql_depth(shacl, value)
+            elif predicate == SH.property:
+                d = cls._property_depth(shacl, value)
+            elif predicate == SH.path:
+                d = cls._property_depth(shacl, shape)
+            elif predicate in _SHAPE_METADATA:
+                continue
+            else:
+                d = None
+            if d is None:
+                return None
+            depth = max(depth, d)
+        return depth
+
+    @staticmethod
+    def _property_depth(shacl: Graph, prop) -> Optional[int]:
+        if not isinstance(shacl.value(prop, SH.path), URIRef):
+            return None
+        if any(p not in _VALUE_COMPONENTS for p in shacl.predicates(prop)):
+            return None
+        return 1
+
+    @staticmethod
+    def _sparql_depth(shacl: Graph, constraint) -> Optional[int]:
+        """
+        Depth of a SPARQL constraint: the longest subject -> object chain of
+        triple patterns starting at $this. Patterns that do not hang off
+        $this (inverse edges, constant subjects, property paths) make it None.
+        """
+        from rdflib.plugins.sparql import prepareQuery
+        from rdflib.plugins.sparql.parserutils import CompValue
+
+        query = shacl.value(constraint, SH.select)
+        if query is None:
+            return None
+        try:
+            algebra = prepareQuery(str(query), initNs=dict(shacl.namespaces())).algebra
+        except Exception:
+            return None
+
+        patterns = []
+        stack = [algebra]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, CompValue):
+                triples = dict.get(node, "triples") or []
+                if node.name == "BGP":
+                    patterns.extend(triples)
+                elif node.name == "TriplesBlock":
+                    # Untranslated groups (e.g. inside FILTER NOT EXISTS) hold flat term lists.
+                    for flat in triples:
+                        patterns.extend(zip(flat[0::3], flat[1::3], flat[2::3]))
+                stack.extend(node.values())
+            elif isinstance(node, (list, tuple)):
+                stack.extend(node)
+
+        distance = {Variable("this"): 0}
+        for _ in range(len(patterns)):
+            for s, p, o in patterns:
+                if s in distance and distance[s] + 1 < distance.get(o, len(patterns) + 1):
+                    distance[o] = distance[s] + 1
+        if any(s not in distance or not isinstance(p, (URIRef, Variable)) for s, p, _ in patterns):
+            return None
+        return max((distance[s] + 1 for s, _, _ in patterns), default=0)
+
+    # ------------------------------------------------------------------
+    # Overlay of base graph and delta
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _triples(base_graph, delta: Graph, pattern) -> Iterator[Triple]:
+        yield from base_graph.triples(pattern)
+        yield from delta.triples(pattern)
+
+    def _candidates(self, base_graph, delta: Graph) -> Dict:
+        """
+        Maps every node whose result can change to its inbound distance from
+        the delta: delta subjects (and objects) at 0, then nodes that reach
+        them within max(depth) - 1 inbound hops.
+        """
+        distance = {}
+        for s, _, o in delta:
+            distance[s] = 0
+            if self._expand_objects and not isinstance(o, Literal):
+                distance[o] = 0
+        frontier = set(distance)
+        for hops in range(1, max(self.depths.values(), default=0)):
+            nxt = set()
+            for node in frontier:
+                for s, p, _ in self._triples(base_graph, delta, (None, None, node)):
+                    # Class nodes are reached by rdf:type from every instance;
+                    # shapes read type facts from the instance, not the class.
+                    if p == RDF.type or s in distance:
+                        continue
+                    distance[s] = hops
+                    nxt.add(s)
+            frontier = nxt
+            if not frontier:
+                break
+        # Objects gain no outbound triples, but may have become targets.
+        for _, _, o in delta:
+            if not isinstance(o, Literal):
+                distance.setdefault(o, 0)
+        return distance
+
+    def _is_instance(self, base_graph, delta: Graph, node, classes: Set) -> bool:
+        types = set(self._triples_objects(base_graph, delta, node, RDF.type))
+        frontier = set(types)
+        while frontier:
+            if frontier & classes:
+                return True
+            nxt = set()
+            for cls in frontier:
+                nxt.update(self._triples_objects(base_graph, delta, cls, RDFS.subClassOf))
+            frontier = nxt - types
+            types |= nxt
+        return False
+
+    def _triples_objects(self, base_graph, delta: Graph, subject, predicate) -> Iterator:
+        for _, _, o in self._triples(base_graph, delta, (subject, predicate, None)):
+            yield o
+
+    def _has_edge(self, base_graph, delta: Graph, pattern) -> bool:
+        return next(self._triples(base_graph, delta, pattern), None) is not None
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def affected_shapes(self, base_graph, delta: Iterable[Triple]) -> Dict[URIRef, Set]:
+        """
+        Works out which shapes the delta can affect and for which focus nodes.
+
+        Args:
+            base_graph (Graph | TripleStore): Graph known to conform to the shapes.
+            delta (Iterable[Triple]): Triples hypothetically added to it.
+
+        Returns:
+            Dict[URIRef, Set]: Shape -> focus nodes to re-validate.
+        """
+        delta = self._as_graph(delta)
+        affected = {}
+        for node, hops in self._candidates(base_graph, delta).items():
+            for shape, target in self.targets.items():
+                if hops >= max(self.depths[shape], 1):
+                    continue
+                if (
+                    node in target["nodes"]
+                    or any(self._has_edge(base_graph, delta, (node, p, None)) for p in target["subjects_of"])
+                    or any(self._has_edge(base_graph, delta, (None, p, node)) for p in target["objects_of"])
+                    or (target["classes"] and self._is_instance(base_graph, delta, node, target["classes"]))
+                ):
+                    affected.setdefault(shape, set()).add(node)
+        return affected
+
+    def local_graph(self, base_graph, delta: Iterable[Triple], focus_nodes: Iterable, depth: int = None) -> Graph:
+        """
+        Cuts the subgraph pyshacl needs to validate the focus nodes: every
+        triple within `depth` (default: the deepest shape) outbound hops of
+        them, and the inbound edges that make them targets of
+        sh:targetObjectsOf shapes.
+        """
+        delta = self._as_graph(delta)
+        if depth is None:
+            depth = max(self.depths.values(), default=0)
+        local = Graph()
+        frontier = set(focus_nodes)
+        seen = set(frontier)
+        for _ in range(depth):
+            nxt = set()
+            for node in frontier:
+                for triple in self._triples(base_graph, delta, (node, None, None)):
+                    local.add(triple)
+                    o = triple[2]
+                    if not isinstance(o, Literal) and o not in seen:
+                        nxt.add(o)
+            seen |= nxt
+            frontier = nxt
+            if not frontier:
+                break
+
+        objects_of = set()
+        for target in self.targets.values():
+            objects_of |= target["objects_of"]
+        for node in focus_nodes:
+            for p in objects_of:
+                for triple in self._triples(base_graph, delta, (None, p, node)):
+                    local.add(triple)
+        return local
+
+    def validate(self, base_graph, delta: Iterable[Triple]) -> Tuple[bool, Graph, str]:
+        """
+        Validates the base graph with the delta added, checking only the
+        focus nodes the delta can affect.
+
+        Args:
+            base_graph (Graph | TripleStore): Graph known to conform to the shapes.
+            delta (Iterable[Triple]): Triples hypothetically added to it.
+
+        Returns:
+            Tuple[bool, Graph, str]: (conforms, results graph, results text),
+            as returned by pyshacl.validate.
+        """
+        delta = self._as_graph(delta)
+        affected = self.affected_shapes(base_graph, delta)
+        if not affected:
+            return True, Graph(), "Validation Report\nConforms: True\n"
+
+        # pyshacl is slow to import; load it only once validation is needed.
+        from pyshacl import validate
+
+        focus_nodes = set().union(*affected.values())
+        depth = max(self.depths[shape] for shape in affected)
+        local = self.local_graph(base_graph, delta, focus_nodes, depth)
+        return validate(
+            local,
+            shacl_graph=self.shacl_graph,
+            focus_nodes=list(focus_nodes),
+            use_shapes=list(affected),
+            inplace=True,
+        )
+
+    @staticmethod
+    def _as_graph(delta: Iterable[Triple]) -> Graph:
+        if isinstance(delta, Graph):
+            return delta
+        graph = Graph()
+        for triple in delta:
+            graph.add(triple)
+        return graph
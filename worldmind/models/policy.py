@@ -1,9 +1,32 @@
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
 class AbstentionPolicy:
     """
     A simple policy that maps the auditor's boolean license
     to a final decision: 'answer' or 'abstain'.
+
+    The batch methods combine several signals per claim: the license, a
+    constraint-violation flag, a retrieval similarity and an entity-link
+    confidence. Similarity and link confidence must reach their thresholds
+    for a licensed claim to be answered.
     """
 
+    DECISIONS = ("ABSTAIN", "ANSWER")
+    LABELS = ("UNKNOWN", "NO", "YES")
+
+    def __init__(self, min_similarity: float = 0.0, min_link_confidence: float = 0.0):
+        """
+        Args:
+            min_similarity (float): Lowest retrieval similarity to answer on.
+            min_link_confidence (float): Lowest entity-link confidence to answer on.
+        """
+        self.min_similarity = min_similarity
+        self.min_link_confidence = min_link_confidence
+
     def decide(self, is_licensed: bool) -> str:
         """
         Makes a decision based on the audit result.
@@ -19,3 +42,72 @@ class AbstentionPolicy:
         else:
             return "ABSTAIN"
 
+    def label_codes(
+        self,
+        licensed,
+        violated=None,
+        similarity=None,
+        link_confidence=None,
+        min_similarity: Optional[float] = None,
+        min_link_confidence: Optional[float] = None,
+    ) -> "np.ndarray":
+        """
+        Computes YES/NO/UNKNOWN as integer codes indexing LABELS.
+
+        A claim that violates a constraint is NO; a licensed claim whose
+        similarity and link confidence reach the thresholds is YES; anything
+        else is UNKNOWN. Omitted signals always pass. Thresholds default to
+        the policy's own and broadcast against the signals, so an array of
+        shape (k, 1) evaluates k thresholds at once.
+        """
+        # numpy is imported on first use so that `decide` stays import-light.
+        import numpy as np
+
+        min_similarity = self.min_similarity if min_similarity is None else min_similarity
+        min_link_confidence = (
+            self.min_link_confidence if min_link_confidence is None else min_link_confidence
+        )
+
+        supported = np.asarray(licensed, dtype=bool)
+        if similarity is not None:
+            supported = supported & (np.asarray(similarity) >= np.asarray(min_similarity))
+        if link_confidence is not None:
+            supported = supported & (np.asarray(link_confidence) >= np.asarray(min_link_confidence))
+
+        codes = supported.astype(np.int8) * 2
+        if violated is not None:
+            codes = np.where(np.asarray(violated, dtype=bool), np.int8(1), codes)
+        return codes
+
+    def label_batch(self, licensed, violated=None, similarity=None, link_confidence=None, **thresholds) -> "np.ndarray":
+        """
+        Labels a batch of claims with the epistemic harness labels.
+
+        Args:
+            licensed (array-like of bool): Results from ConsistencyAuditor.audit_claims.
+            violated (array-like of bool): Results from ConsistencyAuditor.check_claims.
+            similarity (array-like of float): Retrieval similarity per claim.
+            link_confidence (array-like of float): Entity-link confidence per claim.
+            **thresholds: min_similarity / min_link_confidence overrides.
+
+        Returns:
+            np.ndarray: Array of 'YES', 'NO' or 'UNKNOWN'.
+        """
+        import numpy as np
+
+        return np.array(self.LABELS)[self.label_codes(licensed, violated, similarity, link_confidence, **thresholds)]
+
+    def decide_batch(self, licensed, violated=None, similarity=None, link_confidence=None, **thresholds) -> "np.ndarray":
+        """
+        Batch form of decide: only claims labelled YES are answered.
+
+        Takes the same arguments as label_batch; with only `licensed` given
+        it agrees with decide on every element.
+
+        Returns:
+            np.ndarray: Array of 'ANSWER' or 'ABSTAIN'.
+        """
+        import numpy as np
+
+        codes = self.label_codes(licensed, violated, similarity, link_confidence, **thresholds)
+        return np.array(self.DECISIONS)[(codes == 2).astype(np.intp)]
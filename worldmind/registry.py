@@ -0,0 +1,154 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+from rdflib import Graph
+
+from worldmind.graph_store import GraphStore
+from worldmind.models.auditor import ConsistencyAuditor
+from worldmind.triple_store import TermDictionary, TripleStore, term_key
+
+
+class GraphDomain:
+    """One named graph in a GraphRegistry, with its constraints and namespaces."""
+
+    def __init__(self, name: str, graph_path: str, shacl_path: str, namespaces: List[str]):
+        self.name = name
+        self.graph_path = graph_path
+        self.shacl_path = shacl_path
+        self.namespaces = namespaces
+        self.graph: Optional[TripleStore] = None
+        self.auditor: Optional[ConsistencyAuditor] = None
+
+
+class GraphRegistry:
+    """
+    Hosts several named knowledge graphs in one process.
+
+    Claims are routed to a graph by the namespace of their predicate (longest
+    matching prefix wins). All graphs are encoded against one shared term
+    dictionary, so resources that appear in several domains (e.g. dbr:
+    countries and states) are stored once.
+    """
+
+    def __init__(self):
+        self.domains: Dict[str, GraphDomain] = {}
+        self.terms: Optional[TermDictionary] = None
+        self._routes = []
+
+    def register(
+        self,
+        name: str,
+        graph_path: str,
+        shacl_path: str,
+        namespace: Optional[Union[str, Sequence[str]]] = None,
+    ) -> GraphDomain:
+        """
+        Adds a domain; call load() afterwards to (re)build the graphs.
+
+        Args:
+            name (str): Domain name, e.g. 'battles'.
+            graph_path (str): Turtle file with the domain's knowledge graph.
+            shacl_path (str): Turtle file with the domain's SHACL constraints.
+            namespace (str | Sequence[str]): Predicate namespace(s) routed to this
+                domain. Defaults to the default (':') prefix of the SHACL file.
+        """
+        if name in self.domains:
+            raise ValueError(f"Graph '{name}' is already registered")
+        if namespace is None:
+            namespaces = [str(ns) for prefix, ns in Graph().parse(shacl_path, format="turtle").namespaces() if prefix == ""]
+            if not namespaces:
+                raise ValueError(f"No default namespace in {shacl_path}; pass namespace explicitly")
+        elif isinstance(namespace, str):
+            namespaces = [namespace]
+        else:
+            namespaces = list(namespace)
+        for ns in namespaces:
+            owner = self._owner(ns)
+            if owner is not None:
+                raise ValueError(f"Namespace {ns} is already routed to '{owner}'")
+        domain = GraphDomain(name, graph_path, shacl_path, namespaces)
+        self.domains[name] = domain
+        return domain
+
+    def _owner(self, namespace: str) -> Optional[str]:
+        for domain in self.domains.values():
+            if namespace in domain.namespaces:
+                return domain.name
+        return None
+
+    def load(self) -> "GraphRegistry":
+        """Parses every registered graph and encodes them with one shared dictionary."""
+        encoded = {}
+        keys = {}
+        for domain in self.domains.values():
+            graph = GraphStore(domain.graph_path).get_graph()
+            triples = [(term_key(s), term_key(p), term_key(o)) for s, p, o in graph]
+            for triple in triples:
+                for key in triple:
+                    keys.setdefault(key, None)
+            encoded[domain.name] = triples
+
+        self.terms = TermDictionary.from_keys(list(keys))
+        total = sum(len(triples) for triples in encoded.values())
+        print(f"Shared term dictionary: {len(self.terms)} terms for {total} triples in {len(encoded)} graphs.")
+
+        for domain in self.domains.values():
+            domain.graph = TripleStore.from_keys(encoded.pop(domain.name), terms=self.terms)
+            domain.auditor = ConsistencyAuditor(domain.shacl_path)
+            domain.auditor.compile_constraints(domain.graph)
+        self._routes = sorted(
+            ((ns, domain.name) for domain in self.domains.values() for ns in domain.namespaces),
+            key=lambda route: len(route[0]),
+            reverse=True,
+        )
+        return self
+
+    def route(self, predicate: Optional[str]) -> Optional[str]:
+        """Name of the domain whose namespace is the longest prefix of the predicate."""
+        if predicate:
+            for namespace, name in self._routes:
+                if predicate.startswith(namespace):
+                    return name
+        return None
+
+    def get_graph(self, name: str) -> TripleStore:
+        return self.domains[name].graph
+
+    def get_auditor(self, name: str) -> ConsistencyAuditor:
+        return self.domains[name].auditor
+
+    def _routed(self, claims: Iterable[dict]):
+        """Groups claim row numbers by the domain their predicate routes to."""
+        claims = [claim or {} for claim in claims]
+        groups: Dict[str, List[int]] = {}
+        for row, claim in enumerate(claims):
+            name = self.route(claim.get("predicate"))
+            if name is not None:
+                groups.setdefault(name, []).append(row)
+        return claims, groups
+
+    def audit_claim(self, claim: dict) -> bool:
+        """Audits a claim against the graph its predicate routes to; unrouted claims are never licensed."""
+        name = self.route(claim.get("predicate"))
+        if name is None:
+            return False
+        domain = self.domains[name]
+        return domain.auditor.audit_claim(domain.graph, claim)
+
+    def audit_claims(self, claims: Iterable[dict]) -> np.ndarray:
+        """Batch form of audit_claim: one vectorized audit per domain."""
+        claims, groups = self._routed(claims)
+        licensed = np.zeros(len(claims), dtype=bool)
+        for name, rows in groups.items():
+            domain = self.domains[name]
+            licensed[rows] = domain.auditor.audit_claims(domain.graph, [claims[i] for i in rows])
+        return licensed
+
+    def check_claims(self, claims: Iterable[dict]) -> np.ndarray:
+        """Flags claims that violate the compiled constraints of their domain."""
+        claims, groups = self._routed(claims)
+        violated = np.zeros(len(claims), dtype=bool)
+        for name, rows in groups.items():
+            domain = self.domains[name]
+            violated[rows] = domain.auditor.check_claims(domain.graph, [claims[i] for i in rows])
+        return violated
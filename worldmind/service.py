@@ -0,0 +1,323 @@
+"""
+Licensing-oracle HTTP service.
+
+Keeps a GraphStore, ConsistencyAuditor and AbstentionPolicy warm in one
+long-running process and serves licensing decisions as JSON:
+
+    POST /audit        {"subject": ..., "predicate": ..., "object": ...}
+    POST /audit_batch  {"claims": [{...}, ...]}
+    GET  /metrics      per-endpoint latency histograms and batch sizes
+    GET  /health
+
+Requests that arrive concurrently are coalesced into a single batch audit.
+
+Usage:
+    python -m worldmind.service --graph data/knowledge_graph.ttl \\
+        --shacl ontology/worldmind_constraints.shacl.ttl --port 8765
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+from worldmind.graph_store import GraphStore
+from worldmind.models.auditor import ConsistencyAuditor
+from worldmind.models.policy import AbstentionPolicy
+
+
+class LatencyHistogram:
+    """
+    Thread-safe latency histogram with power-of-two buckets: bucket i counts
+    observations below 2**i microseconds (and at least 2**(i-1)).
+    """
+
+    def __init__(self, n_buckets: int = 32):
+        self.counts = [0] * n_buckets
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        bucket = min(int(seconds * 1e6).bit_length(), len(self.counts) - 1)
+        with self._lock:
+            self.counts[bucket] += 1
+            self.count += 1
+            self.total += seconds
+
+    def quantile(self, q: float) -> float:
+        """Upper bound, in milliseconds, of the bucket holding the q-quantile."""
+        with self._lock:
+            rank = q * self.count
+            seen = 0
+            for bucket, n in enumerate(self.counts):
+                seen += n
+                if n and seen >= rank:
+                    return (1 << bucket) / 1e3
+        return 0.0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self.counts)
+            count, total = self.count, self.total
+        return {
+            "count": count,
+            "mean_ms": total / count * 1e3 if count else 0.0,
+            "p50_ms": self.quantile(0.50),
+            "p90_ms": self.quantile(0.90),
+            "p99_ms": self.quantile(0.99),
+            "buckets_ms": {f"<{(1 << i) / 1e3:g}": n for i, n in enumerate(counts) if n},
+        }
+
+
+class BatchCoalescer:
+    """
+    Collects items submitted from many threads and hands them to `handler`
+    in batches. Everything queued while the previous batch ran joins the next
+    one; with `max_wait` > 0 a batch also waits up to that many seconds after
+    its first request for more to arrive. Batches never exceed `max_batch`
+    items unless a single request is larger. If the handler fails on a
+    coalesced batch, each request in it is retried alone so an error only
+    reaches the request that caused it.
+    """
+
+    def __init__(self, handler: Callable[[list], list], max_batch: int = 4096, max_wait: float = 0.0):
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.batched_items = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="batch-coalescer", daemon=True)
+        self._thread.start()
+
+    def submit(self, items: list) -> Future:
+        """Queues items; the future resolves to the handler's results for them."""
+        future = Future()
+        self._queue.put((items, future))
+        return future
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+            pending = [first]
+            size = len(first[0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - time.monotonic()
+                try:
+                    if timeout > 0:
+                        request = self._queue.get(timeout=timeout)
+                    else:
+                        request = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                pending.append(request)
+                size += len(request[0])
+            self._dispatch(pending)
+
+    def _dispatch(self, pending: list) -> None:
+        items = [item for request_items, _ in pending for item in request_items]
+        self.batches += 1
+        self.batched_items += len(items)
+        try:
+            results = self.handler(items)
+        except Exception as e:
+            if len(pending) == 1:
+                pending[0][1].set_exception(e)
+            else:
+                # Re-run each request on its own so only the failing one errors.
+                for request in pending:
+                    self._dispatch_one(*request)
+            return
+        offset = 0
+        for request_items, future in pending:
+            future.set_result(results[offset:offset + len(request_items)])
+            offset += len(request_items)
+
+    def _dispatch_one(self, items: list, future: Future) -> None:
+        try:
+            future.set_result(self.handler(items))
+        except Exception as e:
+            future.set_exception(e)
+
+
+class LicensingService:
+    """Warm licensing oracle shared by all request handler threads."""
+
+    def __init__(
+        self,
+        graph_path: str,
+        shacl_path: str,
+        policy: Optional[AbstentionPolicy] = None,
+        max_batch: int = 4096,
+        max_wait: float = 0.0,
+    ):
+        """
+        Args:
+            graph_path (str): Turtle file with the knowledge graph; it is opened
+                through its binary snapshot (see GraphStore.open_snapshot).
+            shacl_path (str): Turtle file with the SHACL constraints.
+            policy (AbstentionPolicy): Decision policy, default thresholds if omitted.
+            max_batch (int): Largest number of claims audited in one batch.
+            max_wait (float): Seconds a batch waits for concurrent requests.
+        """
+        self.store = GraphStore.open_snapshot(graph_path)
+        self.graph = self.store.get_graph()
+        self.auditor = ConsistencyAuditor(shacl_path)
+        self.auditor.compile_constraints(self.graph)
+        self.policy = policy or AbstentionPolicy()
+        self.coalescer = BatchCoalescer(self.audit_batch, max_batch=max_batch, max_wait=max_wait)
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self._latency_lock = threading.Lock()
+
+    def audit_batch(self, claims: List[dict]) -> List[dict]:
+        """Audits claims in one pass, returning one decision dict per claim."""
+        licensed = self.auditor.audit_claims(self.graph, claims)
+        violated = self.auditor.check_claims(self.graph, claims)
+        labels = self.policy.label_batch(licensed, violated)
+        decisions = self.policy.decide_batch(licensed, violated)
+        return [
+            {"licensed": l, "violated": v, "label": label, "decision": decision}
+            for l, v, label, decision in zip(
+                licensed.tolist(), violated.tolist(), labels.tolist(), decisions.tolist()
+            )
+        ]
+
+    def audit(self, claims: List[dict], timeout: Optional[float] = None) -> List[dict]:
+        """Audits claims together with any other requests in flight."""
+        return self.coalescer.submit(claims).result(timeout)
+
+    def observe(self, endpoint: str, seconds: float) -> None:
+        histogram = self.latency.get(endpoint)
+        if histogram is None:
+            with self._latency_lock:
+                histogram = self.latency.setdefault(endpoint, LatencyHistogram())
+        histogram.observe(seconds)
+
+    def metrics(self) -> dict:
+        return {
+            "graph": {"triples": len(self.graph), "source_sha256": self.store.source_hash},
+            "endpoints": {name: h.snapshot() for name, h in sorted(self.latency.items())},
+            "batches": self.coalescer.batches,
+            "batched_claims": self.coalescer.batched_items,
+        }
+
+    def make_server(self, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+        server = ThreadingHTTPServer((host, port), LicensingRequestHandler)
+        server.daemon_threads = True
+        server.service = self
+        return server
+
+    def close(self) -> None:
+        self.coalescer.close()
+
+
+def _parse_claim(claim) -> dict:
+    if not isinstance(claim, dict):
+        raise ValueError("A claim must be a JSON object")
+    claim = claim.get("claim", claim)
+    if not isinstance(claim, dict):
+        raise ValueError("A claim must be a JSON object")
+    parsed = {}
+    for key in ("subject", "predicate", "object"):
+        value = claim.get(key)
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f'Claim field "{key}" must be a string or null')
+        parsed[key] = value or None
+    return parsed
+
+
+class LicensingRequestHandler(BaseHTTPRequestHandler):
+    """Routes HTTP requests to the LicensingService attached to the server."""
+
+    server_version = "WorldMindOracle/0.1"
+
+    def do_GET(self):
+        start = time.perf_counter()
+        if self.path == "/health":
+            self._reply(200, {"status": "ok"})
+        elif self.path == "/metrics":
+            self._reply(200, self.server.service.metrics())
+        else:
+            self._reply(404, {"error": f"Unknown path {self.path}"})
+            return
+        self.server.service.observe(f"GET {self.path}", time.perf_counter() - start)
+
+    def do_POST(self):
+        start = time.perf_counter()
+        service = self.server.service
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"null")
+            if self.path == "/audit":
+                response = service.audit([_parse_claim(body)])[0]
+            elif self.path == "/audit_batch":
+                if not isinstance(body, dict) or not isinstance(body.get("claims"), list):
+                    raise ValueError('Expected a JSON object with a "claims" list')
+                claims = [_parse_claim(claim) for claim in body["claims"]]
+                response = {"results": service.audit(claims) if claims else []}
+            else:
+                self._reply(404, {"error": f"Unknown path {self.path}"})
+                return
+        except (ValueError, json.JSONDecodeError) as e:
+            self._reply(400, {"error": str(e)})
+        except Exception as e:
+            self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+        else:
+            self._reply(200, response)
+        service.observe(f"POST {self.path}", time.perf_counter() - start)
+
+    def _reply(self, status: int, payload) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Per-request logging would dominate millisecond latencies; see /metrics.
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve licensing decisions over HTTP.")
+    parser.add_argument("--graph", required=True, help="Turtle file with the knowledge graph")
+    parser.add_argument("--shacl", required=True, help="Turtle file with the SHACL constraints")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-batch", type=int, default=4096)
+    parser.add_argument("--max-wait-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    service = LicensingService(
+        args.graph, args.shacl, max_batch=args.max_batch, max_wait=args.max_wait_ms / 1e3
+    )
+    server = service.make_server(args.host, args.port)
+    print(f"Licensing oracle listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,503 @@
+"""
+Compact, dictionary-encoded triple store.
+
+Terms are interned into a string dictionary (N-Triples syntax, UTF-8 blob plus
+offsets) and triples are stored as packed integer columns sorted in SPO order,
+with POS and OSP permutations for the other access paths. The store is
+read-only once built and exposes the subset of the rdflib ``Graph`` API used
+by the experiments (``in``, ``len``, ``triples``, ``subjects``, ``objects``...).
+
+Stores can be saved as versioned binary snapshots and reopened read-only via
+mmap, so startup is near-instant and processes on one host share pages.
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+import zlib
+from typing import Iterable, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+from rdflib import BNode, Graph, Literal, URIRef
+
+
+SNAPSHOT_MAGIC = b"WMSNAP\x00\x00"
+SNAPSHOT_VERSION = 2
+_SNAPSHOT_PREAMBLE = struct.Struct("<8sII")  # magic, version, header length
+_SNAPSHOT_ALIGN = 64
+
+_UNESCAPE_RE = re.compile(r"\\(.)", re.DOTALL)
+_UNESCAPES = {"n": "\n", "r": "\r", "t": "\t"}
+
+
+def _escape(text: str) -> str:
+    return (
+        text.replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _unescape(text: str) -> str:
+    if "\\" not in text:
+        return text
+    return _UNESCAPE_RE.sub(lambda m: _UNESCAPES.get(m.group(1), m.group(1)), text)
+
+
+def term_key(term) -> str:
+    """Returns the canonical N-Triples form of an rdflib term."""
+    if isinstance(term, URIRef):
+        return f"<{term}>"
+    if isinstance(term, BNode):
+        return f"_:{term}"
+    if isinstance(term, Literal):
+        lexical = _escape(str(term))
+        if term.language:
+            return f'"{lexical}"@{term.language}'
+        if term.datatype:
+            return f'"{lexical}"^^<{term.datatype}>'
+        return f'"{lexical}"'
+    raise TypeError(f"Unsupported RDF term: {term!r}")
+
+
+def key_to_term(key: str):
+    """Inverse of :func:`term_key`."""
+    if key.startswith("<"):
+        return URIRef(key[1:-1])
+    if key.startswith("_:"):
+        return BNode(key[2:])
+    end = key.rfind('"')
+    lexical = _unescape(key[1:end])
+    suffix = key[end + 1:]
+    if suffix.startswith("@"):
+        return Literal(lexical, lang=suffix[1:])
+    if suffix.startswith("^^<"):
+        return Literal(lexical, datatype=URIRef(suffix[3:-1]))
+    return Literal(lexical)
+
+
+def key_value(key: str) -> str:
+    """Returns ``str(term)`` for a term key without building the rdflib term."""
+    if key.startswith("<"):
+        return key[1:-1]
+    if key.startswith("_:"):
+        return key[2:]
+    return _unescape(key[1:key.rfind('"')])
+
+
+class TermDictionary:
+    """
+    Immutable string dictionary mapping term keys to dense integer IDs.
+
+    Keys are stored back to back in a UTF-8 blob addressed by an offsets array,
+    and looked up through an open-addressing hash table keyed by CRC32.
+    """
+
+    def __init__(self, offsets: np.ndarray, blob, hashes: np.ndarray, table: np.ndarray):
+        self.offsets = offsets
+        self.hashes = hashes
+        self.table = table
+        self._blob = memoryview(blob).cast("B")
+        self._mask = len(table) - 1
+        # Plain memoryviews index to Python ints, much faster than NumPy scalars.
+        self._offsets = memoryview(offsets)
+        self._hashes = memoryview(hashes)
+        self._table = memoryview(table)
+
+    @classmethod
+    def from_keys(cls, keys: Sequence[str]) -> "TermDictionary":
+        """Builds a dictionary from unique keys; key ``i`` gets ID ``i``."""
+        encoded = [k.encode("utf-8") for k in keys]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        if encoded:
+            np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        blob = b"".join(encoded)
+        hashes = np.fromiter((zlib.crc32(b) for b in encoded), dtype=np.uint32, count=len(encoded))
+        return cls(offsets, blob, hashes, cls._build_table(hashes))
+
+    @staticmethod
+    def _build_table(hashes: np.ndarray) -> np.ndarray:
+        size = 1
+        while size < 2 * len(hashes):
+            size <<= 1
+        mask = size - 1
+        table = np.full(size, -1, dtype=np.int32)
+        pending = np.arange(len(hashes), dtype=np.int64)
+        slots = hashes.astype(np.int64) & mask
+        # Linear probing, resolved one probe round at a time for all keys at once.
+        while len(pending):
+            free = table[slots] == -1
+            _, first = np.unique(slots[free], return_index=True)
+            winners = np.flatnonzero(free)[first]
+            table[slots[winners]] = pending[winners]
+            keep = np.ones(len(pending), dtype=bool)
+            keep[winners] = False
+            pending = pending[keep]
+            slots = (slots[keep] + 1) & mask
+        return table
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + len(self._blob) + self.hashes.nbytes + self.table.nbytes
+
+    def key(self, term_id: int) -> str:
+        return bytes(self._blob[self._offsets[term_id]:self._offsets[term_id + 1]]).decode("utf-8")
+
+    def term(self, term_id: int):
+        return key_to_term(self.key(term_id))
+
+    def value(self, term_id: int) -> str:
+        return key_value(self.key(term_id))
+
+    def iri_mask(self) -> np.ndarray:
+        """Boolean array marking the IDs whose term is an IRI."""
+        return np.frombuffer(self._blob, dtype=np.uint8)[self.offsets[:-1]] == ord("<")
+
+    def lookup(self, key: str) -> int:
+        """Returns the ID of ``key``, or -1 if it is not in the dictionary."""
+        encoded = key.encode("utf-8")
+        h = zlib.crc32(encoded)
+        slot = h & self._mask
+        table, hashes, offsets = self._table, self._hashes, self._offsets
+        while True:
+            term_id = table[slot]
+            if term_id < 0:
+                return -1
+            if hashes[term_id] == h and self._blob[offsets[term_id]:offsets[term_id + 1]] == encoded:
+                return term_id
+            slot = (slot + 1) & self._mask
+
+    def lookup_many(self, keys: Iterable[Optional[str]]) -> np.ndarray:
+        """Vector form of :meth:`lookup`; ``None`` keys map to -1."""
+        resolved = {None: -1}
+        ids = []
+        for k in keys:
+            term_id = resolved.get(k)
+            if term_id is None:
+                term_id = resolved[k] = self.lookup(k)
+            ids.append(term_id)
+        return np.array(ids, dtype=np.int64)
+
+
+class TripleStore:
+    """
+    Read-only triple store over integer term IDs.
+
+    ``s``, ``p`` and ``o`` hold the deduplicated triples sorted in SPO order;
+    ``pos`` and ``osp`` are permutations of those rows sorted by (p, o, s) and
+    (o, s, p). ``predicate_ids`` lists the distinct predicate IDs in sorted
+    order, and ``spo_keys`` packs each row into a single uint64 so membership
+    tests reduce to a binary search.
+    """
+
+    def __init__(self, terms: TermDictionary, s: np.ndarray, p: np.ndarray, o: np.ndarray,
+                 predicate_ids: np.ndarray, spo_keys: np.ndarray, pos: np.ndarray, osp: np.ndarray):
+        self.terms = terms
+        self.s = s
+        self.p = p
+        self.o = o
+        self.predicate_ids = predicate_ids
+        self.spo_keys = spo_keys
+        self.pos = pos
+        self.osp = osp
+        self.source = {}
+        self._predicate_rank = {int(pid): rank for rank, pid in enumerate(predicate_ids)}
+        self._adjacency = None
+
+    @classmethod
+    def from_graph(cls, graph: Graph, terms: Optional[TermDictionary] = None) -> "TripleStore":
+        """
+        Encodes an rdflib graph. If ``terms`` is given, IDs are resolved against
+        that (shared) dictionary, which must already contain every term.
+        """
+        return cls.from_keys(
+            ((term_key(s), term_key(p), term_key(o)) for s, p, o in graph), terms
+        )
+
+    @classmethod
+    def from_keys(cls, triples: Iterable[Tuple[str, str, str]],
+                  terms: Optional[TermDictionary] = None) -> "TripleStore":
+        """Builds a store from ``(s, p, o)`` term-key tuples."""
+        ids = {}
+        rows = []
+        for s, p, o in triples:
+            for k in (s, p, o):
+                if k not in ids:
+                    ids[k] = len(ids) if terms is None else terms.lookup(k)
+                    if ids[k] < 0:
+                        raise KeyError(f"Term {k} is missing from the shared dictionary")
+            rows.append((ids[s], ids[p], ids[o]))
+        if terms is None:
+            terms = TermDictionary.from_keys(list(ids))
+        spo = np.array(rows, dtype=np.int32).reshape(-1, 3)
+        return cls.from_ids(terms, spo[:, 0], spo[:, 1], spo[:, 2])
+
+    @classmethod
+    def from_ids(cls, terms: TermDictionary, s: np.ndarray, p: np.ndarray, o: np.ndarray) -> "TripleStore":
+        """Sorts, deduplicates and indexes triples given as ID columns."""
+        s = np.asarray(s, dtype=np.int32)
+        p = np.asarray(p, dtype=np.int32)
+        o = np.asarray(o, dtype=np.int32)
+        predicate_ids = np.unique(p)
+        n_terms = len(terms)
+        if n_terms and float(n_terms) ** 2 * max(len(predicate_ids), 1) >= 2 ** 63:
+            raise OverflowError("Too many terms to pack triples into 64-bit keys")
+
+        keys = cls._pack(s, np.searchsorted(predicate_ids, p), o, len(predicate_ids), n_terms)
+        keys, first = np.unique(keys, return_index=True)
+        s, p, o = s[first], p[first], o[first]
+
+        pos = np.lexsort((s, o, p))
+        osp = np.lexsort((p, s, o))
+        return cls(terms, s, p, o, predicate_ids, keys, pos, osp)
+
+    @staticmethod
+    def _pack(s, p_rank, o, n_predicates: int, n_terms: int) -> np.ndarray:
+        s = np.asarray(s, dtype=np.uint64)
+        p_rank = np.asarray(p_rank, dtype=np.uint64)
+        o = np.asarray(o, dtype=np.uint64)
+        return (s * np.uint64(n_predicates) + p_rank) * np.uint64(n_terms) + o
+
+    def __len__(self) -> int:
+        return len(self.s)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.s, self.p, self.o, self.predicate_ids, self.spo_keys, self.pos, self.osp)
+        return self.terms.nbytes + sum(a.nbytes for a in arrays)
+
+    # ------------------------------------------------------------------
+    # Membership
+    # ------------------------------------------------------------------
+
+    def contains_ids(self, s: np.ndarray, p: np.ndarray, o: np.ndarray) -> np.ndarray:
+        """Vectorized membership test over ID arrays; negative IDs never match."""
+        s = np.asarray(s, dtype=np.int64)
+        p = np.asarray(p, dtype=np.int64)
+        o = np.asarray(o, dtype=np.int64)
+        result = np.zeros(len(s), dtype=bool)
+        p_rank = np.searchsorted(self.predicate_ids, p)
+        known = (s >= 0) & (o >= 0) & (p >= 0) & (p_rank < len(self.predicate_ids))
+        known[known] = self.predicate_ids[p_rank[known]] == p[known]
+        if not known.any() or not len(self.spo_keys):
+            return result
+        keys = self._pack(s[known], p_rank[known], o[known], len(self.predicate_ids), len(self.terms))
+        idx = np.minimum(np.searchsorted(self.spo_keys, keys), len(self.spo_keys) - 1)
+        result[known] = self.spo_keys[idx] == keys
+        return result
+
+    def contains_id(self, s: int, p: int, o: int) -> bool:
+        """Scalar form of :meth:`contains_ids`."""
+        if s < 0 or p < 0 or o < 0:
+            return False
+        p_rank = self._predicate_rank.get(p)
+        if p_rank is None:
+            return False
+        key = (s * len(self.predicate_ids) + p_rank) * len(self.terms) + o
+        idx = int(self.spo_keys.searchsorted(np.uint64(key)))
+        return idx < len(self.spo_keys) and int(self.spo_keys[idx]) == key
+
+    def contains_keys(self, s: Sequence[Optional[str]], p: Sequence[Optional[str]],
+                      o: Sequence[Optional[str]]) -> np.ndarray:
+        """Vectorized membership test over term keys (``None`` never matches)."""
+        lookup = self.terms.lookup_many
+        return self.contains_ids(lookup(s), lookup(p), lookup(o))
+
+    def __contains__(self, triple) -> bool:
+        s, p, o = triple
+        if s is None or p is None or o is None:
+            return next(self.triples(triple), None) is not None
+        lookup = self.terms.lookup
+        return self.contains_id(lookup(term_key(s)), lookup(term_key(p)), lookup(term_key(o)))
+
+    # ------------------------------------------------------------------
+    # Pattern queries
+    # ------------------------------------------------------------------
+
+    def _resolve(self, term) -> Optional[int]:
+        return None if term is None else self.terms.lookup(term_key(term))
+
+    @staticmethod
+    def _bounds(term_id: int) -> np.ndarray:
+        # Needles must share the column dtype, or searchsorted casts the column.
+        return np.array([term_id, term_id + 1], dtype=np.int32)
+
+    def match_ids(self, s: Optional[int] = None, p: Optional[int] = None,
+                  o: Optional[int] = None) -> np.ndarray:
+        """Returns SPO row numbers matching a pattern of term IDs (``None`` = wildcard)."""
+        if s is not None:
+            lo, hi = np.searchsorted(self.s, self._bounds(s))
+            rows = np.arange(lo, hi)
+            if p is not None:
+                rows = rows[self.p[rows] == p]
+            if o is not None:
+                rows = rows[self.o[rows] == o]
+            return rows
+        if p is not None:
+            lo, hi = np.searchsorted(self.p, self._bounds(p), sorter=self.pos)
+            rows = self.pos[lo:hi]
+            if o is not None:
+                objects = self.o[rows]
+                lo, hi = np.searchsorted(objects, self._bounds(o))
+                rows = rows[lo:hi]
+            return rows
+        if o is not None:
+            lo, hi = np.searchsorted(self.o, self._bounds(o), sorter=self.osp)
+            return self.osp[lo:hi]
+        return np.arange(len(self.s))
+
+    def adjacency(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        CSR offsets over term IDs, built on first use: SPO rows
+        ``out_offsets[t]:out_offsets[t + 1]`` have subject ``t``, and
+        ``osp[in_offsets[t]:in_offsets[t + 1]]`` are the rows with object ``t``.
+        """
+        if self._adjacency is None:
+            ids = np.arange(len(self.terms) + 1, dtype=np.int32)
+            self._adjacency = (
+                np.searchsorted(self.s, ids),
+                np.searchsorted(self.o, ids, sorter=self.osp),
+            )
+        return self._adjacency
+
+    def triples(self, pattern) -> Iterator[Tuple]:
+        """rdflib-compatible ``triples((s, p, o))`` with ``None`` wildcards."""
+        ids = [self._resolve(t) for t in pattern]
+        if any(i is not None and i < 0 for i in ids):
+            return
+        term = self.terms.term
+        for row in self.match_ids(*ids):
+            yield term(self.s[row]), term(self.p[row]), term(self.o[row])
+
+    def __iter__(self):
+        return self.triples((None, None, None))
+
+    def subjects(self, predicate=None, object=None) -> Iterator:
+        for s, _, _ in self.triples((None, predicate, object)):
+            yield s
+
+    def predicates(self, subject=None, object=None) -> Iterator:
+        for _, p, _ in self.triples((subject, None, object)):
+            yield p
+
+    def objects(self, subject=None, predicate=None) -> Iterator:
+        for _, _, o in self.triples((subject, predicate, None)):
+            yield o
+
+    def subject_objects(self, predicate=None) -> Iterator[Tuple]:
+        for s, _, o in self.triples((None, predicate, None)):
+            yield s, o
+
+    def to_rdflib(self) -> Graph:
+        """Materializes the store as a regular rdflib ``Graph``."""
+        g = Graph()
+        for triple in self:
+            g.add(triple)
+        return g
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+
+    def _arrays(self) -> dict:
+        return {
+            "term_offsets": self.terms.offsets,
+            "term_blob": np.frombuffer(self.terms._blob, dtype=np.uint8),
+            "term_hashes": self.terms.hashes,
+            "term_table": self.terms.table,
+            "s": self.s,
+            "p": self.p,
+            "o": self.o,
+            "predicate_ids": self.predicate_ids,
+            "spo_keys": self.spo_keys,
+            "pos": self.pos,
+            "osp": self.osp,
+        }
+
+    def save(self, path: str, source: Optional[dict] = None) -> None:
+        """
+        Writes a binary snapshot: a small JSON header describing the arrays,
+        followed by the raw arrays, each aligned to 64 bytes. ``source`` is
+        stored verbatim in the header (used for invalidation).
+
+        The file is written to a temporary name and renamed into place, so
+        concurrent readers never see a partial snapshot.
+        """
+        arrays = self._arrays()
+        layout = {}
+        offset = 0
+        for name, arr in arrays.items():
+            layout[name] = {"offset": offset, "dtype": arr.dtype.str, "shape": list(arr.shape)}
+            offset += -(-arr.nbytes // _SNAPSHOT_ALIGN) * _SNAPSHOT_ALIGN
+        header = json.dumps({
+            "version": SNAPSHOT_VERSION,
+            "n_terms": len(self.terms),
+            "n_triples": len(self),
+            "source": source or {},
+            "arrays": layout,
+        }).encode("utf-8")
+        data_start = -(-(_SNAPSHOT_PREAMBLE.size + len(header)) // _SNAPSHOT_ALIGN) * _SNAPSHOT_ALIGN
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_SNAPSHOT_PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(header)))
+                f.write(header)
+                for name, arr in arrays.items():
+                    f.seek(data_start + layout[name]["offset"])
+                    f.write(np.ascontiguousarray(arr).tobytes())
+                f.truncate(data_start + offset)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def read_snapshot_header(path: str) -> dict:
+        """Returns the JSON header of a snapshot, raising ValueError if it is not one."""
+        with open(path, "rb") as f:
+            preamble = f.read(_SNAPSHOT_PREAMBLE.size)
+            if len(preamble) < _SNAPSHOT_PREAMBLE.size:
+                raise ValueError(f"{path} is not a WorldMind graph snapshot")
+            magic, version, header_len = _SNAPSHOT_PREAMBLE.unpack(preamble)
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"{path} is not a WorldMind graph snapshot")
+            if version != SNAPSHOT_VERSION:
+                raise ValueError(
+                    f"Snapshot {path} has format version {version}, expected {SNAPSHOT_VERSION}"
+                )
+            header = json.loads(f.read(header_len).decode("utf-8"))
+        header["data_start"] = (
+            -(-(_SNAPSHOT_PREAMBLE.size + header_len) // _SNAPSHOT_ALIGN) * _SNAPSHOT_ALIGN
+        )
+        return header
+
+    @classmethod
+    def open(cls, path: str) -> "TripleStore":
+        """Maps a snapshot read-only; arrays are views into the shared mapping."""
+        header = cls.read_snapshot_header(path)
+        with open(path, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"], dtype=np.int64))
+            arrays[name] = np.frombuffer(
+                buf, dtype=dtype, count=count, offset=header["data_start"] + spec["offset"]
+            ).reshape(spec["shape"])
+        terms = TermDictionary(
+            arrays["term_offsets"], arrays["term_blob"], arrays["term_hashes"], arrays["term_table"]
+        )
+        store = cls(terms, arrays["s"], arrays["p"], arrays["o"], arrays["predicate_ids"],
+                    arrays["spo_keys"], arrays["pos"], arrays["osp"])
+        store.source = header["source"]
+        return store